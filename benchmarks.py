@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Microbenchmarks for the hot paths of ``roboglia``.
+
+Run with::
+
+    python benchmarks.py [-n NUMBER]
+
+Each benchmark reports the time per call, measured with the garbage
+collector enabled so that the cost of the allocations is included.
+"""
+
+import argparse
+import gc
+import sys
+import timeit
+from math import nan
+
+from roboglia.base import PVL, PVLList, JointManager
+
+
+class BenchJoint():
+    """Minimal stand-in for a Joint: the manager only needs the name,
+    the limits, the deadband and the value setter."""
+    def __init__(self, name):
+        self.name = name
+        self.value = PVL()
+        self.auto_activate = False
+        self.deadband = (0.0, 0.0, 0.0)
+        self.range = (None, None)
+        self.max_velocity = None
+        self.max_acceleration = None
+
+
+class BenchStream():
+    """Minimal stand-in for a stream submitting to the manager."""
+    def __init__(self, name):
+        self.name = name
+
+
+def setup_manager(joints=24, streams=6):
+    """A manager with ``joints`` joints and ``streams`` streams that
+    have each submitted commands for all the joints."""
+    manager = JointManager(name='bench',
+                           joints=[BenchJoint(f'j{index:02d}')
+                                   for index in range(joints)])
+    for index in range(streams):
+        commands = {joint.name: (index * 10.0, 5.0, nan)
+                    for joint in manager.joints}
+        manager.submit(BenchStream(f's{index}'), commands)
+    return manager
+
+
+def benchmarks():
+    """Returns a dictionary {name: callable} with the benchmarks."""
+    pvl1 = PVL(10.0, 20.0, nan)
+    pvl2 = PVL(1.0, nan, 3.0)
+    acc = PVL(0.0, 0.0, 0.0)
+    pvl_list = PVLList(p=list(range(24)), v=[1.0] * 24)
+    manager = setup_manager()
+    stream = BenchStream('s0')
+    commands = {joint.name: (1.0, 2.0, nan) for joint in manager.joints}
+
+    def iadd():
+        nonlocal acc
+        acc += pvl2
+
+    return {
+        'PVL()': lambda: PVL(1.0, 2.0, 3.0),
+        'PVL + PVL': lambda: pvl1 + pvl2,
+        'PVL += PVL': iadd,
+        'PVL == PVL': lambda: pvl1 == pvl2,
+        'PVL.is_empty()': pvl1.is_empty,
+        'PVLList(24)': lambda: PVLList(p=list(range(24))),
+        'PVLList.process()': pvl_list.process,
+        'PVLList[i]': lambda: pvl_list[5],
+        'JointManager.submit() 24 joints': lambda: manager.submit(stream,
+                                                                  commands),
+        'JointManager.atomic() 24x6': manager.atomic,
+    }
+
+
+def measure(func, number):
+    """Returns the seconds per call for ``func``."""
+    gc.collect()
+    timer = timeit.Timer(func, 'gc.enable()', globals={'gc': gc})
+    return timer.timeit(number=number) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-n', '--number', type=int, default=10000,
+                        help='number of calls for each benchmark')
+    args = parser.parse_args()
+    print(f'PVL instance size: {sys.getsizeof(PVL())} bytes')
+    print(f'{"benchmark":40s} {"us/call":>10s}')
+    for name, func in benchmarks().items():
+        duration = measure(func, args.number)
+        print(f'{name:40s} {duration * 1e6:10.2f}')
+
+
+if __name__ == '__main__':
+    main()
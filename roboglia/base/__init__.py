@@ -5,6 +5,7 @@ from .bus import FileBus
 from .bus import SharedBus                      # noqa: 401
 from .bus import SharedFileBus
 
+from .register import RegisterSpec              # noqa: 401
 from .register import BaseRegister
 from .register import BoolRegister
 from .register import RegisterWithConversion
@@ -19,19 +20,33 @@ from .joint import PVLList                      # noqa: 401
 from .joint import Joint
 from .joint import JointPV
 from .joint import JointPVL
+from .joint import JointGroup                   # noqa: 401
 
 from .sensor import Sensor
 from .sensor import SensorXYZ
 
+from .clock import SystemClock                  # noqa: 401
+from .clock import VirtualClock                 # noqa: 401
+
 from .thread import BaseThread                  # noqa: 401
 from .thread import BaseLoop                    # noqa: 401
 
+from .executor import CooperativeExecutor       # noqa: 401
+
 from .sync import BaseSync                      # noqa: 401
 from .sync import BaseReadSync                  # noqa: 401
 from .sync import BaseWriteSync                 # noqa: 401
 
 from .robot import BaseRobot                    # noqa: 401
 from .robot import JointManager                 # noqa: 401
+from .robot import CommandBuffer                # noqa: 401
+from .robot import Mailbox                      # noqa: 401
+
+from .trajectory import Trajectory              # noqa: 401
+
+from .trace import LatencyTracer                # noqa: 401
+
+from .kinematics import KinematicChain          # noqa: 401
 
 register_class(FileBus)
 register_class(SharedFileBus)
@@ -164,6 +164,11 @@ class BaseBus():
 
         val: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool
+            ``True`` if the value was written successfully.
         """
         raise NotImplementedError
 
@@ -228,9 +233,15 @@ class FileBus(BaseBus):
 
         value: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool
+            ``True`` if the value was written successfully.
         """
         if not self.is_open:
             logger.error(f'attempt to write to closed bus {self.name}')
+            return False
         else:
             self.__last[(reg.device.dev_id, reg.address)] = value
             text = f'written {value} in register "{reg.name}"" ' + \
@@ -242,7 +253,9 @@ class FileBus(BaseBus):
             except Exception:           # pragma: no cover
                 logger.error(f'error executing write and flush to file '
                              f'for bus: {self.name}')
+                return False
             logger.debug(f'FileBus "{self.name}" {text}')
+            return True
 
     def read(self, reg):
         """Reads the value from the buffer of ``FileBus`` and logs it.
@@ -439,8 +452,13 @@ class SharedBus():
 
         value: int
             The value needed to the written to the device.
+
+        Returns
+        -------
+        bool
+            ``True`` if the value was written successfully.
         """
-        self.__main_bus.write(reg, value)
+        return self.__main_bus.write(reg, value)
 
     def read(self, reg):
         """Overrides the main bus' :py:meth:`~roboglia.base.BaseBus.read`
@@ -493,12 +511,18 @@ class SharedBus():
 
         value: int
             The value to be written to the device.
+
+        Returns
+        -------
+        bool
+            ``True`` if the value was written successfully.
         """
         if self.can_use():
-            self.__main_bus.write(reg, value)
+            result = self.__main_bus.write(reg, value)
             self.stop_using()
-        else:
-            logger.error(f'failed to acquire bus {self.__main_bus.name}')
+            return result
+        logger.error(f'failed to acquire bus {self.__main_bus.name}')
+        return False
 
     def __repr__(self):
         """Invokes the main bus representation but changes the class name
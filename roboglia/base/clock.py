@@ -0,0 +1,85 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import time
+import logging
+
+from ..utils import check_type
+
+logger = logging.getLogger(__name__)
+
+
+class SystemClock():
+    """The clock used by default by all threads and loops in ``roboglia``.
+
+    It is a thin wrapper around the monotonic clock of the operating system
+    and the ``time.sleep`` function. All the timing decisions taken by
+    threads and loops are done through a clock object so that they can be
+    replaced with a :py:class:`VirtualClock` in simulation.
+    """
+    def time(self):
+        """Returns the current time in seconds. The reference point is
+        undefined, only differences between consecutive calls are
+        meaningful."""
+        return time.monotonic()
+
+    def sleep(self, duration):
+        """Suspends the execution of the calling thread for the given
+        ``duration`` in seconds. Negative or zero values return
+        immediately."""
+        if duration > 0:
+            time.sleep(duration)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} time={self.time():.6f}>'
+
+
+class VirtualClock(SystemClock):
+    """A clock that does not follow the real time; the time only advances
+    when somebody calls :py:meth:`sleep` or :py:meth:`advance_to`.
+
+    Used together with the :py:class:`CooperativeExecutor` it allows running
+    all the loops and scripts of a robot deterministically and much faster
+    than real time.
+
+    Parameters
+    ----------
+    start: float
+        The initial value of the clock in seconds. Default is 0.0.
+    """
+    def __init__(self, start=0.0):
+        check_type(start, (float, int), 'clock', 'VirtualClock', logger)
+        self.__now = float(start)
+
+    def time(self):
+        """Returns the current virtual time."""
+        return self.__now
+
+    def sleep(self, duration):
+        """Advances the virtual time with ``duration`` seconds without
+        actually suspending the caller."""
+        if duration > 0:
+            self.__now += duration
+
+    def advance_to(self, moment):
+        """Moves the virtual time to ``moment`` if this is in the future.
+        Requests to move the time backwards are ignored."""
+        if moment > self.__now:
+            self.__now = moment
+
+
+SYSTEM_CLOCK = SystemClock()
+"""The default clock shared by all threads that were not assigned a
+specific one."""
@@ -142,6 +142,7 @@ class BaseDevice():
                 self.__dict__[reg_name] = new_register
                 self.__registers[reg_name] = new_register
                 self.__reg_by_addr[reg_info['address']] = new_register
+        self.__init_image()
         # now the clones
         for reg_info in clones:
             # check that the register address is covered by a main register
@@ -161,6 +162,73 @@ class BaseDevice():
             self.__registers[reg_name] = new_register
         self.__inits = inits
 
+    def __init_image(self):
+        """Creates the control table image of the device and binds the
+        main registers to it (see :py:meth:`BaseRegister.bind`). Registers
+        that partially overlap other registers keep their own values; those
+        covering exactly the same bytes share them."""
+        spans = {}
+        for register in self.__registers.values():
+            spec = register.spec
+            if not spec.word and isinstance(spec.address, int) and \
+                    spec.address >= 0:
+                spans[register] = (spec.address, spec.address + spec.size)
+        extent = max([end for _, end in spans.values()], default=0)
+        self.__image_version = 0
+        self.__image = memoryview(bytearray(extent))
+        for register, (start, end) in spans.items():
+            if any(start < other_end and other_start < end and
+                   (start, end) != (other_start, other_end)
+                   for other_start, other_end in spans.values()):
+                logger.debug(f'register {register.name} of device '
+                             f'{self.name} overlaps other registers; '
+                             'not bound to the image')
+                continue
+            register.bind(self.__image)
+
+    @property
+    def image(self):
+        """(read-only) The control table image of the device as a writable
+        ``memoryview`` of bytes indexed by register address. The bound
+        registers store their values here, in the device's byte order, so
+        the syncs can copy whole ranges of registers in and out of it."""
+        return self.__image
+
+    @property
+    def image_version(self):
+        """(read-only) A counter incremented each time the image is loaded
+        with :py:meth:`load_image`."""
+        return self.__image_version
+
+    def load_image(self, start, data, spans=None):
+        """Copies ``data`` (bytes or a list of byte values, as received from
+        the bus) in the image starting at address ``start``, updating all the
+        bound registers in that range at once. Used by the read syncs.
+
+        Parameters
+        ----------
+        start: int
+            The address of the first byte.
+
+        data: bytes-like or list of int
+            The values of the bytes.
+
+        spans: list of tuples (address, size) or ``None``
+            If provided, only these spans of bytes are copied from ``data``
+            (see :py:meth:`BaseSync.get_register_spans`), leaving the other
+            registers in the range unchanged. If ``None`` (default) all
+            ``data`` is copied.
+        """
+        data = bytes(data)
+        image = self.__image
+        if spans is None:
+            image[start:start + len(data)] = data
+        else:
+            for address, size in spans:
+                offset = address - start
+                image[address:address + size] = data[offset:offset + size]
+        self.__image_version += 1
+
     @property
     def name(self):
         """Device name.
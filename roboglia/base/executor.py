@@ -0,0 +1,193 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import logging
+
+from .clock import VirtualClock
+
+logger = logging.getLogger(__name__)
+
+
+class CooperativeExecutor():
+    """Runs a number of threads (loops, syncs, scripts, motions) as
+    cooperative tasks in the thread of the caller, ordered by the time
+    they need to be processed next.
+
+    Threads are attached to the executor with :py:meth:`attach` (or
+    :py:meth:`attach_robot` for the joint manager and the syncs of a robot).
+    Once attached, the usual :py:meth:`BaseThread.start`,
+    :py:meth:`BaseThread.pause`, :py:meth:`BaseThread.resume` and
+    :py:meth:`BaseThread.stop` methods work as before, but no OS threads
+    are created; instead the executor calls :py:meth:`BaseThread.step`
+    for each task when its deadline is reached.
+
+    Used with a :py:class:`VirtualClock` (the default) the time does not
+    follow the real time: the clock jumps directly to the next deadline.
+    This makes it possible to validate long choreographies against the
+    mock buses in a fraction of the real time and deterministically (as
+    long as the mock buses are deterministic; ex. seed ``random`` or use
+    ``err=0`` with the ``MockPacketHandler``)::
+
+        robot = BaseRobot.from_yaml('my_robot.yml')
+        executor = CooperativeExecutor()
+        executor.attach_robot(robot)
+        script = Script.from_yaml(robot=robot, file_name='dance.yml')
+        executor.attach(script)
+        robot.start()
+        script.start()
+        executor.run(duration=600.0)        # 10 minutes, in seconds
+        robot.stop()
+
+    Parameters
+    ----------
+    clock: SystemClock or subclass
+        The clock used by the executor and by all the threads attached to
+        it. If not provided a new :py:class:`VirtualClock` is used.
+    """
+    def __init__(self, clock=None):
+        if clock is None:
+            clock = VirtualClock()
+        self.__clock = clock
+        self.__queue = []
+        # one token per started thread; entries in the queue with a
+        # different token are stale (the thread was stopped or restarted)
+        self.__tokens = {}
+        self.__counter = 0
+
+    @property
+    def clock(self):
+        """The clock used by the executor."""
+        return self.__clock
+
+    @property
+    def tasks(self):
+        """The threads currently scheduled by the executor."""
+        return list(self.__tokens)
+
+    def attach(self, *threads):
+        """Attaches the threads to the executor. The threads will use the
+        executor's clock and will be driven by the executor when started.
+        """
+        for thread in threads:
+            thread.executor = self
+            thread.clock = self.__clock
+            logger.debug(f'Thread "{thread.name}" attached to executor')
+
+    def attach_robot(self, robot):
+        """Attaches the joint manager and all the syncs of a robot. The
+        joints use the executor's clock for their estimates."""
+        self.attach(robot.manager, *robot.syncs.values())
+        for joint in robot.joints.values():
+            joint.clock = self.__clock
+
+    def __push(self, deadline, thread):
+        self.__counter += 1
+        token = self.__counter
+        self.__tokens[thread] = token
+        # the counter avoids comparing threads when deadlines are equal
+        # and keeps the order of the tasks deterministic
+        heapq.heappush(self.__queue, (deadline, token, thread))
+
+    def start(self, thread):
+        """Starts a thread cooperatively. Invoked by
+        :py:meth:`BaseThread.start` for attached threads."""
+        try:
+            thread._begin()
+        except Exception:
+            thread._abort()
+            raise
+        now = self.__clock.time()
+        self.__push(now + thread.initial_delay(now), thread)
+
+    def stop(self, thread):
+        """Stops a thread cooperatively. Invoked by
+        :py:meth:`BaseThread.stop` for attached threads."""
+        if self.__tokens.pop(thread, None) is not None:
+            thread._end()
+
+    def run_once(self):
+        """Processes the task with the earliest deadline. The clock is
+        advanced (or, for a real clock, the executor sleeps) until that
+        deadline.
+
+        Returns
+        -------
+        bool:
+            ``False`` if there was nothing to process.
+        """
+        while self.__queue:
+            deadline, token, thread = heapq.heappop(self.__queue)
+            if self.__tokens.get(thread) != token:
+                # stale entry
+                continue
+            self.__clock.sleep(deadline - self.__clock.time())
+            try:
+                delay = thread.step()
+            except Exception:
+                del self.__tokens[thread]
+                thread._abort()
+                raise
+            if self.__tokens.get(thread) != token:
+                # the thread was stopped or restarted by step()
+                return True
+            if delay is None:
+                # finished the work
+                del self.__tokens[thread]
+                thread._end()
+            else:
+                self.__counter += 1
+                self.__tokens[thread] = self.__counter
+                heapq.heappush(self.__queue,
+                               (deadline + delay, self.__counter, thread))
+            return True
+        return False
+
+    def next_deadline(self):
+        """Returns the earliest deadline of the scheduled tasks or ``None``
+        if there are no tasks."""
+        while self.__queue:
+            deadline, token, thread = self.__queue[0]
+            if self.__tokens.get(thread) == token:
+                return deadline
+            heapq.heappop(self.__queue)
+        return None
+
+    def run(self, duration=None, until=None):
+        """Processes the tasks until there are no more tasks or the time
+        limit is reached.
+
+        Parameters
+        ----------
+        duration: float or ``None``
+            The amount of time (as measured by the executor's clock) to run.
+
+        until: callable or ``None``
+            A function without parameters that is checked after each
+            processed task; the execution stops when it returns ``True``.
+        """
+        end = None
+        if duration is not None:
+            end = self.__clock.time() + duration
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None:
+                break
+            if end is not None and deadline > end:
+                self.__clock.sleep(end - self.__clock.time())
+                break
+            self.run_once()
+            if until is not None and until():
+                break
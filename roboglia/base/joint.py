@@ -16,26 +16,73 @@
 import logging
 from statistics import mean
 from math import nan, isnan, isclose
+import numpy as np
 
 
 from ..utils import check_key, check_type, check_options, check_not_empty
+from .clock import SYSTEM_CLOCK
 from .device import BaseDevice
+from .register import RegisterWithConversion
 
 logger = logging.getLogger(__name__)
 
 
+def _isclose_with_nan(val1, val2, rel_tol=0.001):
+    """``isclose`` where two ``nan`` values are considered equal."""
+    if isnan(val1) and isnan(val2):
+        return True
+    return isclose(val1, val2, rel_tol=rel_tol)
+
+
+def _add_with_nan(number1, number2):
+    """Addition where ``nan`` is the neutral element."""
+    if isnan(number2):
+        return number1
+    if isnan(number1):
+        return number2
+    return number1 + number2
+
+
+def _sub_with_nan(number1, number2):
+    """Substraction where ``nan`` is the neutral element."""
+    if isnan(number2):
+        return number1
+    if isnan(number1):
+        return - number2
+    return number1 - number2
+
+
+def _as_pvl_values(other, operation):
+    """Converts the second operand of an arithmetic operation with a PVL to
+    a tuple of 3 values. A number only applies to the position."""
+    if isinstance(other, PVL):
+        return other.p, other.v, other.ld
+    if isinstance(other, (float, int)):
+        return other, nan, nan
+    if isinstance(other, list) and len(other) == 3:
+        return other[0], other[1], other[2]
+    raise RuntimeError(f'Incompatible {operation} paramters for {other}')
+
+
 # PVL = namedtuple('PVL', ['p', 'v', 'l'])
 #
 # We cannot use ``namedtuple`` as only from Python 3.7 is has default
 # values for the members and we cannot afford to introduce such a dependency
 # just for this functionality.
-# So, we implemented with an old-fashioned class.
+# So, we implemented with an old-fashioned class, with ``__slots__`` to keep
+# the instances small and quick to create.
 class PVL():
     """A representation of a (position, value, load) command that supports
     ``nan`` value components and implements a number of help functions
     like addition, substraction, negation, equality (with error margin) and
     representation.
 
+    Addition and substraction are also available in place (``+=`` and
+    ``-=``), which update the PVL instead of creating a new one: all the
+    names bound to that PVL see the change. The joints, the PVL lists and
+    the joint manager never keep the PVLs they are given or hand out their
+    own, so changing a PVL in place does not affect their state.
+
     Parameters
     ---------
     p: float or ``nan``
@@ -47,6 +94,8 @@ class PVL():
     ld: float or ``nan``
         The load value of the PVL
     """
+    __slots__ = ('__p', '__v', '__ld')
+
     def __init__(self, p=nan, v=nan, ld=nan):
         self.__p = p
         self.__v = v
@@ -67,6 +116,10 @@ class PVL():
         """The load value in PVL."""
         return self.__ld
 
+    def is_empty(self):
+        """Returns ``True`` if all the components are ``nan``."""
+        return isnan(self.__p) and isnan(self.__v) and isnan(self.__ld)
+
     def __eq__(self, other):
         """Comparison of two PVLs with margin of error.
 
@@ -90,15 +143,10 @@ class PVL():
         False:
             if there are differences on any component of the PVLs.
         """
-        def isclose_with_nan(val1, val2, rel_tol=1e-09, abs_tol=0.0):
-            if isnan(val1) and isnan(val2):
-                return True
-            return isclose(val1, val2, rel_tol=rel_tol, abs_tol=abs_tol)
-
         if isinstance(other, PVL):
-            return isclose_with_nan(self.p, other.p, rel_tol=0.001) and \
-                   isclose_with_nan(self.v, other.v, rel_tol=0.001) and \
-                   isclose_with_nan(self.ld, other.ld, rel_tol=0.001)
+            return _isclose_with_nan(self.__p, other.p) and \
+                   _isclose_with_nan(self.__v, other.v) and \
+                   _isclose_with_nan(self.__ld, other.ld)
         return False
 
     def __sub__(self, other):
@@ -121,26 +169,18 @@ class PVL():
         PVL:
             The result as a PVL.
         """
-        def sub_with_nan(number1, number2):
-            if isnan(number2):
-                return number1
-            if isnan(number1):
-                return - number2
-            return number1 - number2
-
-        if isinstance(other, PVL):
-            return PVL(p=sub_with_nan(self.p, other.p),
-                       v=sub_with_nan(self.v, other.v),
-                       ld=sub_with_nan(self.ld, other.ld))
-        if isinstance(other, (float, int)):
-            return PVL(p=sub_with_nan(self.p, other),
-                       v=self.v,
-                       ld=self.ld)
-        if isinstance(other, list) and len(other) == 3:
-            return PVL(p=sub_with_nan(self.p, other[0]),
-                       v=sub_with_nan(self.v, other[1]),
-                       ld=sub_with_nan(self.ld, other[2]))
-        raise RuntimeError(f'Incompatible __sub__ paramters for {other}')
+        p, v, ld = _as_pvl_values(other, '__sub__')
+        return PVL(p=_sub_with_nan(self.__p, p),
+                   v=_sub_with_nan(self.__v, v),
+                   ld=_sub_with_nan(self.__ld, ld))
+
+    def __isub__(self, other):
+        """In place version of :py:meth:`__sub__`."""
+        p, v, ld = _as_pvl_values(other, '__sub__')
+        self.__p = _sub_with_nan(self.__p, p)
+        self.__v = _sub_with_nan(self.__v, v)
+        self.__ld = _sub_with_nan(self.__ld, ld)
+        return self
 
     def __add__(self, other):
         """Addition to a PVL.
@@ -162,39 +202,38 @@ class PVL():
         PVL:
             The result as a PVL.
         """
-        def add_with_nan(number1, number2):
-            if isnan(number2):
-                return number1
-            if isnan(number1):
-                return number2
-            return number1 + number2
-
-        if isinstance(other, PVL):
-            return PVL(p=add_with_nan(self.p, other.p),
-                       v=add_with_nan(self.v, other.v),
-                       ld=add_with_nan(self.ld, other.ld))
-        if isinstance(other, (float, int)):
-            return PVL(p=add_with_nan(self.p, other),
-                       v=self.v,
-                       ld=self.ld)
-        if isinstance(other, list) and len(other) == 3:
-            return PVL(p=add_with_nan(self.p, other[0]),
-                       v=add_with_nan(self.v, other[1]),
-                       ld=add_with_nan(self.ld, other[2]))
-        raise RuntimeError(f'Incompatible __add__ paramters for {other}')
+        p, v, ld = _as_pvl_values(other, '__add__')
+        return PVL(p=_add_with_nan(self.__p, p),
+                   v=_add_with_nan(self.__v, v),
+                   ld=_add_with_nan(self.__ld, ld))
+
+    def __iadd__(self, other):
+        """In place version of :py:meth:`__add__`."""
+        p, v, ld = _as_pvl_values(other, '__add__')
+        self.__p = _add_with_nan(self.__p, p)
+        self.__v = _add_with_nan(self.__v, v)
+        self.__ld = _add_with_nan(self.__ld, ld)
+        return self
 
     def __neg__(self):
         """Returns the inverse of a PVL. ``nan`` values stay the same, floats
         are negated."""
-        return PVL(p=(-1 * self.p),
-                   v=(-1 * self.v),
-                   ld=(-1 * self.ld))
+        return PVL(p=(-1 * self.__p),
+                   v=(-1 * self.__v),
+                   ld=(-1 * self.__ld))
 
     def __repr__(self):
         """Convenience representation of a PVL."""
         return f'PVL(p={self.p}, v={self.v}, l={self.ld})'
 
 
+def _to_list(column):
+    """Converts a column of a PVLList array to a list of floats. ``nan``
+    entries are replaced with ``math.nan`` so that lists can be compared
+    with lists created with ``math.nan``."""
+    return [nan if value != value else value for value in column.tolist()]
+
+
 class PVLList():
     """A class that holds a list of PVL commands and provides a number of
     extra manipulation functions.
@@ -202,6 +241,11 @@ class PVLList():
     The constructor pads the supplied lists with ``nan`` in case the
     lists are unequal in size.
 
+    The commands are stored in a (items x 3) ``numpy`` array that is
+    grown as needed; the PVL objects are only produced when the items are
+    accessed individually. Use :py:attr:`values` to process the whole list
+    in bulk.
+
     Parameters
     ----------
     p: list of [float or ``nan``]
@@ -217,28 +261,53 @@ class PVLList():
     """
     def __init__(self, p=[], v=[], ld=[]):
         length = max(len(p), len(v), len(ld))
-        # pads the short lists
-        if len(p) < length:
-            p = p + [nan] * (length - len(p))
-        if len(v) < length:
-            v = v + [nan] * (length - len(v))
-        if len(ld) < length:
-            ld = ld + [nan] * (length - len(ld))
-        self.__items = [PVL(p[index], v[index], ld[index])
-                        for index in range(length)]
+        self.__data = np.full((max(length, 4), 3), nan)
+        self.__length = 0
+        self.__extend(p, v, ld)
+
+    def __reserve(self, count):
+        """Makes sure there is room for ``count`` more items and returns
+        the position of the first one."""
+        start = self.__length
+        if start + count > self.__data.shape[0]:
+            size = max(2 * self.__data.shape[0], start + count)
+            data = np.full((size, 3), nan)
+            data[:start] = self.__data[:start]
+            self.__data = data
+        self.__length = start + count
+        return start
+
+    def __extend(self, p, v, ld):
+        """Appends the (padded) lists of positions, velocities and loads.
+        ``None`` values are stored as ``nan``."""
+        length = max(len(p), len(v), len(ld))
+        start = self.__reserve(length)
+        for column, values in enumerate((p, v, ld)):
+            if len(values) > 0:
+                self.__data[start:start + len(values), column] = \
+                    np.array(values, dtype=float)
+
+    @property
+    def values(self):
+        """The (items x 3) array with the commands. This is a view in the
+        internal storage and is only valid until new items are appended."""
+        return self.__data[:self.__length]
 
     @property
     def items(self):
-        """Returns the raw items of the list."""
-        return self.__items
+        """Returns the items of the list as PVL objects."""
+        return [PVL(p, v, ld) for p, v, ld in self.values.tolist()]
 
     def __len__(self):
         """Returns the length of the list."""
-        return len(self.__items)
+        return self.__length
 
     def __getitem__(self, item):
         """Access an item by position."""
-        return self.__items[item]
+        if isinstance(item, slice):
+            return [PVL(p, v, ld) for p, v, ld in self.values[item].tolist()]
+        p, v, ld = self.values[item].tolist()
+        return PVL(p, v, ld)
 
     def __repr__(self):
         """Provides a representation of the PVLList for convenience. It will
@@ -249,19 +318,19 @@ class PVLList():
     def positions(self):
         """Returns the full list of positions (p) commands, including
         ``nan`` from the list."""
-        return [item.p for item in self.items]
+        return _to_list(self.values[:, 0])
 
     @property
     def velocities(self):
         """Returns the full list of velocities (v) commands, including
         ``nan`` from the list."""
-        return [item.v for item in self.items]
+        return _to_list(self.values[:, 1])
 
     @property
     def loads(self):
         """Returns the full list of load (ld) commands, including ``nan``
         from the list."""
-        return [item.ld for item in self.items]
+        return _to_list(self.values[:, 2])
 
     def append(self,
                p=nan, v=nan, ld=nan,
@@ -276,27 +345,35 @@ class PVLList():
           and ``l_list``; this works similar with the constructor by padding
           the lists if they have unequal length
         - append one PVL object is provided as ``pvl``
-        - append a list of PVL objects provided as ``pvl_list``
+        - append a list of PVL objects provided as ``pvl_list`` (this can
+          also be another PVLList)
 
         """
-        if pvl_list:
-            self.__items.extend(pvl_list)
+        if isinstance(pvl_list, PVLList):
+            start = self.__reserve(len(pvl_list))
+            self.__data[start:self.__length] = pvl_list.values
+        elif pvl_list:
+            start = self.__reserve(len(pvl_list))
+            for index, item in enumerate(pvl_list, start):
+                self.__data[index] = (item.p, item.v, item.ld)
         if pvl is not None:
-            self.__items.append(pvl)
+            index = self.__reserve(1)
+            self.__data[index] = (pvl.p, pvl.v, pvl.ld)
         if p_list or v_list or l_list:
-            new_pvl_list = PVLList(p_list, v_list, l_list)
-            self.__items.extend(new_pvl_list.items)
+            self.__extend(p_list, v_list, l_list)
         if not isnan(p) or not isnan(v) or not isnan(ld):
-            self.__items.append(PVL(p, v, ld))
+            index = self.__reserve(1)
+            self.__data[index] = (p, v, ld)
 
-    def __process_one(self, attr, func):
+    def __process_one(self, column, func):
         """Utility method: applies an aggregation function ``func`` to all
-        the attributes ``attr`` in the list excluding ``None`` values.
+        the values in a column excluding ``nan`` values.
 
         Parameters
         ----------
-        attr: str
-            An attribute of PVL; must be one of ['p', 'v', 'ld']
+        column: int
+            The column in the array: 0 for ``p``, 1 for ``v`` and 2 for
+            ``ld``.
 
         func: function
             An aggregation function that supports processing a list of
@@ -313,13 +390,13 @@ class PVLList():
             of applying the aggregation function. If no values are in the
             list it returns ``nan``.
         """
-        items = [getattr(item, attr) for item in self.__items
-                 if not isnan(getattr(item, attr))]
-        if len(items) == 0:
+        values = self.values[:, column]
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
             return nan
-        if len(items) == 1:
-            return items[0]
-        return func(items)
+        if len(values) == 1:
+            return float(values[0])
+        return func(values.tolist())
 
     def process(self, p_func=mean, v_func=mean, ld_func=mean):
         """Performs an aggregation function on all the elements in the list
@@ -347,9 +424,9 @@ class PVLList():
             is missing any values in the list it will be reflected with
             ``nan`` value in that position.
         """
-        p = self.__process_one('p', p_func)
-        v = self.__process_one('v', v_func)
-        ld = self.__process_one('ld', ld_func)
+        p = self.__process_one(0, p_func)
+        v = self.__process_one(1, v_func)
+        ld = self.__process_one(2, ld_func)
         return PVL(p, v, ld)
 
 
@@ -400,10 +477,37 @@ class Joint():
     auto: bool
         The joint should activate automatically when the robot starts;
         defaults to ``True``
+
+    deadband: float or list of float
+        The smallest change of a command (in joint units) that the
+        :py:class:`JointManager` will pass to the joint. A single number
+        applies to the position; a list of up to 3 numbers indicates the
+        deadbands for position, velocity and load. Commands that differ from
+        the previous ones by less than the deadband are not set and the
+        registers stay unchanged (clean) for the write syncs. Default is 0
+        (only identical commands are skipped).
+
+    max_velocity: float or ``None``
+        The maximum speed (in joint units per second) of the position
+        commands produced by the :py:class:`JointManager`; ignored if
+        ``None`` which is also the default
+
+    max_acceleration: float or ``None``
+        The maximum acceleration (in joint units per second squared) of the
+        position commands produced by the :py:class:`JointManager`;
+        ignored if ``None`` which is also the default
+
+    estimate: bool
+        Enables the estimation of the current position and velocity from
+        the time-stamped samples of the position read register (see
+        :py:attr:`estimated_position`). The register should be updated by
+        a read sync. Default ``False``.
    """
     def __init__(self, name='JOINT', device=None, pos_read=None,
                  pos_write=None, activate=None, inverse=False, offset=0.0,
-                 minim=None, maxim=None, auto=True, **kwargs):
+                 minim=None, maxim=None, auto=True, deadband=0.0,
+                 max_velocity=None, max_acceleration=None, estimate=False,
+                 **kwargs):
         self.__name = name
         check_not_empty(device, 'device', 'joint', self.name, logger)
         check_type(device, BaseDevice, 'joint', self.name, logger)
@@ -437,6 +541,27 @@ class Joint():
         self.__max = maxim
         check_options(auto, [True, False], 'joint', self.name, logger)
         self.__auto_activate = auto
+        if not isinstance(deadband, list):
+            deadband = [deadband]
+        for value in deadband:
+            check_type(value, (float, int), 'joint', self.name, logger)
+        self.__deadband = tuple(deadband[:3]) + (0.0,) * (3 - len(deadband))
+        if max_velocity is not None:
+            check_type(max_velocity, (float, int), 'joint', self.name, logger)
+        self.__max_velocity = max_velocity
+        if max_acceleration is not None:
+            check_type(max_acceleration, (float, int), 'joint', self.name,
+                       logger)
+        self.__max_acceleration = max_acceleration
+        check_options(estimate, [True, False], 'joint', self.name, logger)
+        self.__estimate = estimate
+        self.__clock = SYSTEM_CLOCK
+        # the last sample of the position read register: timestamp,
+        # position and interval from the previous sample
+        self.__sample_time = None
+        self.__sample_pos = nan
+        self.__sample_interval = 0.0
+        self.__est_velocity = nan
 
     @property
     def name(self):
@@ -497,6 +622,40 @@ class Joint():
         the robot starts."""
         return self.__auto_activate
 
+    @property
+    def deadband(self):
+        """(read-only) Tuple (position, velocity, load) with the smallest
+        command changes passed by the joint manager."""
+        return self.__deadband
+
+    @property
+    def max_velocity(self):
+        """(read-only) The maximum speed of the position commands or
+        ``None``."""
+        return self.__max_velocity
+
+    @property
+    def max_acceleration(self):
+        """(read-only) The maximum acceleration of the position commands or
+        ``None``."""
+        return self.__max_acceleration
+
+    @property
+    def estimate(self):
+        """(read-only) The joint estimates its position and velocity."""
+        return self.__estimate
+
+    @property
+    def clock(self):
+        """(read-write) The clock used to extrapolate the position; it
+        must be the same as the one of the read sync that updates the
+        position register. Defaults to the system clock."""
+        return self.__clock
+
+    @clock.setter
+    def clock(self, value):
+        self.__clock = value
+
     @property
     def inverse(self):
         """(read-only) Joint uses inverse coordinates versus the device."""
@@ -542,6 +701,63 @@ class Joint():
             value = -value
         self.__pos_w.value = value
 
+    def __update_estimate(self):
+        """Takes a new sample from the position read register if the read
+        sync updated it since the last call and derives the velocity from
+        the last two samples. Returns ``False`` if there is no sample.
+
+        The position is paired with its timestamp through the version of the
+        register: if the value changed after it was stamped (a read sync is
+        updating it) the sample is taken at a later call."""
+        register = self.__pos_r
+        timestamp, version = register.stamp
+        if timestamp is None:
+            return False
+        if timestamp != self.__sample_time:
+            position = self.position
+            if register.version != version:
+                return self.__sample_time is not None
+            if self.__sample_time is not None:
+                interval = timestamp - self.__sample_time
+                if interval > 0:
+                    self.__est_velocity = \
+                        (position - self.__sample_pos) / interval
+                    self.__sample_interval = interval
+            self.__sample_time = timestamp
+            self.__sample_pos = position
+        return True
+
+    @property
+    def estimated_position(self):
+        """(read-only) The position of the joint at the current moment,
+        extrapolated from the last sample of the position read register with
+        the :py:attr:`estimated_velocity`. This compensates for the age of
+        the value read by the sync (up to one read period plus the bus
+        time). The extrapolation is limited to twice the interval between
+        the last two samples so that the estimate does not drift if the
+        sync stops.
+
+        If the estimation is not enabled or there are no time-stamped
+        samples yet it returns :py:attr:`position`.
+        """
+        if not self.__estimate or not self.__update_estimate():
+            return self.position
+        if isnan(self.__est_velocity):
+            return self.__sample_pos
+        age = self.__clock.time() - self.__sample_time
+        age = max(0.0, min(age, 2 * self.__sample_interval))
+        return self.__sample_pos + self.__est_velocity * age
+
+    @property
+    def estimated_velocity(self):
+        """(read-only) The velocity of the joint derived from the last two
+        time-stamped samples of the position read register, in joint units
+        per second. ``nan`` if the estimation is not enabled or there are
+        less than two samples."""
+        if self.__estimate:
+            self.__update_estimate()
+        return self.__est_velocity
+
     @property
     def desired_position(self):
         """(read-only) Retrieves the desired position from the write
@@ -761,3 +977,232 @@ class JointPVL(JointPV):
 
     def __repr__(self):
         return f'{JointPV.__repr__(self)}, l={self.load:.3f}'
+
+
+class _RegisterVector():
+    """Utility class: reads and writes the external values of a list of
+    registers as a ``numpy`` array. The linear conversions of
+    :py:class:`RegisterWithConversion` registers are applied vectorized;
+    other registers use their own conversion methods."""
+    def __init__(self, registers):
+        self.__registers = registers
+        self.__linear = all(type(reg) is RegisterWithConversion
+                            for reg in registers)
+        if self.__linear:
+            self.__factor = np.array([reg.factor for reg in registers])
+            self.__offset = np.array([reg.offset for reg in registers])
+            self.__sign = np.array([reg.sign_bit or 0 for reg in registers])
+        self.__minim = np.array([reg.minim for reg in registers])
+        self.__maxim = np.array([reg.maxim for reg in registers])
+
+    def get(self):
+        """Returns the external values of the registers."""
+        for reg in self.__registers:
+            if not reg.sync:
+                reg.read()
+        values = [reg.int_value for reg in self.__registers]
+        if not self.__linear:
+            return np.array([reg.value_to_external(value) for reg, value
+                             in zip(self.__registers, values)], dtype=float)
+        values = np.array(values, dtype=float)
+        negative = (self.__sign > 0) & (values > self.__sign / 2)
+        values[negative] -= self.__sign[negative]
+        return (values - self.__offset) / self.__factor
+
+    def set(self, values):
+        """Converts the external ``values`` and updates the registers in
+        one pass. ``nan`` values leave the register unchanged."""
+        keep = np.isnan(values)
+        if self.__linear:
+            internal = np.round(np.where(keep, 0.0, values) * self.__factor
+                                + self.__offset)
+            internal += np.where((internal < 0) & (self.__sign > 0),
+                                 self.__sign, 0)
+        else:
+            internal = np.array([0 if skip else reg.value_to_internal(value)
+                                 for reg, value, skip
+                                 in zip(self.__registers, values.tolist(),
+                                        keep)], dtype=float)
+        internal = np.clip(internal, self.__minim, self.__maxim)
+        for reg, value, skip in zip(self.__registers,
+                                    internal.astype(int).tolist(), keep):
+            if skip:
+                continue
+            if reg.access == 'R':
+                logger.warning(f'Attempted to write in RO register '
+                               f'{reg.name} of device {reg.device.name}')
+                continue
+            reg.int_value = value
+            if not reg.sync:
+                reg.write()
+
+
+class JointGroup():
+    """A group of joints that can be commanded and read in bulk with
+    ``numpy`` arrays.
+
+    The joints are ordered by name and all the arrays used by the group
+    follow this order. The joint limits, offsets, inverses and the register
+    conversions are applied vectorized for the whole group and the
+    registers are updated in one pass. ``nan`` values in the arrays
+    provided to setters leave the corresponding joints unchanged.
+
+    Positions are available for all the joints. Velocities are available
+    for :py:class:`JointPV` and loads for :py:class:`JointPVL` joints; for
+    the other joints the getters return ``nan`` and the setters ignore
+    the values.
+
+    Normally you will obtain a group from the robot with
+    :py:meth:`BaseRobot.joint_group`.
+
+    Parameters
+    ----------
+    name: str
+        The name of the group
+
+    joints: iterable of :py:class:`Joint` or subclasses
+        The joints in the group.
+    """
+    def __init__(self, name='GROUP', joints=[]):
+        self.__name = name
+        check_not_empty(joints, 'joints', 'joint group', name, logger)
+        for joint in joints:
+            check_type(joint, Joint, 'joint group', name, logger)
+        self.__joints = sorted(set(joints), key=lambda joint: joint.name)
+        size = len(self.__joints)
+        self.__inverse = np.array([joint.inverse for joint in self.__joints])
+        self.__offset = np.array([joint.offset for joint in self.__joints])
+        minim, maxim = zip(*[joint.range for joint in self.__joints])
+        self.__min = np.array([-np.inf if value is None else value
+                               for value in minim], dtype=float)
+        self.__max = np.array([np.inf if value is None else value
+                               for value in maxim], dtype=float)
+        self.__pos_r = _RegisterVector([joint.position_read_register
+                                        for joint in self.__joints])
+        self.__pos_w = _RegisterVector([joint.position_write_register
+                                        for joint in self.__joints])
+        self.__vel = np.array([isinstance(joint, JointPV)
+                               for joint in self.__joints], dtype=bool)
+        self.__vel_r, self.__vel_w = self.__vectors(
+            self.__vel, 'velocity_read_register', 'velocity_write_register')
+        self.__ld = np.array([isinstance(joint, JointPVL)
+                              for joint in self.__joints], dtype=bool)
+        self.__ld_r, self.__ld_w = self.__vectors(
+            self.__ld, 'load_read_register', 'load_write_register')
+        self.__size = size
+
+    def __vectors(self, mask, read_attr, write_attr):
+        """Builds the read and write register vectors for the joints in
+        ``mask``."""
+        joints = [joint for joint, used in zip(self.__joints, mask) if used]
+        if not joints:
+            return None, None
+        return (_RegisterVector([getattr(joint, read_attr)
+                                 for joint in joints]),
+                _RegisterVector([getattr(joint, write_attr)
+                                 for joint in joints]))
+
+    @property
+    def name(self):
+        """(read-only) The name of the group."""
+        return self.__name
+
+    @property
+    def joints(self):
+        """(read-only) The joints in the group, ordered by name."""
+        return self.__joints
+
+    @property
+    def names(self):
+        """(read-only) The names of the joints, in the order used by the
+        arrays."""
+        return [joint.name for joint in self.__joints]
+
+    def __len__(self):
+        return self.__size
+
+    def __array(self, values):
+        """Converts the ``values`` (scalar or iterable) to a float array
+        with one value for each joint."""
+        values = np.array(values, dtype=float)
+        if values.ndim == 0:
+            values = np.full(self.__size, float(values))
+        if values.shape != (self.__size,):
+            mess = f'Joint group {self.name} expects {self.__size} values, ' \
+                   f'received {values.shape}'
+            logger.error(mess)
+            raise ValueError(mess)
+        return values
+
+    def __to_joint(self, values):
+        """Applies the inverse and offset to values read from device."""
+        return np.where(self.__inverse, -values, values) + self.__offset
+
+    def __masked(self, mask, vector):
+        """Reads a vector for the joints in ``mask``; ``nan`` for the
+        others."""
+        values = np.full(self.__size, nan)
+        if vector is not None:
+            values[mask] = vector.get()
+        return values
+
+    @property
+    def positions(self):
+        """**Getter** returns the current positions of the joints (from the
+        read registers) with the inverse and offset applied. **Setter**
+        clips the values to the joint limits, applies the offset and inverse
+        and updates all the write registers in one pass."""
+        return self.__to_joint(self.__pos_r.get())
+
+    @positions.setter
+    def positions(self, values):
+        values = np.clip(self.__array(values), self.__min, self.__max)
+        values -= self.__offset
+        values = np.where(self.__inverse, -values, values)
+        self.__pos_w.set(values)
+
+    @property
+    def desired_positions(self):
+        """(read-only) The desired positions from the write registers."""
+        return self.__to_joint(self.__pos_w.get())
+
+    @property
+    def velocities(self):
+        """**Getter** returns the current velocities of the joints with
+        the inverse applied; ``nan`` for joints without velocity.
+        **Setter** writes the absolute values to the write registers."""
+        values = self.__masked(self.__vel, self.__vel_r)
+        return np.where(self.__inverse, -values, values)
+
+    @velocities.setter
+    def velocities(self, values):
+        values = np.abs(self.__array(values))
+        if self.__vel_w is not None:
+            self.__vel_w.set(values[self.__vel])
+
+    @property
+    def desired_velocities(self):
+        """(read-only) The desired velocities from the write registers."""
+        return self.__masked(self.__vel, self.__vel_w)
+
+    @property
+    def loads(self):
+        """**Getter** returns the current loads of the joints with the
+        inverse applied; ``nan`` for joints without load.
+        **Setter** writes the absolute values to the write registers."""
+        values = self.__masked(self.__ld, self.__ld_r)
+        return np.where(self.__inverse, -values, values)
+
+    @loads.setter
+    def loads(self, values):
+        values = np.abs(self.__array(values))
+        if self.__ld_w is not None:
+            self.__ld_w.set(values[self.__ld])
+
+    @property
+    def desired_loads(self):
+        """(read-only) The desired loads from the write registers."""
+        return self.__masked(self.__ld, self.__ld_w)
+
+    def __repr__(self):
+        return f'<JointGroup {self.name}: {", ".join(self.names)}>'
@@ -0,0 +1,253 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import numpy as np
+
+from .joint import Joint, JointGroup
+from ..utils import check_key, check_not_empty, check_options, check_type
+
+logger = logging.getLogger(__name__)
+
+
+def _rotation(rpy):
+    """Rotation matrix for roll, pitch, yaw (radians) applied in this order
+    around the fixed x, y, z axes."""
+    roll, pitch, yaw = rpy
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr]])
+
+
+class KinematicChain():
+    """Computes the forward kinematics of a tree of links moved by the
+    robot's joints, vectorized with ``numpy`` for one snapshot of the joints
+    or for many snapshots at once (ex. to validate a trajectory).
+
+    Each link is described by the transform from its parent link (a
+    translation ``origin`` followed by a rotation ``rpy``) and, if it is
+    moved by a joint, by the ``axis`` of the joint expressed in the link's
+    frame (the same convention as URDF). The pose of a link is::
+
+        T_link = T_parent * Translation(origin) * Rotation(rpy) * Motion(q)
+
+    where ``Motion`` is a rotation around ``axis`` for revolute joints and
+    a translation along ``axis`` for prismatic joints.
+
+    Chains are normally defined in the robot YAML file, in the ``chains``
+    section, and are available in :py:attr:`BaseRobot.chains`::
+
+        chains:
+          leg_1:
+            units: degrees
+            links:
+              - {name: coxa, joint: j01, axis: [0, 0, 1]}
+              - {name: femur, joint: j02, origin: [0.05, 0, 0],
+                 axis: [0, 1, 0]}
+              - {name: tibia, joint: j03, origin: [0.08, 0, 0],
+                 axis: [0, 1, 0]}
+              - {name: foot, origin: [0.12, 0, 0]}
+
+    When no positions are provided the snapshot is read directly from the
+    position read registers of the joints (in bulk, through a
+    :py:class:`JointGroup`) so the values are those last updated by the
+    syncs.
+
+    Parameters
+    ----------
+    name: str
+        The name of the chain.
+
+    links: list of dict
+        The links of the chain. Each link has:
+
+        - ``name``: the name of the link (mandatory)
+        - ``parent``: the name of an earlier link; defaults to the previous
+          link in the list or the chain's base for the first one. Use
+          ``base`` explicitly to start new branches from the base
+        - ``joint``: the :py:class:`Joint` that moves the link; if missing
+          the link is fixed to its parent
+        - ``type``: 'revolute' (default for links with joints) or
+          'prismatic'
+        - ``origin``: the [x, y, z] translation from the parent; default
+          [0, 0, 0]
+        - ``rpy``: the [roll, pitch, yaw] rotation from the parent, in the
+          chain's ``units``; default [0, 0, 0]
+        - ``axis``: the axis of the joint; default [0, 0, 1]
+
+    units: str
+        The angle units of the joint positions and of ``rpy``: 'degrees'
+        (default) or 'radians'.
+    """
+    def __init__(self, name='CHAIN', links=[], units='degrees'):
+        self.__name = name
+        check_not_empty(links, 'links', 'chain', name, logger)
+        check_type(links, list, 'chain', name, logger)
+        check_options(units, ['degrees', 'radians'], 'chain', name, logger)
+        self.__units = units
+        self.__links = []
+        # for each link: parent index (-1 for base), fixed transform,
+        # joint, type and axis
+        self.__parents = []
+        self.__fixed = np.empty((len(links), 4, 4))
+        joints = []
+        link_joints = []
+        self.__prismatic = []
+        self.__axes = np.zeros((len(links), 3))
+        for index, link in enumerate(links):
+            check_key('name', link, 'chain', name, logger)
+            link_name = link['name']
+            parent = link.get('parent', None)
+            if parent is None or parent == 'base':
+                parent_index = -1 if parent == 'base' or index == 0 \
+                    else index - 1
+            else:
+                check_key(parent, self.__links, 'chain', name, logger,
+                          f'link {link_name} has the parent {parent} that '
+                          'is not defined before it')
+                parent_index = self.__links.index(parent)
+            self.__links.append(link_name)
+            self.__parents.append(parent_index)
+            rpy = np.array(link.get('rpy', [0, 0, 0]), dtype=float)
+            if units == 'degrees':
+                rpy = np.radians(rpy)
+            fixed = np.eye(4)
+            fixed[:3, :3] = _rotation(rpy)
+            fixed[:3, 3] = link.get('origin', [0, 0, 0])
+            self.__fixed[index] = fixed
+            joint = link.get('joint', None)
+            if joint is not None:
+                check_type(joint, Joint, 'chain', name, logger)
+                if joint not in joints:
+                    joints.append(joint)
+                joint_type = link.get('type', 'revolute')
+                check_options(joint_type, ['revolute', 'prismatic'],
+                              'chain', name, logger)
+                axis = np.array(link.get('axis', [0, 0, 1]), dtype=float)
+                self.__axes[index] = axis / np.linalg.norm(axis)
+                self.__prismatic.append(joint_type == 'prismatic')
+            else:
+                self.__prismatic.append(False)
+            link_joints.append(joint)
+        check_not_empty(joints, 'joints', 'chain', name, logger)
+        self.__group = JointGroup(name=name, joints=joints)
+        order = self.__group.joints
+        # for each link the column of its joint in the positions or -1
+        self.__columns = [-1 if joint is None else order.index(joint)
+                          for joint in link_joints]
+        # skew-symmetric matrices of the axes and their squares
+        skew = np.zeros((len(links), 3, 3))
+        x, y, z = self.__axes.T
+        skew[:, 0, 1], skew[:, 0, 2] = -z, y
+        skew[:, 1, 0], skew[:, 1, 2] = z, -x
+        skew[:, 2, 0], skew[:, 2, 1] = -y, x
+        self.__skew = skew
+        self.__skew2 = np.matmul(skew, skew)
+
+    @property
+    def name(self):
+        """The name of the chain."""
+        return self.__name
+
+    @property
+    def units(self):
+        """The angle units used by the chain."""
+        return self.__units
+
+    @property
+    def links(self):
+        """The names of the links, in the order used by the poses."""
+        return self.__links
+
+    @property
+    def joints(self):
+        """The joints that move the chain, ordered by name. This is the
+        order of the positions passed to :py:meth:`forward`."""
+        return self.__group.joints
+
+    @property
+    def group(self):
+        """The :py:class:`JointGroup` used to read the snapshots."""
+        return self.__group
+
+    def snapshot(self):
+        """Returns the current positions of the joints read in bulk from
+        their position read registers."""
+        return self.__group.positions
+
+    def forward(self, positions=None):
+        """Computes the poses of all the links.
+
+        Parameters
+        ----------
+        positions: array-like or ``None``
+            The positions of the joints in the order of :py:attr:`joints`:
+            an array (joints) for one snapshot or (snapshots x joints) for
+            many. If ``None`` (default) the current :py:meth:`snapshot` is
+            used.
+
+        Returns
+        -------
+        numpy.ndarray
+            The homogeneous transforms of the links relative to the base of
+            the chain, in the order of :py:attr:`links`: (links x 4 x 4)
+            for one snapshot or (snapshots x links x 4 x 4).
+        """
+        if positions is None:
+            positions = self.snapshot()
+        positions = np.asarray(positions, dtype=float)
+        single = positions.ndim == 1
+        positions = np.atleast_2d(positions)
+        if positions.shape[1] != len(self.joints):
+            mess = f'Chain {self.name} expects {len(self.joints)} joint ' \
+                   f'positions; received {positions.shape[1]}'
+            logger.error(mess)
+            raise ValueError(mess)
+        count = len(positions)
+        poses = np.empty((count, len(self.__links), 4, 4))
+        motion = np.empty((count, 4, 4))
+        for index, parent in enumerate(self.__parents):
+            fixed = self.__fixed[index]
+            if parent < 0:
+                pose = np.broadcast_to(fixed, (count, 4, 4))
+            else:
+                pose = np.matmul(poses[:, parent], fixed)
+            column = self.__columns[index]
+            if column >= 0:
+                values = positions[:, column]
+                motion[:] = np.eye(4)
+                if self.__prismatic[index]:
+                    motion[:, :3, 3] = values[:, np.newaxis] * \
+                        self.__axes[index]
+                else:
+                    if self.__units == 'degrees':
+                        values = np.radians(values)
+                    sin = np.sin(values)[:, np.newaxis, np.newaxis]
+                    cos = np.cos(values)[:, np.newaxis, np.newaxis]
+                    # Rodrigues' formula
+                    motion[:, :3, :3] += sin * self.__skew[index] + \
+                        (1 - cos) * self.__skew2[index]
+                pose = np.matmul(pose, motion)
+            poses[:, index] = pose
+        return poses[0] if single else poses
+
+    def points(self, positions=None):
+        """Same as :py:meth:`forward` but returns only the positions of the
+        origins of the links: (links x 3) or (snapshots x links x 3)."""
+        return self.forward(positions)[..., :3, 3]
@@ -15,6 +15,10 @@
 
 import logging
 import inspect
+import struct
+import sys
+import weakref
+from types import MappingProxyType
 
 from ..utils import check_type, check_options, check_not_empty
 from .device import BaseDevice
@@ -23,6 +27,83 @@ from .sync import BaseSync
 logger = logging.getLogger(__name__)
 
 
+def _freeze(value):
+    """Converts dicts and lists (recursively) to tuples so that the
+    definition of a register can be used as a dictionary key."""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# the native formats of memoryview.cast() by register size
+_FORMATS = {size: fmt for size, fmt in [(1, 'B'), (2, 'H'), (4, 'I'),
+                                        (8, 'Q')]
+            if struct.calcsize(fmt) == size}
+
+
+class _BytesView():
+    """A view of an unsigned integer stored in a slice of a device image
+    with a byte order (or size) that ``memoryview.cast`` does not support.
+    Indexed with 0 like a cast memoryview."""
+    __slots__ = ('__buffer', '__byteorder')
+
+    def __init__(self, buffer, byteorder):
+        self.__buffer = buffer
+        self.__byteorder = byteorder
+
+    def __getitem__(self, index):
+        return int.from_bytes(self.__buffer, self.__byteorder)
+
+    def __setitem__(self, index, value):
+        self.__buffer[:] = value.to_bytes(len(self.__buffer),
+                                          self.__byteorder)
+
+
+class RegisterSpec():
+    """The immutable description of a register: the metadata that is
+    identical for all the devices of the same model (name, address, size,
+    limits, access, byte order, default and the parameters of the
+    conversion).
+
+    The specs are interned: registers of the same class with the same
+    definition share one ``RegisterSpec`` object (see :py:attr:`cache`),
+    so the memory used and the validation performed when the devices are
+    created depend on the number of models, not on the number of devices.
+    The registers keep only their per-device state (internal value,
+    ``sync`` flag, etc.).
+
+    Attributes
+    ----------
+    name, address, size, minim, maxim, access, word, bulk, order, default:
+        The settings of the register (see :py:class:`BaseRegister`).
+
+    params: mapping
+        The read-only parameters specific to the register class (ex.
+        ``factor`` and ``offset`` for :py:class:`RegisterWithConversion`).
+    """
+    __slots__ = ('name', 'address', 'size', 'minim', 'maxim', 'access',
+                 'word', 'bulk', 'order', 'default', 'params', '__weakref__')
+
+    cache = weakref.WeakValueDictionary()
+    """The specs in use, by register class and definition. The entries
+    are removed when the registers that use a spec are released."""
+
+    def __init__(self, name, address, size, minim, maxim, access, word,
+                 bulk, order, default, params):
+        for attr, value in [('name', name), ('address', address),
+                            ('size', size), ('minim', minim),
+                            ('maxim', maxim), ('access', access),
+                            ('word', word), ('bulk', bulk),
+                            ('order', order), ('default', default),
+                            ('params', MappingProxyType(params))]:
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f'Register spec "{self.name}" is read-only')
+
+
 class BaseRegister():
     """A minimal representation of a device register.
 
@@ -100,68 +181,163 @@ class BaseRegister():
         The default value for the register; implicit 0
 
     """
+    __slots__ = ('__spec', '__device', '__clone', '__sync', '__int_value',
+                 '__view', '__dirty', '__timestamp', '__version',
+                 '__cached')
+
     def __init__(self, name='REGISTER', device=None, address=0, clone=None,
                  size=1, minim=0, maxim=None, access='R', sync=False,
                  word=False, bulk=True, order='LH', default=0, **kwargs):
-        # these are already checked by the device
-        self.__name = name
         # device
-        check_not_empty(device, 'device', 'register', self.name, logger)
-        check_type(device, BaseDevice, 'register', self.name, logger)
+        check_not_empty(device, 'device', 'register', name, logger)
+        check_type(device, BaseDevice, 'register', name, logger)
         self.__device = device
-        # address
-        if address != 0:
-            check_not_empty(address, 'address', 'register', self.name, logger)
-        self.__address = address
         # clone
         self.__clone = clone
         if clone:
-            check_type(clone, BaseRegister, 'register', self.name, logger)
+            check_type(clone, BaseRegister, 'register', name, logger)
             # clone registers inherit the settings from the original
-            self.__size = clone.size
-            self.__minim = clone.minim
-            self.__maxim = clone.maxim
-            self.__access = clone.access
-            self.__word = clone.word
-            self.__order = clone.order
+            main = clone.spec
+            size, minim, maxim = main.size, main.minim, main.maxim
+            access, word, order = main.access, main.word, main.order
+            bulk = main.bulk
+        # the class name is only used by the device to pick the class
+        kwargs.pop('class', None)
+        definition = dict(name=name, address=address, size=size,
+                          minim=minim, maxim=maxim, access=access,
+                          word=word, bulk=bulk, order=order,
+                          default=default)
+        try:
+            key = (type(self), _freeze(definition), _freeze(kwargs))
+            spec = RegisterSpec.cache.get(key)
+        except TypeError:
+            # unhashable parameters; the spec will not be shared
+            key, spec = None, None
+        if spec is None:
+            spec = self.__make_spec(kwargs, **definition)
+            if key is not None:
+                RegisterSpec.cache[key] = spec
+        self.__spec = spec
+        # sync
+        if not clone:
+            check_options(sync, [True, False], 'register', name, logger)
+        self.__sync = sync
+        self.__int_value = spec.default
+        # the typed view in the device image, once bound
+        self.__view = None
+        self.__dirty = False
+        # (timestamp, version): the moment of the last read and the version
+        # of the internal value it was stamped for
+        self.__timestamp = (None, None)
+        self.__version = 0
+        # (version, value): the external value of a sync register and the
+        # version it was computed for; replaced as a whole so that a
+        # concurrent reader never pairs a value with another version
+        self.__cached = (None, None)
+
+    def __make_spec(self, kwargs, name, address, size, minim, maxim, access,
+                    word, bulk, order, default):
+        """Validates the definition of the register and creates its
+        :py:class:`RegisterSpec`. Called only for the first register with a
+        given definition."""
+        # address
+        if address != 0:
+            check_not_empty(address, 'address', 'register', name, logger)
+        # size
+        check_not_empty(size, 'size', 'register', name, logger)
+        check_type(size, int, 'register', name, logger)
+        # minim
+        check_type(minim, int, 'register', name, logger)
+        # maxim
+        if maxim:
+            check_type(maxim, int, 'register', name, logger)
         else:
-            # size
-            check_not_empty(size, 'size', 'register', self.name, logger)
-            check_type(size, int, 'register', self.name, logger)
-            self.__size = size
-            # minim
-            check_type(minim, int, 'register', self.name, logger)
-            self.__minim = minim
-            # maxim
-            if maxim:
-                check_type(maxim, int, 'register', self.name, logger)
-                self.__maxim = maxim
-            else:
-                self.__maxim = pow(2, self.size * 8) - 1
-            # access
-            check_options(access, ['R', 'RW'], 'register', self.name, logger)
-            self.__access = access
-            # sync
-            check_options(sync, [True, False], 'register', self.name, logger)
-            self.__sync = sync
-            # word
-            check_options(word, [True, False], 'register', self.name, logger)
-            self.__word = word
-            # bulk
-            check_options(bulk, [True, False], 'register', self.name, logger)
-            self.__bulk = bulk
-            # order
-            check_options(order, ['LH', 'HL'], 'register', self.name, logger)
-            self.__order = order
+            maxim = pow(2, size * 8) - 1
+        # access
+        check_options(access, ['R', 'RW'], 'register', name, logger)
+        # word
+        check_options(word, [True, False], 'register', name, logger)
+        # bulk
+        check_options(bulk, [True, False], 'register', name, logger)
+        # order
+        check_options(order, ['LH', 'HL'], 'register', name, logger)
         # default
-        check_type(default, int, 'register', self.name, logger)
-        self.__default = default
-        self.__int_value = self.default
+        check_type(default, int, 'register', name, logger)
+        params = self.spec_params(name, **kwargs)
+        return RegisterSpec(name, address, size, minim, maxim, access, word,
+                            bulk, order, default, params)
+
+    def spec_params(self, name, **kwargs):
+        """Validates the parameters specific to the register class and
+        returns them as a dict that is stored in the ``params`` of the
+        :py:class:`RegisterSpec`. Subclasses with additional parameters
+        extend this method. It is called only once for each distinct
+        definition of a register.
+
+        ``BaseRegister`` has no specific parameters and ignores the
+        unknown ones.
+        """
+        return {}
+
+    @property
+    def spec(self):
+        """The shared, read-only :py:class:`RegisterSpec` of the
+        register."""
+        return self.__spec
+
+    def bind(self, image):
+        """Moves the internal value of the register in the control table
+        image of the device: from now on :py:attr:`int_value` is stored in
+        the bytes ``[address, address + size)`` of ``image`` in the
+        register's byte :py:attr:`order`, so that the syncs can transfer
+        whole ranges of registers by copying bytes. Normally called by the
+        device when it is created.
+
+        Clones, ``word`` registers (whose addresses do not count bytes) and
+        registers with limits that do not fit in ``size`` unsigned bytes are
+        not bound and keep their own internal value.
+
+        Parameters
+        ----------
+        image: memoryview
+            The control table image of the device.
+
+        Returns
+        -------
+        bool:
+            ``True`` if the register was bound.
+        """
+        spec = self.__spec
+        address, size = spec.address, spec.size
+        if self.__clone or spec.word or not isinstance(address, int) or \
+                address < 0 or address + size > len(image) or \
+                spec.minim < 0 or spec.maxim >= pow(2, size * 8) or \
+                not isinstance(self.__int_value, int) or \
+                not spec.minim <= self.__int_value <= spec.maxim:
+            return False
+        buffer = image[address:address + size]
+        byteorder = 'little' if spec.order == 'LH' else 'big'
+        if size in _FORMATS and byteorder == sys.byteorder:
+            view = buffer.cast(_FORMATS[size])
+        else:
+            view = _BytesView(buffer, byteorder)
+        view[0] = self.__int_value
+        self.__view = view
+        return True
+
+    @property
+    def bound(self):
+        """(read-only) ``True`` if the internal value is stored in the
+        control table image of the device (see :py:meth:`bind`). If a clone,
+        the main register is checked."""
+        if self.clone:
+            return self.clone.bound
+        return self.__view is not None
 
     @property
     def name(self):
         """Register's name."""
-        return self.__name
+        return self.__spec.name
 
     @property
     def device(self):
@@ -171,7 +347,7 @@ class BaseRegister():
     @property
     def address(self):
         """The register's address in the device."""
-        return self.__address
+        return self.__spec.address
 
     @property
     def clone(self):
@@ -181,22 +357,22 @@ class BaseRegister():
     @property
     def size(self):
         """The regster's size in Bytes."""
-        return self.__size
+        return self.__spec.size
 
     @property
     def minim(self):
         """The register's minimum value in internal format."""
-        return self.__minim
+        return self.__spec.minim
 
     @property
     def maxim(self):
         """The register's maximum value in internal format."""
-        return self.__maxim
+        return self.__spec.maxim
 
     @property
     def range(self):
         """Tuple with (minim, maxim) values in internal format."""
-        return (self.__minim, self.__maxim)
+        return (self.__spec.minim, self.__spec.maxim)
 
     @property
     def min_ext(self):
@@ -216,7 +392,7 @@ class BaseRegister():
     @property
     def access(self):
         """Register's access mode."""
-        return self.__access
+        return self.__spec.access
 
     @property
     def sync(self):
@@ -244,21 +420,21 @@ class BaseRegister():
         """Indicates if the register is an 16 bit register (``True``) or
         an 8 bit register.
         """
-        return self.__word
+        return self.__spec.word
 
     @property
     def order(self):
         """Indicates the order of the data representartion; low-high (LH)
         or high-low (HL)
         """
-        return self.__order
+        return self.__spec.order
 
     @property
     def default(self):
         """The register's default value in internal format."""
         if self.clone:
             return self.clone.default
-        return self.__default
+        return self.__spec.default
 
     @property
     def int_value(self):
@@ -266,15 +442,99 @@ class BaseRegister():
         main register."""
         if self.clone:
             return self.clone.int_value
-        return self.__int_value
+        view = self.__view
+        if view is None:
+            return self.__int_value
+        return view[0]
 
     @int_value.setter
     def int_value(self, value):
-        """If clone, store the value in the main register."""
+        """If clone, store the value in the main register. A value different
+        from the current one marks the register as :py:attr:`dirty`. Float
+        values are rounded to integers. Bound registers store the value in
+        the device image in ``size`` unsigned bytes, so values outside that
+        range are masked, the same way the buses encode them."""
+        if isinstance(value, float):
+            value = round(value)
         if self.clone:
             self.clone.int_value = value
+            return
+        view = self.__view
+        if view is None:
+            if value != self.__int_value:
+                self.__int_value = value
+                self.__dirty = True
+                # after the value so that readers never pair the new
+                # version with the old value
+                self.__version += 1
+            return
+        value = int(value) & ((1 << (self.__spec.size * 8)) - 1)
+        if value != view[0]:
+            view[0] = value
+            self.__dirty = True
+            self.__version += 1
+
+    @property
+    def dirty(self):
+        """(read-write) Indicates that the internal value has changed since
+        the flag was last cleared. Write syncs with ``changed_only`` use it
+        to skip the registers (and devices) that do not need to be
+        written and clear it after a successful write. If a clone, the flag
+        of the main register is used."""
+        if self.clone:
+            return self.clone.dirty
+        return self.__dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        if self.clone:
+            self.clone.dirty = value
         else:
-            self.__int_value = value
+            self.__dirty = value
+
+    @property
+    def version(self):
+        """(read-only) A token that changes every time the internal value
+        changes. It should only be compared for equality. The external
+        value of ``sync`` registers is cached for the current version so
+        that repeated reads do not perform the conversion again. For bound
+        registers it also changes when the device image is loaded by a read
+        sync. If a clone, the version of the main register is used."""
+        if self.clone:
+            return self.clone.version
+        if self.__view is None:
+            return self.__version
+        # the image can also be updated in bulk by the read syncs
+        return (self.__version, self.__device.image_version)
+
+    @property
+    def timestamp(self):
+        """(read-write) The moment (as measured by the clock of the read
+        sync) when the internal value was last received from the device or
+        ``None`` if it was never updated by a read sync. If a clone, the
+        timestamp of the main register is used."""
+        return self.stamp[0]
+
+    @timestamp.setter
+    def timestamp(self, value):
+        if self.clone:
+            self.clone.timestamp = value
+        else:
+            # set by the read syncs after the value
+            self.__timestamp = (value, self.version)
+
+    @property
+    def stamp(self):
+        """(read-only) The :py:attr:`timestamp` together with the
+        :py:attr:`version` of the internal value it was set for, as a tuple
+        read in one go. A reader that needs the value and its timestamp
+        together can check that the :py:attr:`version` is unchanged after it
+        reads the value. ``(None, None)`` if the register was never updated
+        by a read sync. If a clone, the stamp of the main register is used.
+        """
+        if self.clone:
+            return self.clone.stamp
+        return self.__timestamp
 
     def value_to_external(self, value):
         """Converts the presented value to external format according to
@@ -323,7 +583,9 @@ class BaseRegister():
         """Provides the value of the register in external format. If the
         register is not marked for ``sync`` then it requests the device
         to perform a ``read`` in order to refresh the content of the
-        register.
+        register. For ``sync`` registers the converted value is cached until
+        the internal value changes (see :py:attr:`version`), so repeated
+        reads within one sync period do not repeat the conversion.
 
         Returns
         -------
@@ -335,7 +597,16 @@ class BaseRegister():
         """
         if not self.sync:
             self.read()
-        return self.value_to_external(self.int_value)
+            return self.value_to_external(self.int_value)
+        version = self.version
+        cached_version, cached_value = self.__cached
+        if version == cached_version:
+            return cached_value
+        # version is read before the value: if the value changes meanwhile
+        # the cache is stale and the next read converts again
+        value = self.value_to_external(self.int_value)
+        self.__cached = (version, value)
+        return value
 
     @value.setter
     def value(self, value):
@@ -416,31 +687,32 @@ class BoolRegister(BaseRegister):
         if the mask is 0b00001111 then the operations (setter, getter) will
         only affect the most significant 4 bits of the register.
     """
-    def __init__(self, bits=None, mode='any', mask=None, **kwargs):
-        super().__init__(**kwargs)
+    __slots__ = ()
+
+    def spec_params(self, name, bits=None, mode='any', mask=None, **kwargs):
+        params = super().spec_params(name, **kwargs)
         if bits:
-            check_type(bits, int, 'register', self.name, logger)
-            check_options(mode, ['all', 'any'], 'register', self.name, logger)
+            check_type(bits, int, 'register', name, logger)
+            check_options(mode, ['all', 'any'], 'register', name, logger)
             if mask:
-                check_type(mask, int, 'register', self.name, logger)
-        self.__bits = bits
-        self.__mode = mode
-        self.__mask = mask
+                check_type(mask, int, 'register', name, logger)
+        params.update(bits=bits, mode=mode, mask=mask)
+        return params
 
     @property
     def bits(self):
         """The bit pattern used."""
-        return self.__bits
+        return self.spec.params['bits']
 
     @property
     def mode(self):
         """The bitmasking mode ('all' or 'any')."""
-        return self.__mode
+        return self.spec.params['mode']
 
     @property
     def mask(self):
         """The partial bitmask for the handling of the bits."""
-        return self.__mask
+        return self.spec.params['mask']
 
     def value_to_external(self, value):
         """The external representation of bool register.
@@ -512,32 +784,35 @@ class RegisterWithConversion(BaseRegister):
         KeyError: if any of the mandatory fields are not provided
         ValueError: if value provided are wrong or the wrong type
     """
-    def __init__(self, factor=1.0, offset=0, sign_bit=None, **kwargs):
-        super().__init__(**kwargs)
-        check_type(factor, float, 'register', self.name, logger)
-        self.__factor = factor
-        check_type(offset, int, 'register', self.name, logger)
-        self.__offset = offset
+    __slots__ = ()
+
+    def spec_params(self, name, factor=1.0, offset=0, sign_bit=None,
+                    **kwargs):
+        params = super().spec_params(name, **kwargs)
+        check_type(factor, float, 'register', name, logger)
+        check_type(offset, int, 'register', name, logger)
         if sign_bit:
-            check_type(sign_bit, int, 'register', self.name, logger)
-            self.__sign_bit = pow(2, sign_bit)
+            check_type(sign_bit, int, 'register', name, logger)
+            sign_bit = pow(2, sign_bit)
         else:
-            self.__sign_bit = None
+            sign_bit = None
+        params.update(factor=factor, offset=offset, sign_bit=sign_bit)
+        return params
 
     @property
     def factor(self):
         """The conversion factor for external value."""
-        return self.__factor
+        return self.spec.params['factor']
 
     @property
     def offset(self):
         """The offset for external value."""
-        return self.__offset
+        return self.spec.params['offset']
 
     @property
     def sign_bit(self):
         """The sign bit, if any."""
-        return self.__sign_bit
+        return self.spec.params['sign_bit']
 
     def value_to_external(self, value):
         """
@@ -585,22 +860,35 @@ class RegisterWithDynamicConversion(RegisterWithConversion):
         KeyError: if any of the mandatory fields are not provided
         ValueError: if value provided are wrong or the wrong type
     """
-    def __init__(self, factor_reg=None, **kwargs):
+    __slots__ = ('__factor_reg',)
+
+    def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        check_type(factor_reg, str, 'register', self.name, logger)
         # the registers may not be in order and the referenced register
         # might have not been setup yet; so we need to delay the access to
         # it for when all registers in the device are setup
-        self.__factor_reg_name = factor_reg
         self.__factor_reg = None
 
+    def spec_params(self, name, factor_reg=None, **kwargs):
+        params = super().spec_params(name, **kwargs)
+        check_type(factor_reg, str, 'register', name, logger)
+        params.update(factor_reg=factor_reg)
+        return params
+
     @property
     def factor_reg(self):
         """The register providing the additional conversion."""
         if self.__factor_reg is None:
-            self.__factor_reg = getattr(self.device, self.__factor_reg_name)
+            self.__factor_reg = getattr(self.device,
+                                        self.spec.params['factor_reg'])
         return self.__factor_reg
 
+    @property
+    def version(self):
+        """(read-only) Combines the versions of the register and of the
+        :py:attr:`factor_reg` as the external value depends on both."""
+        return (super().version, self.factor_reg.version)
+
     def value_to_external(self, value):
         """
         The external representation of the register's value.
@@ -673,23 +961,25 @@ class RegisterWithThreshold(BaseRegister):
         KeyError: if any of the mandatory fields are not proviced
         ValueError: if value provided are wrong or the wrong type
     """
-    def __init__(self, factor=1.0, threshold=None, **kwargs):
-        super().__init__(**kwargs)
-        check_type(factor, float, 'register', self.name, logger)
-        self.__factor = factor
-        check_not_empty(threshold, 'threshold', 'register', self.name, logger)
-        check_type(threshold, int, 'register', self.name, logger)
-        self.__threshold = threshold
+    __slots__ = ()
+
+    def spec_params(self, name, factor=1.0, threshold=None, **kwargs):
+        params = super().spec_params(name, **kwargs)
+        check_type(factor, float, 'register', name, logger)
+        check_not_empty(threshold, 'threshold', 'register', name, logger)
+        check_type(threshold, int, 'register', name, logger)
+        params.update(factor=factor, threshold=threshold)
+        return params
 
     @property
     def factor(self):
         """Conversion factor."""
-        return self.__factor
+        return self.spec.params['factor']
 
     @property
     def threshold(self):
         """The threshold for conversion."""
-        return self.__threshold
+        return self.spec.params['threshold']
 
     def value_to_external(self, value):
         """The external representation of the register's value.
@@ -737,30 +1027,34 @@ class RegisterWithMapping(BaseRegister):
         the register will construct a reverse mapping that is used in
         converting external values to internal ones.
     """
-    def __init__(self, mask=None, mapping={}, **kwargs):
-        super().__init__(**kwargs)
-        check_not_empty(mapping, 'mapping', 'register', self.name, logger)
-        check_type(mapping, dict, 'register', self.name, logger)
-        self.__mapping = mapping
-        self.__inv_mapping = {v: k for k, v in self.__mapping.items()}
+    __slots__ = ()
+
+    def spec_params(self, name, mask=None, mapping={}, **kwargs):
+        params = super().spec_params(name, **kwargs)
+        check_not_empty(mapping, 'mapping', 'register', name, logger)
+        check_type(mapping, dict, 'register', name, logger)
         if mask:
-            check_type(mask, int, 'register', self.name, logger)
-        self.__mask = mask
+            check_type(mask, int, 'register', name, logger)
+        params.update(mask=mask,
+                      mapping=MappingProxyType(dict(mapping)),
+                      inv_mapping=MappingProxyType(
+                          {v: k for k, v in mapping.items()}))
+        return params
 
     @property
     def mapping(self):
         """The mapping {internal: external}."""
-        return self.__mapping
+        return self.spec.params['mapping']
 
     @property
     def inv_mapping(self):
         """The mapping {external: internal}."""
-        return self.__inv_mapping
+        return self.spec.params['inv_mapping']
 
     @property
     def mask(self):
         """The bit mask is any."""
-        return self.__mask
+        return self.spec.params['mask']
 
     def value_to_external(self, value):
         """Converts the internal value of the register to external format.
@@ -16,12 +16,15 @@
 import yaml
 import logging
 import threading
-import statistics
-import time
+import warnings
+import numpy as np
+from math import inf, nan
 
 from ..utils import get_registered_class, check_key, check_type, check_options
 from .thread import BaseLoop
-from .joint import Joint, PVL, PVLList
+from .joint import Joint, JointGroup, PVL
+from .trajectory import Trajectory
+from .kinematics import KinematicChain
 
 logger = logging.getLogger(__name__)
 
@@ -96,9 +99,25 @@ class BaseRobot():
         a dictionary with sync loops definitions; the components
         of syncs are defined by the attributes of the particular class of
         sync.
+
+    manager: dict
+        a dictionary with the definition of the :py:class:`JointManager`
+
+    chains: dict
+        a dictionary with kinematic chain definitions; the joint names
+        used by the links are replaced with the joint objects and the
+        components are defined by :py:class:`KinematicChain`. Optional.
+
+    stagger: bool
+        if ``True`` the robot assigns, when started, a ``phase`` to the
+        joint manager and the syncs that do not have one explicitly
+        defined, so that their wakeups are spread evenly across the
+        shortest period of the loops (see :py:meth:`wakeup_timetable`).
+        Default ``False``: the loops start immediately, as before
     """
     def __init__(self, name='ROBOT', buses={}, inits={}, devices={},
-                 joints={}, sensors={}, groups={}, syncs={}, manager={}):
+                 joints={}, sensors={}, groups={}, syncs={}, manager={},
+                 chains={}, stagger=False):
         logger.info('***** Initializing robot *************')
         self.__name = name
         # if not buses:
@@ -116,8 +135,12 @@ class BaseRobot():
         self.__init_joints(joints)
         self.__init_sensors(sensors)
         self.__init_groups(groups)
+        self.__joint_groups = {}
         self.__init_syncs(syncs)
         self.__init_manager(manager)
+        self.__init_chains(chains)
+        check_options(stagger, [True, False], 'robot', name, logger)
+        self.__stagger = stagger
         logger.info('***** Initialization complete ********')
 
     @classmethod
@@ -317,6 +340,22 @@ class BaseRobot():
             self.__syncs[sync_name] = new_sync
             logger.info(f'Sync "{sync_name}" added')
 
+    def __init_chains(self, chains):
+        """Called by ``__init__`` to parse and instantiate the kinematic
+        chains."""
+        self.__chains = {}
+        logger.info('Setting up chains...')
+        for chain_name, chain_info in chains.items():
+            chain_info['name'] = chain_name
+            for link in chain_info.get('links', []):
+                joint_name = link.get('joint', None)
+                if joint_name is not None:
+                    check_key(joint_name, self.joints, 'chain', chain_name,
+                              logger, f'joint {joint_name} does not exist')
+                    link['joint'] = self.joints[joint_name]
+            self.__chains[chain_name] = KinematicChain(**chain_info)
+            logger.info(f'Chain "{chain_name}" added')
+
     def __init_manager(self, manager):
         """Called by ``__init__`` to parse and instantiate the robot
         manager."""
@@ -394,16 +433,101 @@ class BaseRobot():
         """(read-only) The groups of the robot as a dict."""
         return self.__groups
 
+    @property
+    def chains(self):
+        """(read-only) The kinematic chains of the robot as a dict."""
+        return self.__chains
+
     @property
     def syncs(self):
         """(read-only) The syncs of the robot as a dict."""
         return self.__syncs
 
+    def joint_group(self, name):
+        """Returns a :py:class:`JointGroup` for the joints in the robot
+        group ``name`` that can be used to command and read the joints in
+        bulk with ``numpy`` arrays. Elements in the group that are not
+        joints are ignored. The object is created the first time it is
+        requested and reused afterwards.
+
+        Parameters
+        ----------
+        name: str
+            The name of a group defined in the robot.
+
+        Raises
+        ------
+        KeyError:
+            If the group does not exist.
+        """
+        if name not in self.__joint_groups:
+            check_key(name, self.groups, 'robot', self.name, logger)
+            joints = [item for item in self.groups[name]
+                      if isinstance(item, Joint)]
+            self.__joint_groups[name] = JointGroup(name=name, joints=joints)
+        return self.__joint_groups[name]
+
     @property
     def manager(self):
         """The RobotManager of the robot."""
         return self.__manager
 
+    @property
+    def loops(self):
+        """The loops started by the robot: the joint manager and the syncs
+        that are started automatically."""
+        loops = [self.manager]
+        loops.extend(sync for sync in self.syncs.values() if sync.auto_start)
+        return loops
+
+    def stagger_loops(self):
+        """Assigns phases to the loops that do not have one so that their
+        wakeups are spread across the shortest period of all the loops.
+
+        The loops are sorted by period and name and the loop with index
+        ``i`` out of ``n`` is assigned the wakeup offset
+        ``i * min_period / n``. Loops with harmonic frequencies will then
+        never wake up at the same time. Loops that already have a phase
+        keep it (but still count as an occupied slot).
+        """
+        loops = sorted(self.loops, key=lambda loop: (loop.period, loop.name))
+        base = loops[0].period
+        for index, loop in enumerate(loops):
+            if loop.phase is None:
+                offset = index * base / len(loops)
+                loop.phase = (offset / loop.period) % 1.0
+                logger.debug(f'Loop "{loop.name}" assigned '
+                             f'phase {loop.phase:.3f}')
+
+    def wakeup_timetable(self, duration=None):
+        """Produces the timetable of the loops' wakeups.
+
+        Parameters
+        ----------
+        duration: float or ``None``
+            The time span in seconds covered by the timetable. By default
+            the longest period of the loops.
+
+        Returns
+        -------
+        list of tuple (float, str):
+            The wakeup offsets in seconds (relative to the start of the
+            timetable) with the name of the loop, sorted by time. Loops
+            without a phase are reported with offset 0.0 as they start
+            immediately.
+        """
+        loops = self.loops
+        if duration is None:
+            duration = max(loop.period for loop in loops)
+        table = []
+        for loop in loops:
+            moment = loop.offset
+            while moment < duration - 1e-9:
+                table.append((moment, loop.name))
+                moment += loop.period
+        table.sort()
+        return table
+
     def start(self):
         """Starts the robot operation. It will:
 
@@ -411,6 +535,8 @@ class BaseRobot():
           that have ``auto`` set to ``False``
         * call the :py:meth:`~BaseDevice.open` method on all devices except
           the ones that have ``auto`` set to ``False``
+        * assign phases to the loops if ``stagger`` is ``True`` (see
+          :py:meth:`stagger_loops`) and log the wakeup timetable
         * call the :py:meth:`~BaseSync.start` method on all syncs except the
           ones that have ``auto`` set to ``False``
 
@@ -430,6 +556,11 @@ class BaseRobot():
             logger.info(f'Opening device: "{device.name}"')
             # TODO: should there be an Auto attribute for devices?
             device.open()
+        # spread the wakeups of the loops
+        if self.__stagger:
+            self.stagger_loops()
+        for offset, loop_name in self.wakeup_timetable():
+            logger.info(f'Wakeup at {offset * 1000:8.3f}ms: "{loop_name}"')
         # joint manager; this will also start the joints
         logger.info('Starting joint manager...')
         self.manager.start()
@@ -473,6 +604,325 @@ class BaseRobot():
         logger.info('***** Robot stopped ******************')
 
 
+def _nan_mean(values, out, weights=None):
+    """(Weighted) mean over the first axis of ``values`` ignoring ``nan``.
+    Columns without any value produce ``nan``."""
+    present = ~np.isnan(values)
+    if weights is None:
+        count = np.count_nonzero(present, axis=0)
+        np.nansum(values, axis=0, out=out)
+    else:
+        count = np.where(present, weights[:, np.newaxis], 0.0).sum(axis=0)
+        np.nansum(values * weights[:, np.newaxis], axis=0, out=out)
+    np.divide(out, count, out=out, where=count > 0)
+    out[count == 0] = nan
+
+
+def _nan_median(values, out, weights=None):
+    """Median over the first axis of ``values`` ignoring ``nan``. The
+    weights are not used."""
+    with warnings.catch_warnings():
+        # columns with only ``nan`` are expected and produce ``nan``
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        out[:] = np.nanmedian(values, axis=0)
+
+
+def _nan_min(values, out, weights=None):
+    """Minimum over the first axis of ``values`` ignoring ``nan``. The
+    weights are not used."""
+    np.fmin.reduce(values, axis=0, out=out)
+
+
+def _nan_max(values, out, weights=None):
+    """Maximum over the first axis of ``values`` ignoring ``nan``. The
+    weights are not used."""
+    np.fmax.reduce(values, axis=0, out=out)
+
+
+def _as_limits(values, default):
+    """Converts a list of limits to an array; ``None`` is replaced with
+    ``default``."""
+    return np.array([default if value is None else value
+                     for value in values], dtype=float)
+
+
+class CommandBuffer():
+    """A preallocated store for the commands submitted by the streams to
+    the :py:class:`JointManager`.
+
+    The commands are kept as a struct of arrays: one row per stream, one
+    column per joint and 3 values (position, velocity, load) for each
+    joint. Missing values are represented with ``nan``. The rows of active
+    streams are always kept at the top of the array so that the reduction
+    can be performed in one vectorized call for all joints.
+
+    Each stream also has a weight and a priority (see
+    :py:meth:`set_blending`). For every joint and value only the streams
+    with the highest priority that provide that value are used and their
+    values are blended with the weights (the weights are only used by the
+    ``mean`` function).
+
+    Parameters
+    ----------
+    joints: int
+        The number of joints (columns) in the buffer.
+
+    capacity: int
+        The initial number of streams (rows) that can be stored. The
+        buffer grows automatically if more streams submit commands.
+    """
+    def __init__(self, joints, capacity=4):
+        self.__data = np.full((capacity, joints, 3), nan)
+        self.__weights = np.ones(capacity)
+        self.__priorities = np.zeros(capacity)
+        self.__result = np.full((joints, 3), nan)
+        self.__slots = {}
+        self.__names = []
+
+    @property
+    def streams(self):
+        """The names of the streams that have data in the buffer."""
+        return list(self.__names)
+
+    @property
+    def values(self):
+        """A view of the active rows (streams x joints x 3)."""
+        return self.__data[:len(self.__names)]
+
+    def row(self, name):
+        """Returns the row allocated to the stream ``name``; allocates one
+        if the stream does not have one yet. The row is a view in the
+        buffer and can be updated in place."""
+        slot = self.__slots.get(name)
+        if slot is None:
+            slot = len(self.__names)
+            if slot == self.__data.shape[0]:
+                # double the capacity
+                extra = np.full(self.__data.shape, nan)
+                self.__data = np.concatenate((self.__data, extra))
+                self.__weights = np.concatenate(
+                    (self.__weights, np.ones(slot)))
+                self.__priorities = np.concatenate(
+                    (self.__priorities, np.zeros(slot)))
+            self.__slots[name] = slot
+            self.__names.append(name)
+        return self.__data[slot]
+
+    def remove(self, name):
+        """Removes the data of stream ``name`` from the buffer. The last
+        active row is moved in the place of the removed one to keep the
+        active rows contiguous."""
+        slot = self.__slots.pop(name, None)
+        if slot is None:
+            return
+        last = len(self.__names) - 1
+        if slot != last:
+            self.__data[slot] = self.__data[last]
+            self.__weights[slot] = self.__weights[last]
+            self.__priorities[slot] = self.__priorities[last]
+            moved = self.__names[last]
+            self.__names[slot] = moved
+            self.__slots[moved] = slot
+        self.__data[last] = nan
+        self.__weights[last] = 1.0
+        self.__priorities[last] = 0.0
+        self.__names.pop()
+
+    def set_blending(self, name, weight=1.0, priority=0):
+        """Sets the weight and the priority of the stream ``name``.
+
+        Parameters
+        ----------
+        name: str
+            The name of the stream; a row is allocated if needed.
+
+        weight: float
+            The (positive) weight of the stream's values in the ``mean``.
+
+        priority: int or float
+            For each joint and value only the streams with the highest
+            priority that provide that value are used.
+        """
+        self.row(name)
+        slot = self.__slots[name]
+        self.__weights[slot] = weight
+        self.__priorities[slot] = priority
+
+    def reduce(self, functions):
+        """Aggregates the commands of all the streams.
+
+        Parameters
+        ----------
+        functions: tuple of 3 functions
+            The reduction functions for position, velocity and load. Each
+            one receives a (streams x joints) array, an output array
+            (joints) where it has to store the result and the weights of
+            the streams (or ``None`` if they are all equal).
+
+        Returns
+        -------
+        numpy.ndarray:
+            A (joints x 3) array with the aggregated values. ``nan``
+            indicates there was no command for that joint and value. The
+            array is reused between calls.
+        """
+        values = self.values
+        if values.shape[0] == 0:
+            self.__result.fill(nan)
+        elif values.shape[0] == 1:
+            self.__result[:] = values[0]
+        else:
+            count = values.shape[0]
+            priorities = self.__priorities[:count]
+            if priorities.min() != priorities.max():
+                # mask the values overridden by higher priority streams
+                ranked = np.where(np.isnan(values), -np.inf,
+                                  priorities[:, np.newaxis, np.newaxis])
+                values = np.where(ranked == ranked.max(axis=0), values, nan)
+            weights = self.__weights[:count]
+            if np.all(weights == weights[0]):
+                weights = None
+            for index, func in enumerate(functions):
+                func(values[:, :, index], self.__result[:, index], weights)
+        return self.__result
+
+
+class Mailbox():
+    """A latest-value mailbox where a stream publishes its commands for the
+    :py:class:`JointManager` without blocking.
+
+    The mailbox has two buffers (joints x 3). The producer writes the new
+    commands in the buffer that is not published and then publishes it by
+    updating the sequence number (an atomic reference swap). The consumer
+    copies the published buffer and checks that the producer did not start
+    writing over it in the meantime; if it did, the copy is retried. The
+    producer never waits for the consumer and the consumer never holds a
+    lock.
+
+    Only one producer (the stream owning the mailbox) should write to it.
+
+    Parameters
+    ----------
+    stream: BaseThread or subclass
+        The stream owning the mailbox.
+
+    index: dict
+        The column of each joint name in the buffers.
+
+    adjustments: bool
+        Indicates the mailbox holds adjustments rather than absolute
+        commands.
+
+    The attributes ``weight`` and ``priority`` hold the blending
+    parameters of the stream (see :py:meth:`JointManager.submit`) and
+    ``submitted`` the moment of the last submission if the manager is
+    traced (see :py:class:`LatencyTracer`).
+    """
+    def __init__(self, stream, index, adjustments=False):
+        self.__stream = stream
+        self.__index = index
+        self.__adjustments = adjustments
+        joints = len(index)
+        self.__buffers = (np.full((joints, 3), nan),
+                          np.full((joints, 3), nan))
+        # number of writes started and number of the last published one
+        self.__writes = 0
+        self.__sequence = 0
+        # a trajectory replaces the buffers until new commands are written
+        self.__trajectory = None
+        self.weight = 1.0
+        self.priority = 0
+        # moment of the last submission, when traced
+        self.submitted = None
+
+    @property
+    def stream(self):
+        """The stream owning the mailbox."""
+        return self.__stream
+
+    @property
+    def adjustments(self):
+        """``True`` if the mailbox holds adjustments."""
+        return self.__adjustments
+
+    @property
+    def sequence(self):
+        """The number of the last published submission."""
+        return self.__sequence
+
+    @property
+    def trajectory(self):
+        """The :py:class:`Trajectory` published or ``None``."""
+        return self.__trajectory
+
+    def write(self, commands):
+        """Writes the ``commands`` in the back buffer and publishes them.
+        See :py:meth:`JointManager.submit` for the supported formats."""
+        self.__writes += 1
+        row = self.__buffers[self.__writes % 2]
+        row.fill(nan)
+        if isinstance(commands, np.ndarray):
+            if commands.ndim == 1:
+                row[:, 0] = commands
+            else:
+                row[:, :commands.shape[1]] = commands[:, :3]
+        else:
+            for joint_name, values in commands.items():
+                index = self.__index.get(joint_name)
+                if index is None:
+                    continue
+                if isinstance(values, PVL):
+                    values = (values.p, values.v, values.ld)
+                elif not isinstance(values, (tuple, list)):
+                    values = (values,)
+                for pos, value in enumerate(values[:3]):
+                    row[index, pos] = nan if value is None else float(value)
+        # publish
+        self.__sequence = self.__writes
+        self.__trajectory = None
+
+    def write_trajectory(self, trajectory, append=False):
+        """Publishes a :py:class:`Trajectory`; until new commands are
+        written the mailbox provides the values sampled from it.
+
+        Parameters
+        ----------
+        trajectory: Trajectory
+            The trajectory with one column for each joint.
+
+        append: bool
+            If ``True`` and there is already a trajectory published, the
+            new waypoints are added to the ones of the existing trajectory
+            that are before the start of the new one.
+        """
+        current = self.__trajectory
+        if append and current is not None:
+            trajectory = current.extend(trajectory)
+        # publish; the trajectory is immutable so the swap is enough
+        self.__trajectory = trajectory
+
+    def read(self, out, moment=None):
+        """Copies the last published commands into ``out``. If a trajectory
+        is published and ``moment`` is provided, the trajectory sampled at
+        ``moment`` is provided instead.
+
+        Returns
+        -------
+        int:
+            The sequence number of the submission copied.
+        """
+        trajectory = self.__trajectory
+        if trajectory is not None and moment is not None:
+            trajectory.sample(moment, out)
+            return self.__sequence
+        while True:
+            sequence = self.__sequence
+            np.copyto(out, self.__buffers[sequence % 2])
+            # the buffer copied is only reused by write ``sequence + 2``
+            if self.__writes - sequence < 2:
+                return sequence
+
+
 class JointManager(BaseLoop):
     """Implements the management of the joints by alowing multiple movement
     streams to submit position commands to the robot.
@@ -480,6 +930,22 @@ class JointManager(BaseLoop):
     The ``JointManager`` inherits the constructor paramters from
     :py:class:`BaseLoop`. Please refer to that class for mote details.
 
+    Each stream publishes its commands in its own :py:class:`Mailbox`
+    without blocking. In each cycle the manager copies the latest commands
+    of all streams in preallocated :py:class:`CommandBuffer` arrays
+    (streams x joints x 3) with ``nan`` marking the missing values and
+    merges them with one vectorized ``nan`` aware reduction for all the
+    joints. Each stream can have a weight (used by the ``mean``) and a
+    priority: for each joint only the streams with the highest priority
+    commanding it are blended. The position commands are then limited to
+    the joints' ranges, ``max_velocity`` and ``max_acceleration`` and only
+    the values that changed by more than the joints' ``deadband`` since
+    they were last passed are set to the joints.
+
+    Streams can also submit future waypoints with
+    :py:meth:`submit_trajectory`; the manager samples the resulting
+    :py:class:`Trajectory` at its own frequency.
+
     In addition the class introduces the following additional paramters:
 
     Parameters
@@ -512,9 +978,9 @@ class JointManager(BaseLoop):
         Allowed values are 'mean', 'median', 'min', 'max'.
 
     timeout: float
-        Is a time in seconds an accessor will wait before issuing a timeout
-        when trying to submit data to the manager or the manager preparing
-        the data for the joints.
+        Not used anymore: the streams publish their commands in lock-free
+        :py:class:`Mailbox` objects and never wait for the manager. Kept for
+        compatibility with existing robot definitions.
     """
     def __init__(self, name='JointManager', frequency=100.0, joints=[],
                  group=None, function='mean', p_function=None,
@@ -525,11 +991,31 @@ class JointManager(BaseLoop):
             temp_joints.extend(joints)
         if group:
             temp_joints.extend(group)
-        # eliminate duplicates
-        self.__joints = list(set(temp_joints))
+        # eliminate duplicates; the order gives the columns in the buffers
+        self.__joints = sorted(set(temp_joints), key=lambda j: j.name)
         if len(self.__joints) == 0:
             logger.warning('Joint manager does not have any joints '
                            'attached to it')
+        self.__index = {joint.name: index
+                        for index, joint in enumerate(self.__joints)}
+        # the smallest changes passed to the joints and the last commands
+        # passed; used to skip the joints whose commands did not change
+        self.__deadband = np.array([joint.deadband for joint in self.__joints],
+                                   dtype=float).reshape(-1, 3)
+        self.__last = np.full((len(self.__joints), 3), nan)
+        # the limits enforced on the position commands and the state of
+        # the last position commands produced (position and velocity)
+        self.__min = _as_limits([joint.range[0]
+                                 for joint in self.__joints], -np.inf)
+        self.__max = _as_limits([joint.range[1]
+                                 for joint in self.__joints], np.inf)
+        self.__max_vel = _as_limits([joint.max_velocity
+                                     for joint in self.__joints], np.inf)
+        self.__max_acc = _as_limits([joint.max_acceleration
+                                     for joint in self.__joints], np.inf)
+        self.__out_pos = np.full(len(self.__joints), nan)
+        self.__out_vel = np.zeros(len(self.__joints))
+        self.__out_time = None
         check_options(function, ['mean', 'median', 'min', 'max'],
                       'JointManager', name, logger)
         # aggregate functions
@@ -538,13 +1024,19 @@ class JointManager(BaseLoop):
         self.__v_func = self.__check_function(v_function, 'v_function', func)
         self.__ld_func = self.__check_function(ld_function, 'ld_function',
                                                func)
-        # processing queues
-        self.__submissions = {}
-        self.__adjustments = {}
-        self.__streams = {}
-        self.__lock = threading.Lock()
-
-    def __check_function(self, func_name, context, default=statistics.mean):
+        # the mailboxes of the streams; the dictionary is replaced (copy on
+        # write) when streams are added or removed so that the manager can
+        # use it without locking; the lock only serializes the registrations
+        self.__mailboxes = {}
+        self.__registry_lock = threading.Lock()
+        # processing buffers, used only by the manager's thread
+        self.__submissions = CommandBuffer(len(self.__joints))
+        self.__adjustments = CommandBuffer(len(self.__joints))
+        self.__tracer = None
+        # (stream, adjustments, joint index) -> last sequence traced
+        self.__traced = {}
+
+    def __check_function(self, func_name, context, default=_nan_mean):
         """Checks the function provided and returns a reference to it.
         Supported functions: ``mean``, ``median``, ``min`` and ``max``.
 
@@ -562,13 +1054,14 @@ class JointManager(BaseLoop):
         -------
         func:
             If the function is one of the supported ones, it returns a
-            reference to it, otherwise returns ``default`` function.
+            reference to its vectorized implementation, otherwise returns
+            ``default`` function.
         """
         supported = {
-            'mean': statistics.mean,
-            'median': statistics.median,
-            'min': min,
-            'max': max
+            'mean': _nan_mean,
+            'median': _nan_median,
+            'min': _nan_min,
+            'max': _nan_max
         }
         if func_name in supported:
             return supported[func_name]
@@ -579,8 +1072,21 @@ class JointManager(BaseLoop):
 
     @property
     def joints(self):
+        """The joints managed, ordered by name. This is also the order
+        expected for the commands submitted as arrays."""
         return self.__joints
 
+    @property
+    def tracer(self):
+        """(read-write) The :py:class:`LatencyTracer` that records the
+        latencies of the commands or ``None`` (default) if the commands are
+        not traced."""
+        return self.__tracer
+
+    @tracer.setter
+    def tracer(self, value):
+        self.__tracer = value
+
     @property
     def p_func(self):
         """Aggregate function for positions."""
@@ -588,15 +1094,16 @@ class JointManager(BaseLoop):
 
     @property
     def v_func(self):
-        """Aggregate function for positions."""
+        """Aggregate function for velocities."""
         return self.__v_func
 
     @property
     def ld_func(self):
-        """Aggregate function for positions."""
+        """Aggregate function for loads."""
         return self.__ld_func
 
-    def submit(self, stream, commands, adjustments=False):
+    def submit(self, stream, commands, adjustments=False, weight=1.0,
+               priority=0):
         """Used by a stream of commands to notify the Joint Manager they
         joint commands they want.
 
@@ -606,17 +1113,24 @@ class JointManager(BaseLoop):
             The stream providing the data. It is used to keep the
             request separate and be able to merge later.
 
-        commands: dict
+        commands: dict or numpy.ndarray
             A dictionary with the commands requests in the format::
 
                 {joint_name: (values)}
 
-            Where ``values`` is a tuple with the command for that joint. It
-            is acceptable to send partial commands to a joint, for instance
-            you can send only (100,) meaning position 100 to a JointPVL.
-            Submitting more information to a joint will have no effect, for
-            instance (100, 20, 40) (position, velocity, load) to a Joint will
-            only use the position part of the request.
+            Where ``values`` is a tuple (or a :py:class:`PVL`) with the
+            command for that joint. It is acceptable to send partial
+            commands to a joint, for instance you can send only (100,)
+            meaning position 100 to a JointPVL. Submitting more information
+            to a joint will have no effect, for instance (100, 20, 40)
+            (position, velocity, load) to a Joint will only use the position
+            part of the request.
+
+            Alternatively, streams that produce the commands in bulk can
+            submit an array with one row for each joint in the order of
+            :py:attr:`joints`: a 1-dimensional array with positions or
+            a 2-dimensional array (joints x 1..3) with positions, velocities
+            and loads. ``nan`` marks the values that are not requested.
 
         adjustments: bool
             Indicates that the values are to be treated as adjustments to
@@ -628,28 +1142,129 @@ class JointManager(BaseLoop):
             adjusts the absolute results with the ones from the adjustments
             to produce the final numbers.
 
+        weight: float
+            The (positive) weight of the stream's commands when they are
+            blended with the ``mean`` function. Default 1.0.
+
+        priority: int or float
+            For each joint the commands of the streams with a higher
+            priority override the ones with a lower priority. Streams with
+            the same priority are blended. Ex. a balance stream with
+            priority 1 overrides the gait stream (priority 0) only for the
+            joints it commands. Default 0.
+
         Returns
         -------
         bool:
-            ``True`` if the operation was successful. False if there was an
-            error (most likely the lock was not acquired). Caller needs to
-            review this and decide if they should retry to send data.
+            Always ``True``; submissions never block or fail. Kept for
+            compatibility with the streams that check it.
         """
-        if not self.__lock.acquire(timeout=self.period):
-            logger.warning(f'failed to acquire manager for '
-                           f'stream {stream.name}')
-            return False
-
-        # add the new stream
-        if stream.name not in self.__streams:
-            self.__streams[stream.name] = stream
-        # record adjustments request
-        if adjustments:
-            self.__adjustments[stream.name] = commands
-        # record submission request
+        mailbox = self.__mailbox(stream, adjustments, weight, priority)
+        if self.__tracer is not None:
+            mailbox.submitted = self.clock.time()
+        mailbox.write(commands)
+        return True
+
+    def __mailbox(self, stream, adjustments, weight, priority):
+        """Returns the mailbox of the stream with the blending parameters
+        updated; registers a new one if the stream did not submit before.
+        """
+        if weight <= 0:
+            mess = f'Weight of stream "{stream.name}" must be positive; ' \
+                   f'got {weight}'
+            logger.error(mess)
+            raise ValueError(mess)
+        key = (stream.name, adjustments)
+        mailbox = self.__mailboxes.get(key)
+        if mailbox is None:
+            mailbox = Mailbox(stream, self.__index, adjustments)
+            with self.__registry_lock:
+                mailboxes = dict(self.__mailboxes)
+                mailboxes[key] = mailbox
+                self.__mailboxes = mailboxes
+        mailbox.weight = float(weight)
+        mailbox.priority = priority
+        return mailbox
+
+    def submit_trajectory(self, stream, times, commands, method='linear',
+                          start=None, append=False, adjustments=False,
+                          weight=1.0, priority=0):
+        """Used by a stream to submit future waypoints for the joints. The
+        manager interpolates them at its own frequency, so the stream does
+        not need to wake up for every command and the smoothness of the
+        motion does not depend on the timing of the stream.
+
+        The trajectory replaces any previous commands of the stream
+        (and vice-versa: a later :py:meth:`submit` replaces the
+        trajectory). After the last waypoint the last values are held
+        until the stream calls :py:meth:`stop_submit`.
+
+        Parameters
+        ----------
+        stream: BaseThread or subclass
+            The stream providing the data.
+
+        times: array-like of float
+            The moments of the waypoints in seconds, relative to ``start``;
+            must be strictly increasing.
+
+        commands: dict or numpy.ndarray
+            The values at the waypoints. Either a dictionary::
+
+                {joint_name: values}
+
+            where ``values`` is an array (waypoints) with positions or
+            (waypoints x 1..3) with positions, velocities and loads, or an
+            array (waypoints x joints) or (waypoints x joints x 1..3) with
+            the joints in the order of :py:attr:`joints`. ``nan`` marks
+            values that are not requested.
+
+        method: str
+            The interpolation: 'linear' (default), 'cubic' or 'minjerk'.
+            See :py:class:`Trajectory`.
+
+        start: float or ``None``
+            The moment (as measured by the manager's clock) the ``times``
+            refer to. Defaults to the current time.
+
+        append: bool
+            If ``True`` the waypoints are added to the ones of the current
+            trajectory of the stream instead of replacing it.
+
+        adjustments: bool
+            Indicates the values are adjustments (see :py:meth:`submit`).
+
+        weight: float
+            The blending weight of the stream (see :py:meth:`submit`).
+
+        priority: int or float
+            The priority of the stream (see :py:meth:`submit`).
+
+        Returns
+        -------
+        bool:
+            Always ``True``.
+        """
+        times = np.array(times, dtype=float)
+        if isinstance(commands, np.ndarray):
+            values = commands
         else:
-            self.__submissions[stream.name] = commands
-        self.__lock.release()
+            values = np.full((len(times), len(self.__joints), 3), nan)
+            for joint_name, joint_values in commands.items():
+                index = self.__index.get(joint_name)
+                if index is None:
+                    continue
+                joint_values = np.array(joint_values, dtype=float)
+                if joint_values.ndim == 1:
+                    joint_values = joint_values[:, np.newaxis]
+                values[:, index, :joint_values.shape[1]] = joint_values[:, :3]
+        if start is None:
+            start = self.clock.time()
+        trajectory = Trajectory(times + start, values, method=method)
+        mailbox = self.__mailbox(stream, adjustments, weight, priority)
+        # the commands are for future moments; not traced
+        mailbox.submitted = None
+        mailbox.write_trajectory(trajectory, append=append)
         return True
 
     def stop_submit(self, stream, adjustments=False):
@@ -674,29 +1289,12 @@ class JointManager(BaseLoop):
         Returns
         -------
         bool:
-            ``True`` if the operation was successful. False if there was an
-            error (most likely the lock was not acquired). Caller needs to
-            review this and decide if they should retry to send data. In the
-            case of this method it is advisable to try resending the request,
-            otherwise stale data will stay in the cache.
+            Always ``True``; the removal never blocks or fails.
         """
-        if not self.__lock.acquire(timeout=self.period):
-            logger.warning(f'failed to acquire manager for '
-                           f'stream {stream.name}')
-            return False
-
-        # delete the stream
-        if stream.name in self.__streams:              # pragma: no branch
-            del self.__streams[stream.name]
-        # remove any adjustment requests
-        if adjustments:
-            if stream.name in self.__adjustments:      # pragma: no branch
-                del self.__adjustments[stream.name]
-        # remove any submission requests
-        else:
-            if stream.name in self.__submissions:      # pragma: no branch
-                del self.__submissions[stream.name]
-        self.__lock.release()
+        with self.__registry_lock:
+            mailboxes = dict(self.__mailboxes)
+            mailboxes.pop((stream.name, adjustments), None)
+            self.__mailboxes = mailboxes
         return True
 
     def start(self):
@@ -710,6 +1308,11 @@ class JointManager(BaseLoop):
                 joint.active = True
             else:
                 logger.info(f'Activating joint: "{joint.name}" - skipped')
+        # the first commands will be passed to all joints
+        self.__last.fill(nan)
+        self.__out_pos.fill(nan)
+        self.__out_vel.fill(0.0)
+        self.__out_time = None
         super().start()
 
     def stop(self):
@@ -719,13 +1322,15 @@ class JointManager(BaseLoop):
         """
         # stop the streams
         logger.info('Stopping streams...')
-        start = time.time()
+        start = self.clock.time()
         duration = 0
-        while self.__streams and duration < 2.0:
-            stream = list(self.__streams.values())[0]
+        while self.__mailboxes and duration < 2.0:
+            stream = list(self.__mailboxes.values())[0].stream
             if stream.running:
                 stream.stop()
-            duration = time.time() - start
+            else:
+                self.clock.sleep(0.001)
+            duration = self.clock.time() - start
 
             # while stream.running:
             #     time.sleep(0.1)
@@ -737,54 +1342,115 @@ class JointManager(BaseLoop):
             else:
                 logger.info(f'Deactivating joint: "{joint.name}" - skipped')
 
-    def atomic(self):
-        if not self.__lock.acquire(timeout=self.period):
-            logger.warning('failed to acquire lock for atomic processing')
+    def __limit(self, positions, now):
+        """Enforces (in place) the joints' position limits, maximum velocity
+        and maximum acceleration on the position commands, relative to the
+        position commands produced in the previous cycle. The speed is
+        reduced ahead of the target so that the joints stop there without
+        overshooting."""
+        np.clip(positions, self.__min, self.__max, out=positions)
+        if self.__out_time is None:
+            elapsed = self.period
         else:
-            for joint in self.joints:
-                comm = self.__process_request(joint, self.__submissions)
-                adj = self.__process_request(joint, self.__adjustments)
-                value = comm + adj
-                if not value == PVL():          # pragma: no branch
-                    logger.debug(f'Setting joint {joint.name}: value={value}')
-                    joint.value = value
-            self.__lock.release()
-
-    def __process_request(self, joint, requests):
-        """Processes a list of requests and returns the processed command
-        for that joint. The processed command applies an aggregation function
-        (default ``mean``) to the command parameters.
-
-        Parameters
-        ----------
-        joint: Joint or subclass
-            The joint being processed
+            elapsed = now - self.__out_time
+        self.__out_time = now
+        previous = self.__out_pos
+        if elapsed > 0:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                distance = positions - previous
+                change = self.__max_acc * elapsed
+                # the highest speed from which the joint can still stop at
+                # the target with the maximum deceleration (the discrete
+                # form of sqrt(2 * acceleration * distance))
+                braking = np.where(
+                    np.isinf(change), inf,
+                    change * (np.sqrt(0.25 + 2 * np.abs(distance) /
+                                      (change * elapsed)) - 0.5))
+                velocity = np.clip(distance / elapsed, -braking, braking)
+                velocity = np.clip(
+                    velocity,
+                    np.maximum(-self.__max_vel, self.__out_vel - change),
+                    np.minimum(self.__max_vel, self.__out_vel + change))
+                limited = np.clip(previous + velocity * elapsed,
+                                  self.__min, self.__max)
+                velocity = (limited - previous) / elapsed
+            # joints without previous or without current commands are not
+            # limited and start again from rest
+            known = ~np.isnan(limited)
+            positions[known] = limited[known]
+            self.__out_vel = np.where(known, velocity, 0.0)
+        self.__out_pos = np.where(np.isnan(positions), previous, positions)
 
-        requests: dict
-            A dictionary that contains all the requests submitted by streams.
-            They are normally either the :py:class:`JointManager`'s
-            ``submissions`` or ``adjustments``, the two buffers with requests
-            for joint positions. The dictionary has as key the submitter's
-            name and the data is another dict of {joint : (pos, vel, load)}
-            records.
-
-        Returns
-        -------
-        PVLList:
-            A list of PVL items selected from the requests. If there are no
-            commands for that joint it returns a list with
-        """
-        req = PVLList()
-        for request in requests.values():
-            values = request.get(joint.name, None)
-            if not values:
+    def atomic(self):
+        # snapshot of the registry; new streams will be picked next cycle
+        mailboxes = self.__mailboxes
+        for buffer, adjustments in ((self.__submissions, False),
+                                    (self.__adjustments, True)):
+            for name in buffer.streams:
+                if (name, adjustments) not in mailboxes:
+                    buffer.remove(name)
+                    # a new stream with the same name starts a new sequence
+                    self.__traced = {key: sequence for key, sequence
+                                     in self.__traced.items()
+                                     if key[:2] != (name, adjustments)}
+        tracing = self.__tracer is not None
+        sequences = {}
+        now = self.clock.time()
+        for key, mailbox in mailboxes.items():
+            name, adjustments = key
+            buffer = self.__adjustments if adjustments else self.__submissions
+            sequence = mailbox.read(buffer.row(name), now)
+            if tracing:
+                sequences[key] = sequence
+            buffer.set_blending(name, mailbox.weight, mailbox.priority)
+        functions = (self.p_func, self.v_func, self.ld_func)
+        comm = self.__submissions.reduce(functions)
+        adj = self.__adjustments.reduce(functions)
+        # ``nan`` on one side leaves the other side unchanged
+        value = np.where(np.isnan(adj), comm,
+                         np.where(np.isnan(comm), adj, comm + adj))
+        self.__limit(value[:, 0], now)
+        # only the values that moved outside the deadband are passed;
+        # ``nan`` in the last commands means they were never passed
+        with np.errstate(invalid='ignore'):
+            kept = np.abs(value - self.__last) <= self.__deadband
+        changed = ~np.isnan(value) & ~kept
+        np.copyto(self.__last, value, where=changed)
+        value[~changed] = nan
+        requested = np.flatnonzero(changed.any(axis=1))
+        for index, (p, v, ld) in zip(requested, value[requested].tolist()):
+            joint = self.__joints[index]
+            logger.debug(f'Setting joint {joint.name}: '
+                         f'value=({p}, {v}, {ld})')
+            joint.value = PVL(p, v, ld)
+        if tracing and requested.size > 0:
+            self.__trace(mailboxes, sequences, requested, value)
+
+    def __trace(self, mailboxes, sequences, requested, value):
+        """Records the latencies of the streams that contributed to the
+        commands set to the ``requested`` joints and tags the registers
+        that were set for the write syncs. Each submission is traced only
+        in the first cycle it changes a joint."""
+        now = self.clock.time()
+        traced = self.__traced
+        # the components set to the joints
+        written = ~np.isnan(value[requested])
+        for key, mailbox in mailboxes.items():
+            submitted = mailbox.submitted
+            if submitted is None:
                 continue
-            else:
-                req.append(pvl=values)
-        if len(req) == 0:
-            return PVL()        # will be with ``nan```
-        if len(req) == 1:
-            return req.items[0]
-        return req.process(p_func=self.p_func,
-                           v_func=self.v_func,
-                           ld_func=self.ld_func)
+            name, adjustments = key
+            sequence = sequences[key]
+            buffer = self.__adjustments if adjustments else self.__submissions
+            components = written & ~np.isnan(buffer.row(name)[requested])
+            for index, mask in zip(requested, components.tolist()):
+                if not any(mask):
+                    continue
+                trace_key = (name, adjustments, index)
+                if traced.get(trace_key) == sequence:
+                    continue
+                traced[trace_key] = sequence
+                joint = self.__joints[index]
+                self.__tracer.record('manager', name, joint.name,
+                                     now - submitted)
+                self.__tracer.tag(joint, name, submitted, mask)
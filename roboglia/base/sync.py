@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import threading
 from .thread import BaseLoop
 from .bus import SharedBus
 from ..utils import check_key, check_type, check_options, check_not_empty
@@ -65,6 +66,10 @@ class BaseSync(BaseLoop):
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    phase: float or ``None``
+        An offset of the loop wakeups expressed as a fraction [0..1) of the
+        period. See :py:class:`BaseLoop`.
+
     group: set
         The set with the devices used by sync; normally the robot
         constructor replaces the name of the group from YAML file with the
@@ -77,20 +82,28 @@ class BaseSync(BaseLoop):
         If the sync loop should start automatically when the robot
         starts; defaults to ``True``
 
+    changed_only: bool
+        Only used by write syncs: if ``True`` the sync only writes the
+        devices that have at least one register :py:attr:`BaseRegister.dirty`
+        (changed since the last write) and skips the communication
+        completely when nothing has changed. Defaults to ``False`` (all
+        devices are written in every cycle).
+
     Raises
     ------
         KeyError: if mandatory parameters are not found
     """
 
     def __init__(self, name='BASESYNC', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0,
-                 group=None, registers=[], auto=True):
+                 warning=0.90, throttle=0.1, review=1.0, phase=None,
+                 group=None, registers=[], auto=True, changed_only=False):
         super().__init__(name=name,
                          patience=patience,
                          frequency=frequency,
                          warning=warning,
                          throttle=throttle,
-                         review=review)
+                         review=review,
+                         phase=phase)
         check_not_empty(group, 'group', 'sync', self.name, logger)
         check_type(group, set, 'sync', self.name, logger)
         self.__devices = list(group)
@@ -101,7 +114,15 @@ class BaseSync(BaseLoop):
         self.__reg_names = registers
         check_options(auto, [True, False], 'sync', self.name, logger)
         self.__auto_start = auto
+        check_options(changed_only, [True, False], 'sync', self.name, logger)
+        self.__changed_only = changed_only
         self.__all_registers = []
+        self.__device_registers = {}
+        self.__tracer = None
+        # replaced (copy-on-write) under the lock when listeners are added
+        # or removed, so that the sync iterates them without locking
+        self.__listeners = ()
+        self.__listeners_lock = threading.Lock()
         self.process_registers()
 
     @property
@@ -130,6 +151,107 @@ class BaseSync(BaseLoop):
     def all_registers(self):
         return self.__all_registers
 
+    @property
+    def use_image(self):
+        """``True`` if all the registers of the sync are bound to the
+        control table images of their devices (see
+        :py:meth:`BaseDevice.load_image`), in which case the syncs that
+        transfer ranges of registers copy the bytes in and out of the images
+        instead of converting each register."""
+        return all(register.bound for register in self.__all_registers)
+
+    @property
+    def changed_only(self):
+        """Indicates the sync only writes the devices with changed
+        registers."""
+        return self.__changed_only
+
+    @property
+    def tracer(self):
+        """(read-write) The :py:class:`LatencyTracer` notified by the write
+        syncs when they transmit registers or ``None`` (default)."""
+        return self.__tracer
+
+    @tracer.setter
+    def tracer(self, value):
+        self.__tracer = value
+
+    @property
+    def listeners(self):
+        """The callables notified by the read syncs after each cycle, as a
+        tuple."""
+        return self.__listeners
+
+    def add_listener(self, callback):
+        """Registers a callable that the read syncs invoke with the sync
+        as parameter after each cycle, once the registers were updated. It
+        is called in the sync's thread and should complete quickly."""
+        with self.__listeners_lock:
+            if callback not in self.__listeners:
+                self.__listeners = self.__listeners + (callback,)
+
+    def remove_listener(self, callback):
+        """Unregisters a callable added with :py:meth:`add_listener`."""
+        with self.__listeners_lock:
+            self.__listeners = tuple(listener
+                                     for listener in self.__listeners
+                                     if listener != callback)
+
+    def notify_listeners(self):
+        """Invokes the listeners. Called by the read syncs at the end of
+        each cycle. Exceptions raised by the listeners are logged and do not
+        stop the sync. Listeners added or removed meanwhile take effect in
+        the next cycle."""
+        for callback in self.__listeners:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception(f'Listener of sync "{self.name}" failed')
+
+    def devices_to_write(self):
+        """Returns the devices that need to be written in this cycle: all
+        the devices, or, if :py:attr:`changed_only` is ``True``, only the
+        ones that have at least one of the sync's registers ``dirty``."""
+        if not self.__changed_only:
+            return self.__devices
+        return [device for device in self.__devices
+                if any(reg.dirty for reg in self.__device_registers[device])]
+
+    def mark_clean(self, devices):
+        """Clears the ``dirty`` flag of the sync's registers for the
+        ``devices`` provided. Called by write syncs before they pack the
+        values of the registers so that a value changed while the data is
+        transmitted stays ``dirty`` and is written in the next cycle.
+
+        Returns
+        -------
+        list:
+            The registers cleaned, to be passed to
+            :py:meth:`mark_transmitted`.
+        """
+        registers = []
+        for device in devices:
+            for reg in self.__device_registers[device]:
+                reg.dirty = False
+                registers.append(reg)
+        return registers
+
+    def mark_transmitted(self, registers, success):
+        """Called by the write syncs after transmitting the ``registers``
+        returned by :py:meth:`mark_clean`. If the transmission failed the
+        registers are marked ``dirty`` again so that they are retried.
+        Otherwise, if the sync is traced, the tracer is notified of the
+        transmission of the registers."""
+        if not success:
+            for reg in registers:
+                reg.dirty = True
+            return
+        tracer = self.__tracer
+        if tracer is not None:
+            now = self.clock.time()
+            for reg in registers:
+                tracer.transmitted(reg, now)
+
     def process_devices(self):
         """Processes the provided devices.
 
@@ -170,6 +292,7 @@ class BaseSync(BaseLoop):
                 # to loop over devices and registers and use getattr()
                 # during the atomic() processing
                 self.__all_registers.append(reg_obj)
+                self.__device_registers.setdefault(device, []).append(reg_obj)
 
     def get_register_range(self):
         """Determines the start address of the range of registers and the
@@ -205,6 +328,32 @@ class BaseSync(BaseLoop):
         length = end_address + last_length - start_address
         return start_address, length, reg_length == length
 
+    def get_register_spans(self):
+        """Determines the bytes covered by the registers of the sync,
+        excluding the gaps between them. Used by the read syncs to copy
+        in the device images only their registers from the range received
+        (see :py:meth:`BaseDevice.load_image`).
+
+        Returns
+        -------
+        list of tuples (address, size)
+            The spans of bytes, ordered by address, with the adjacent
+            registers merged.
+        """
+        device = self.devices[0]
+        spans = []
+        for address, size in sorted(
+                (register.address, register.size)
+                for register in (getattr(device, reg_name)
+                                 for reg_name in self.register_names)):
+            if spans and address <= sum(spans[-1]):
+                last_address, last_size = spans[-1]
+                spans[-1] = (last_address,
+                             max(last_size, address + size - last_address))
+            else:
+                spans.append((address, size))
+        return spans
+
     def start(self):
         """Checks that the bus is open, then refreshes the register, sets the
         ``sync`` flag before calling the inherited :py:meth:BaseLoop.`start.
@@ -249,16 +398,20 @@ class BaseReadSync(BaseSync):
         """
         if self.bus.can_use():
             for reg in self.all_registers:
+                # stamped with the moment of the request
+                now = self.clock.time()
                 value = self.bus.naked_read(reg)
                 logger.debug(f'Read {value} for device "{reg.device.name}" '
                              f'register "{reg.name}"')
                 if value is not None:
                     reg.int_value = value
+                    reg.timestamp = now
                 else:
                     logger.warning(f'Sync "{self.name}": failed to read '
                                    f'register "{reg.name}" '
                                    f'of device "{reg.device.name}"')
             self.bus.stop_using()
+            self.notify_listeners()
         else:
             logger.error(f'Failed to acquire bus "{self.bus.name}"')
 
@@ -278,8 +431,14 @@ class BaseWriteSync(BaseSync):
         """
         if self.bus.can_use():
             for reg in self.all_registers:
-                self.bus.naked_write(reg, reg.int_value)
-                logger.debug(f'Wrote {reg.int_value} for device '
+                if self.changed_only and not reg.dirty:
+                    continue
+                # before reading the value so that changes are not lost
+                reg.dirty = False
+                value = reg.int_value
+                success = self.bus.naked_write(reg, value)
+                self.mark_transmitted([reg], success)
+                logger.debug(f'Wrote {value} for device '
                              f'"{reg.device.name}" register "{reg.name}"')
             self.bus.stop_using()
         else:
@@ -14,10 +14,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import threading
-import time
 import logging
 
 from ..utils import check_type, check_not_empty
+from .clock import SYSTEM_CLOCK
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +37,14 @@ class BaseThread():
     This becomes very handy for loops that normally prepare the work, then
     run for an indefinite time, and later are closed when the owner signals.
 
+    All the timing decisions of the thread should be taken using the
+    :py:attr:`clock` object (instead of calling directly ``time.time()`` or
+    ``time.sleep()``). By default this is the system clock, but it can be
+    replaced with a :py:class:`VirtualClock`. A thread can also be attached
+    to a :py:class:`CooperativeExecutor`, in which case :py:meth:`start` and
+    :py:meth:`stop` will not create an OS thread and the executor will drive
+    the processing by calling :py:meth:`step` repeatedly.
+
     Parameters
     ----------
     name: str
@@ -57,12 +65,44 @@ class BaseThread():
         self.__paused = threading.Event()
         self.__crashed = False
         self.__thread = None
+        self.__clock = SYSTEM_CLOCK
+        self.__executor = None
 
     @property
     def name(self):
         """Returns the name of the thread."""
         return self.__name
 
+    @property
+    def patience(self):
+        """The time in seconds :py:meth:`start` waits for the setup."""
+        return self.__patience
+
+    @property
+    def clock(self):
+        """(read-write) The clock used by the thread for all timing
+        decisions. Defaults to the system clock."""
+        return self.__clock
+
+    @clock.setter
+    def clock(self, value):
+        self.__clock = value
+
+    @property
+    def executor(self):
+        """(read-write) The :py:class:`CooperativeExecutor` that drives the
+        thread or ``None`` if the thread runs in its own OS thread."""
+        return self.__executor
+
+    @executor.setter
+    def executor(self, value):
+        if self.started:
+            mess = 'Cannot change the executor of running thread ' + \
+                   f'"{self.name}"'
+            logger.error(mess)
+            raise RuntimeError(mess)
+        self.__executor = value
+
     def setup(self):
         """Thread preparation before running. Subclasses should override"""
         pass
@@ -90,6 +130,31 @@ class BaseThread():
         """Thread cleanup. Subclasses should override."""
         pass
 
+    def step(self):
+        """Performs one unit of the work of the thread when it is driven
+        by a :py:class:`CooperativeExecutor` instead of :py:meth:`run`.
+        Subclasses that want to be used cooperatively must override it.
+
+        Returns
+        -------
+        float or ``None``:
+            The time in seconds until the executor should call again this
+            method or ``None`` if the thread has finished the work.
+        """
+        raise NotImplementedError
+
+    def initial_delay(self, now):
+        """The time in seconds the executor should wait after the thread
+        was started before calling :py:meth:`step` for the first time.
+        ``BaseThread`` returns 0.0 (immediately).
+
+        Parameters
+        ----------
+        now: float
+            The current time as reported by the thread's clock.
+        """
+        return 0.0
+
     @property
     def started(self):
         """Indicates if the thread was started."""
@@ -110,28 +175,46 @@ class BaseThread():
         """Indicates the thread was paused."""
         return self.__started.is_set() and self.__paused.is_set()
 
+    def _begin(self):
+        """Runs the ``setup()`` and marks the thread as started."""
+        self.__crashed = False
+        self.setup()
+        self.__started.set()
+        self.__paused.clear()
+
+    def _end(self):
+        """Marks the thread as stopped and runs the ``teardown()``."""
+        self.__started.clear()
+        self.teardown()
+
+    def _abort(self):
+        """Marks the thread as crashed."""
+        self.__crashed = True
+        self.__started.clear()
+        self.__paused.clear()
+
     def _wrapped_target(self):
         """Wraps the execution of the task between the setup() and
         teardown() and sets / resets the events."""
         try:
-            self.setup()
-            self.__started.set()
-            self.__paused.clear()
+            self._begin()
             self.run()
-            self.__started.clear()
-            self.teardown()
+            self._end()
         except Exception:
-            self.__crashed = True
-            self.__started.clear()
-            self.__paused.clear()
+            self._abort()
             raise
 
     def start(self, wait=True):
-        """Starts the task in it's own thread."""
+        """Starts the task in it's own thread. If the thread is attached to
+        an executor the task is handed over to the executor instead."""
         logger.info(f'Start requested for "{self.name}"')
         if self.running:
             logger.info(f'"{self.name}" already running. Stopping first.')
             self.stop()
+        if self.__executor is not None:
+            self.__executor.start(self)
+            logger.info(f'"{self.name}" successfully started by executor')
+            return None
         self.__thread = threading.Thread(target=self._wrapped_target)
         self.__thread.daemon = True
         self.__thread.name = self.name
@@ -154,7 +237,10 @@ class BaseThread():
         """Sends the stopping signal to the thread. By default waits for
         the thread to finish."""
         logger.info(f'Stop requested for "{self.name}"')
-        if self.started:
+        if self.started and self.__executor is not None:
+            self.__executor.stop(self)
+            logger.info(f'"{self.name}" successfully stopped by executor')
+        elif self.started:
             self.__started.clear()
             self.__paused.clear()
             logger.info(f'"{self.name}" stopping')
@@ -218,13 +304,23 @@ class BaseLoop(BaseThread):
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    phase: float or ``None``
+        An offset of the loop wakeups expressed as a fraction [0..1) of the
+        period. Loops with a phase wake up at moments aligned to the
+        clock: ``t = (k + phase) * period``, which allows spreading the
+        wakeups of several loops across the period so that they do not
+        compete for the CPU and the bus at the same time. If ``None``
+        (default) the loop starts immediately; a robot created with
+        ``stagger`` assigns a phase automatically (see
+        :py:class:`BaseRobot`).
+
     Raises
     ------
         KeyError and ValueError if provided data in the initialization
         dictionary are incorrect or missing.
     """
     def __init__(self, name='BASELOOP', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0):
+                 warning=0.90, throttle=0.1, review=1.0, phase=None):
         super().__init__(name=name, patience=patience)
         check_not_empty(frequency, 'frequency', 'loop', self.name, logger)
         check_type(frequency, float, 'loop', self.name, logger)
@@ -240,6 +336,8 @@ class BaseLoop(BaseThread):
         check_not_empty(review, 'review', 'loop', self.name, logger)
         check_type(review, float, 'loop', self.name, logger)
         self.__review = review
+        self.__phase = None
+        self.phase = phase
         # to keep statistics
         self.__exec_counts = 0
         self.__last_count_reset = None
@@ -264,6 +362,39 @@ class BaseLoop(BaseThread):
         """Loop period = 1 / frequency."""
         return self.__period
 
+    @property
+    def phase(self):
+        """(read-write) The phase of the loop wakeups as a fraction of the
+        period or ``None`` if the loop is not aligned."""
+        return self.__phase
+
+    @phase.setter
+    def phase(self, value):
+        if value is not None:
+            check_type(value, (float, int), 'loop', self.name, logger)
+            if not 0.0 <= value < 1.0:
+                mess = f'phase {value} should be in range [0..1) ' + \
+                       f'for loop: {self.name}'
+                logger.critical(mess)
+                raise ValueError(mess)
+            value = float(value)
+        self.__phase = value
+
+    @property
+    def offset(self):
+        """The offset in seconds of the loop wakeups inside the period
+        (``phase * period``); 0.0 if the loop has no phase."""
+        if self.__phase is None:
+            return 0.0
+        return self.__phase * self.__period
+
+    def initial_delay(self, now):
+        """For loops with a :py:attr:`phase` returns the time until the
+        next aligned wakeup, otherwise 0.0."""
+        if self.__phase is None:
+            return 0.0
+        return (self.__phase * self.__period - now) % self.__period
+
     @property
     def warning(self):
         """Control the warning level for the warning message, the **setter**
@@ -315,8 +446,12 @@ class BaseLoop(BaseThread):
         return self.__err_stat
 
     def run(self):
+        clock = self.clock
         exec_counts = 0
-        last_count_reset = time.time()
+        last_count_reset = clock.time()
+        # the wakeups are scheduled on an absolute timeline so that the
+        # phase of the loop is preserved
+        next_time = last_count_reset + self.initial_delay(last_count_reset)
         # adjust = 0.0            # fine adjust the rate
         while not self.stopped:
             if self.paused:
@@ -324,15 +459,21 @@ class BaseLoop(BaseThread):
                 exec_counts = 0
                 self.__errors = 0
                 self.__processed = 0
-                last_count_reset = time.time()
-                time.sleep(self.period)
+                clock.sleep(self.period)
+                last_count_reset = clock.time()
+                next_time = last_count_reset + \
+                    self.initial_delay(last_count_reset)
             else:
-                start_time = time.time()
+                clock.sleep(next_time - clock.time())
+                if self.stopped:
+                    break
                 self.atomic()
-                end_time = time.time()
-                wait_time = self.__period - (end_time - start_time)
-                if wait_time > 0:
-                    time.sleep(wait_time)
+                next_time += self.__period
+                end_time = clock.time()
+                if next_time < end_time:
+                    # overrun; aligned loops wait for the next slot, the
+                    # others continue immediately
+                    next_time = end_time + self.initial_delay(end_time)
                 # else:
                 #     logger.debug(f'Loop "{self.name}" took longer to run '
                 #                  f'{end_time - start_time:.5f} than '
@@ -340,7 +481,7 @@ class BaseLoop(BaseThread):
                 # statistics:
                 exec_counts += 1
                 if exec_counts >= self.__frequency * self.__review:
-                    exec_time = time.time() - last_count_reset
+                    exec_time = clock.time() - last_count_reset
                     # actual_freq = exec_counts / exec_time
                     self.__actual_frequency = exec_counts / exec_time
                     # rate = actual_freq / self.__frequency
@@ -364,7 +505,15 @@ class BaseLoop(BaseThread):
                     self.__err_stat = (rate, self.__errors, self.__processed)
                     self.__errors = 0
                     self.__processed = 0
-                    last_count_reset = time.time()
+                    last_count_reset = clock.time()
+
+    def step(self):
+        """Cooperative version of :py:meth:`run`: invokes :py:meth:`atomic`
+        once (unless the loop is paused) and asks to be called again after
+        one period."""
+        if not self.paused:
+            self.atomic()
+        return self.__period
 
     def atomic(self):
         """This method implements the periodic task that needs to be
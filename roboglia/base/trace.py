@@ -0,0 +1,204 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from collections import deque
+import numpy as np
+
+from ..utils import check_options, check_type
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracer():
+    """Measures the latency of the joint commands from the moment a stream
+    submits them to the :py:class:`JointManager` until they are passed to
+    the joints and until they are transmitted on the bus by a write sync.
+
+    The tracer is optional; when it is not attached the manager and the
+    syncs do not perform any additional work. Once attached with
+    :py:meth:`attach_robot`:
+
+    - the manager time-stamps each :py:meth:`JointManager.submit`,
+    - when the merged commands are set to the joints the latency of each
+      contributing stream is recorded for the stage ``manager`` and the
+      joints' write registers are tagged with the submission moments,
+    - when a write sync transmits a tagged register the latency is recorded
+      for the stage ``wire``.
+
+    Trajectories submitted with :py:meth:`JointManager.submit_trajectory`
+    are not traced as their commands are intended for future moments.
+
+    Comparing the distributions of the two stages shows if the lag comes
+    from the manager (frequency, phase) or from the write syncs (phase, bus
+    contention)::
+
+        tracer = LatencyTracer()
+        tracer.attach_robot(robot)
+        ...
+        print(tracer.summary('wire', by='joint'))
+
+    Parameters
+    ----------
+    capacity: int
+        The number of latency samples kept for each (stage, stream, joint);
+        older samples are discarded. Default 1000.
+    """
+    STAGES = ['manager', 'wire']
+    """The stages of the commands measured by the tracer."""
+
+    def __init__(self, capacity=1000):
+        check_type(capacity, int, 'tracer', 'LatencyTracer', logger)
+        self.__capacity = capacity
+        # (stage, stream, joint) -> deque of latencies
+        self.__samples = {}
+        # register -> {(stream, joint): submission moment}
+        self.__tags = {}
+        # the manager and the syncs run in different threads
+        self.__lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        """The number of samples kept for each (stage, stream, joint)."""
+        return self.__capacity
+
+    def attach_robot(self, robot):
+        """Enables the tracing for the joint manager and all the syncs of
+        the robot."""
+        robot.manager.tracer = self
+        for sync in robot.syncs.values():
+            sync.tracer = self
+
+    def detach_robot(self, robot):
+        """Disables the tracing for the joint manager and the syncs of the
+        robot."""
+        robot.manager.tracer = None
+        for sync in robot.syncs.values():
+            sync.tracer = None
+
+    def record(self, stage, stream, joint, latency):
+        """Records one latency sample (in seconds)."""
+        key = (stage, stream, joint)
+        with self.__lock:
+            samples = self.__samples.get(key)
+            if samples is None:
+                samples = deque(maxlen=self.__capacity)
+                self.__samples[key] = samples
+            samples.append(latency)
+
+    def tag(self, joint, stream, submitted, components=(True, True, True)):
+        """Tags the write registers of the ``joint`` with the moment the
+        ``stream`` submitted the command that was set to the joint. Called
+        by the :py:class:`JointManager`.
+
+        ``components`` indicates which of the position, velocity and load
+        were set; only their registers are tagged so that the registers
+        not written do not keep tags until an unrelated transmission."""
+        registers = [getattr(joint, attr, None)
+                     for attr, used in zip(('position_write_register',
+                                            'velocity_write_register',
+                                            'load_write_register'),
+                                           components)
+                     if used]
+        with self.__lock:
+            for register in registers:
+                if register is None:
+                    continue
+                # the syncs write the main register of the clones
+                register = register.clone or register
+                self.__tags.setdefault(register, {})[(stream, joint.name)] = \
+                    submitted
+
+    def transmitted(self, register, moment):
+        """Records the ``wire`` latencies of the commands tagged on the
+        ``register`` that was written to the device at ``moment``. Called by
+        the write syncs."""
+        with self.__lock:
+            tags = self.__tags.pop(register, None)
+        if tags:
+            for (stream, joint), submitted in tags.items():
+                self.record('wire', stream, joint, moment - submitted)
+
+    def latencies(self, stage='wire', stream=None, joint=None):
+        """Returns the latency samples of a stage as an array.
+
+        Parameters
+        ----------
+        stage: str
+            'manager' or 'wire' (default).
+
+        stream: str or ``None``
+            Only the samples of this stream; all if ``None``.
+
+        joint: str or ``None``
+            Only the samples of this joint; all if ``None``.
+        """
+        check_options(stage, self.STAGES, 'tracer', 'LatencyTracer', logger)
+        with self.__lock:
+            selected = [list(samples)
+                        for (s_stage, s_stream, s_joint), samples
+                        in self.__samples.items()
+                        if s_stage == stage and
+                        stream in (None, s_stream) and
+                        joint in (None, s_joint)]
+        if not selected:
+            return np.empty(0)
+        return np.concatenate([np.array(values) for values in selected])
+
+    def summary(self, stage='wire', by='stream'):
+        """Returns the distribution of the latencies of a stage grouped by
+        stream or by joint.
+
+        Parameters
+        ----------
+        stage: str
+            'manager' or 'wire' (default).
+
+        by: str
+            'stream' (default) or 'joint'.
+
+        Returns
+        -------
+        dict:
+            {name: {'count', 'mean', 'p50', 'p95', 'max'}} with the
+            latencies in seconds.
+        """
+        check_options(by, ['stream', 'joint'], 'tracer', 'LatencyTracer',
+                      logger)
+        with self.__lock:
+            keys = list(self.__samples)
+        names = sorted({key[1] if by == 'stream' else key[2]
+                        for key in keys if key[0] == stage})
+        result = {}
+        for name in names:
+            if by == 'stream':
+                values = self.latencies(stage, stream=name)
+            else:
+                values = self.latencies(stage, joint=name)
+            result[name] = {
+                'count': len(values),
+                'mean': float(values.mean()),
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'max': float(values.max())
+            }
+        return result
+
+    def clear(self):
+        """Removes all the samples and the tags."""
+        with self.__lock:
+            self.__samples = {}
+            self.__tags = {}
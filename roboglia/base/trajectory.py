@@ -0,0 +1,177 @@
+# Copyright (C) 2020  Alex Sonea
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import numpy as np
+from math import nan
+
+from ..utils import check_options
+
+logger = logging.getLogger(__name__)
+
+
+class Trajectory():
+    """A sequence of time-stamped waypoints for a number of joints that
+    can be sampled at any moment.
+
+    The waypoints are stored as ``numpy`` arrays: the times (waypoints) and
+    the values (waypoints x joints x 3) with position, velocity and load for
+    each joint; ``nan`` marks the values that are not commanded. Between
+    the waypoints the values are interpolated with one of the methods:
+
+    - ``linear``: straight lines between the waypoints
+    - ``cubic``: a cubic Hermite spline through the waypoints, with the
+      slopes estimated from the neighbouring waypoints (smooth velocity)
+    - ``minjerk``: minimum-jerk transitions between waypoints; the
+      velocity and the acceleration are zero at each waypoint
+
+    Before the first waypoint the trajectory does not produce any command
+    (all values are ``nan``) and after the last one it holds the last
+    values.
+
+    Trajectories are immutable once created and can be shared between
+    threads without locking.
+
+    Parameters
+    ----------
+    times: array-like of float
+        The (strictly increasing) moments of the waypoints, in seconds,
+        in the time base of the clock that will sample the trajectory.
+
+    values: array-like of float
+        The values at the waypoints as an array (waypoints x joints x 3).
+        Arrays (waypoints x joints) are treated as positions only.
+
+    method: str
+        The interpolation method: 'linear' (default), 'cubic' or
+        'minjerk'.
+    """
+    def __init__(self, times, values, method='linear'):
+        check_options(method, ['linear', 'cubic', 'minjerk'],
+                      'trajectory', 'Trajectory', logger)
+        times = np.array(times, dtype=float)
+        values = np.array(values, dtype=float)
+        if values.ndim == 2:
+            values = values[:, :, np.newaxis]
+        if values.ndim != 3 or values.shape[0] != len(times) or \
+                values.shape[2] > 3:
+            mess = f'Trajectory values with shape {values.shape} do not ' \
+                   f'match {len(times)} waypoints'
+            logger.error(mess)
+            raise ValueError(mess)
+        if len(times) == 0 or np.any(np.diff(times) <= 0):
+            mess = 'Trajectory times must be strictly increasing'
+            logger.error(mess)
+            raise ValueError(mess)
+        if values.shape[2] < 3:
+            padded = np.full(values.shape[:2] + (3,), nan)
+            padded[:, :, :values.shape[2]] = values
+            values = padded
+        self.__times = times
+        self.__values = values
+        self.__method = method
+        if method == 'cubic':
+            self.__slopes = self.__estimate_slopes()
+
+    def __estimate_slopes(self):
+        """Slopes at the waypoints for the cubic interpolation: central
+        differences inside, one sided at the ends and zero if there is
+        only one waypoint."""
+        times, values = self.__times, self.__values
+        slopes = np.zeros_like(values)
+        if len(times) < 2:
+            return slopes
+        dt = times[:, np.newaxis, np.newaxis]
+        slopes[1:-1] = (values[2:] - values[:-2]) / (dt[2:] - dt[:-2])
+        slopes[0] = (values[1] - values[0]) / (dt[1] - dt[0])
+        slopes[-1] = (values[-1] - values[-2]) / (dt[-1] - dt[-2])
+        return slopes
+
+    @property
+    def times(self):
+        """The moments of the waypoints."""
+        return self.__times
+
+    @property
+    def values(self):
+        """The values at the waypoints (waypoints x joints x 3)."""
+        return self.__values
+
+    @property
+    def method(self):
+        """The interpolation method."""
+        return self.__method
+
+    @property
+    def start(self):
+        """The moment of the first waypoint."""
+        return self.__times[0]
+
+    @property
+    def end(self):
+        """The moment of the last waypoint."""
+        return self.__times[-1]
+
+    def sample(self, moment, out=None):
+        """Returns the interpolated values (joints x 3) at ``moment``.
+
+        Parameters
+        ----------
+        moment: float
+            The time where the trajectory is sampled.
+
+        out: numpy.ndarray or ``None``
+            An array (joints x 3) where the result is stored. If ``None``
+            a new array is allocated.
+        """
+        if out is None:
+            out = np.empty(self.__values.shape[1:])
+        times = self.__times
+        if moment < times[0]:
+            out.fill(nan)
+            return out
+        if moment >= times[-1]:
+            out[:] = self.__values[-1]
+            return out
+        index = np.searchsorted(times, moment, side='right') - 1
+        duration = times[index + 1] - times[index]
+        alpha = (moment - times[index]) / duration
+        start = self.__values[index]
+        end = self.__values[index + 1]
+        if self.__method == 'linear':
+            out[:] = start + (end - start) * alpha
+        elif self.__method == 'minjerk':
+            shape = alpha ** 3 * (10 - 15 * alpha + 6 * alpha ** 2)
+            out[:] = start + (end - start) * shape
+        else:
+            # cubic Hermite basis
+            a2, a3 = alpha ** 2, alpha ** 3
+            h00 = 2 * a3 - 3 * a2 + 1
+            h10 = a3 - 2 * a2 + alpha
+            h01 = -2 * a3 + 3 * a2
+            h11 = a3 - a2
+            out[:] = h00 * start + h01 * end + \
+                duration * (h10 * self.__slopes[index] +
+                            h11 * self.__slopes[index + 1])
+        return out
+
+    def extend(self, other):
+        """Returns a new trajectory with the waypoints of this trajectory
+        that are before the start of ``other`` followed by the waypoints of
+        ``other``. The interpolation method of ``other`` is used."""
+        keep = self.__times < other.start
+        times = np.concatenate((self.__times[keep], other.times))
+        values = np.concatenate((self.__values[keep], other.values))
+        return Trajectory(times, values, method=other.method)
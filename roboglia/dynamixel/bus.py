@@ -279,9 +279,15 @@ class DynamixelBus(BaseBus):
             in the internal format of the register and it is the
             responsibility of the register class to provide conversion
             between the internal and external format if they are different.
+
+        Returns
+        -------
+        bool
+            ``True`` if the value was written successfully.
         """
         if not self.is_open:
             logger.error(f'Attempt to use closed bus "{self.name}"')
+            return False
         else:
             dev = reg.device
             # select function by register size
@@ -303,7 +309,7 @@ class DynamixelBus(BaseBus):
                              f'"{self.name}" device "{dev.name}" register '
                              f'"{reg.name}"')
                 logger.error(str(e))
-                return None
+                return False
 
             # success call - log DEBUG
             logger.debug(f'[writeXByteTxRx] dev={dev.dev_id} '
@@ -315,12 +321,14 @@ class DynamixelBus(BaseBus):
                 err_desc = self.__packet_handler.getTxRxResult(cerr)
                 logger.error(f'[Bus "{self.name}"] device "{dev.name}", '
                              f'register "{reg.name}": {err_desc}')
+                return False
             else:
                 if derr != 0:
                     # device error
                     err_desc = self.__packet_handler.getRxPacketError(derr)
                     logger.warning(f'Device "{dev.name}" responded with a '
                                    f'return error: {err_desc}')
+                return True
 
     def __repr__(self):
         ans = super().__repr__()[:-1]
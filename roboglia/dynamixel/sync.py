@@ -16,6 +16,7 @@
 import logging
 from dynamixel_sdk import GroupSyncWrite, GroupSyncRead
 from dynamixel_sdk import GroupBulkWrite, GroupBulkRead
+from dynamixel_sdk.group_bulk_read import PARAM_NUM_DATA
 
 from ..base import BaseSync
 
@@ -43,20 +44,31 @@ class DynamixelSyncWriteLoop(BaseSync):
             mess = f'SyncWrite {self.name} requires registers to be contiguous'
             logger.error(mess)
             raise RuntimeError(mess)
+        self.__use_image = self.use_image
         self.gsw = GroupSyncWrite(self.bus.port_handler,
                                   self.bus.packet_handler,
                                   self.__start_address, self.__length)
 
     def atomic(self):
         """Executes a SyncWrite."""
+        devices = self.devices_to_write()
+        if not devices:
+            # nothing changed
+            return
+        registers = self.mark_clean(devices)
         # add params to sync write
-        for device in self.devices:
-            data = [0] * self.__length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.__start_address
-                data[pos: pos + register.size] = device.register_low_endian(
-                    register.int_value, register.size)
+        for device in devices:
+            if self.__use_image:
+                start = self.__start_address
+                data = list(device.image[start:start + self.__length])
+            else:
+                data = [0] * self.__length
+                for reg_name in self.register_names:
+                    register = getattr(device, reg_name)
+                    pos = register.address - self.__start_address
+                    data[pos: pos + register.size] = \
+                        device.register_low_endian(register.int_value,
+                                                   register.size)
             # addParam
             result = self.gsw.addParam(device.dev_id, data)
             if not result:      # pragma: no cover
@@ -73,9 +85,11 @@ class DynamixelSyncWriteLoop(BaseSync):
                 logger.error(f'failed to execute SyncWrite {self.name}: '
                              f'cerr={error}')
                 self.inc_errors()
+            self.mark_transmitted(registers, result == 0)
         else:
             logger.error(f'sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
+            self.mark_transmitted(registers, False)
         # cleanup
         self.gsw.clearParam()
 
@@ -101,6 +115,8 @@ class DynamixelSyncReadLoop(BaseSync):
     def setup(self):
         """Prepares to start the loop."""
         self.__start_address, self.__length, _ = self.get_register_range()
+        self.__use_image = self.use_image
+        self.__spans = self.get_register_spans()
         self.gsr = GroupSyncRead(self.bus.port_handler,
                                  self.bus.packet_handler,
                                  self.__start_address,
@@ -118,7 +134,9 @@ class DynamixelSyncReadLoop(BaseSync):
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
             return
-        # execute read
+        # execute read; the values are stamped with the moment of the
+        # request
+        now = self.clock.time()
         result = self.gsr.txRxPacket()
         self.bus.stop_using()       # !! as soon as possible
         if result != 0:
@@ -126,6 +144,10 @@ class DynamixelSyncReadLoop(BaseSync):
             logger.error(f'SyncRead {self.name}, cerr={error}')
             # return
         # retrieve data
+        if self.__use_image:
+            self.__load_images(now)
+            self.notify_listeners()
+            return
         for device in self.devices:
             for reg_name in self.register_names:
                 self.inc_processed()
@@ -140,6 +162,25 @@ class DynamixelSyncReadLoop(BaseSync):
                 else:
                     register.int_value = self.gsr.getData(
                         device.dev_id, register.address, register.size)
+                    register.timestamp = now
+        self.notify_listeners()
+
+    def __load_images(self, now):
+        """Copies the data received for each device in its image in one
+        go."""
+        for device in self.devices:
+            if not self.gsr.isAvailable(device.dev_id, self.__start_address,
+                                        self.__length):
+                logger.error(f'Failed to retrieve data in SyncRead '
+                             f'{self.name} for device {device.name}')
+                self.inc_errors()
+                continue
+            device.load_image(self.__start_address,
+                              self.gsr.data_dict[device.dev_id],
+                              self.__spans)
+            for reg_name in self.register_names:
+                self.inc_processed()
+                getattr(device, reg_name).timestamp = now
 
 
 class DynamixelBulkWriteLoop(BaseSync):
@@ -171,18 +212,29 @@ class DynamixelBulkWriteLoop(BaseSync):
             mess = f'BulkWrite {self.name} requires registers to be contiguous'
             logger.error(mess)
             raise RuntimeError(mess)
+        self.__use_image = self.use_image
         self.gbw = GroupBulkWrite(self.bus.port_handler,
                                   self.bus.packet_handler)
 
     def atomic(self):
         """Executes a BulkWrite."""
-        for device in self.devices:
-            data = [0] * self.__length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.__start_address
-                data[pos: pos + register.size] = device.register_low_endian(
-                    register.int_value, register.size)
+        devices = self.devices_to_write()
+        if not devices:
+            # nothing changed
+            return
+        registers = self.mark_clean(devices)
+        for device in devices:
+            if self.__use_image:
+                start = self.__start_address
+                data = list(device.image[start:start + self.__length])
+            else:
+                data = [0] * self.__length
+                for reg_name in self.register_names:
+                    register = getattr(device, reg_name)
+                    pos = register.address - self.__start_address
+                    data[pos: pos + register.size] = \
+                        device.register_low_endian(register.int_value,
+                                                   register.size)
             # addParam
             result = self.gbw.addParam(device.dev_id, self.__start_address,
                                        self.__length, data)
@@ -198,9 +250,11 @@ class DynamixelBulkWriteLoop(BaseSync):
             if result != 0:
                 logger.error(f'Failed to execute BulkWrite {self.name}: '
                              f'cerr={error}')
+            self.mark_transmitted(registers, result == 0)
         else:
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
+            self.mark_transmitted(registers, False)
         # cleanup
         self.gbw.clearParam()
 
@@ -221,6 +275,8 @@ class DynamixelBulkReadLoop(BaseSync):
     def setup(self):
         """Prepares to start the loop."""
         self.__start_address, self.__length, _ = self.get_register_range()
+        self.__use_image = self.use_image
+        self.__spans = self.get_register_spans()
         self.gbr = GroupBulkRead(self.bus.port_handler,
                                  self.bus.packet_handler)
         for device in self.devices:
@@ -237,11 +293,15 @@ class DynamixelBulkReadLoop(BaseSync):
             logger.error(f'Sync {self.name} '
                          f'failed to acquire bus {self.bus.name}')
         else:
+            now = self.clock.time()
             result = self.gbr.txRxPacket()
             self.bus.stop_using()       # !! as soon as possible
             if result != 0:
                 error = self.gbr.ph.getTxRxResult(result)
                 logger.error(f'BulkRead {self.name}, cerr={error}')
+            elif self.__use_image:
+                self.__load_images(now)
+                self.notify_listeners()
             else:
                 # retrieve data
                 for device in self.devices:
@@ -257,6 +317,22 @@ class DynamixelBulkReadLoop(BaseSync):
                         else:
                             register.int_value = self.gbr.getData(
                                 device.dev_id, register.address, register.size)
+                            register.timestamp = now
+                self.notify_listeners()
+
+    def __load_images(self, now):
+        """Copies the data received for each device in its image in one
+        go."""
+        for device in self.devices:
+            if not self.gbr.isAvailable(device.dev_id, self.__start_address,
+                                        self.__length):
+                logger.error(f'Failed to retrieve data in BulkRead '
+                             f'{self.name} for device {device.name}')
+                continue
+            data = self.gbr.data_dict[device.dev_id][PARAM_NUM_DATA]
+            device.load_image(self.__start_address, data, self.__spans)
+            for reg_name in self.register_names:
+                getattr(device, reg_name).timestamp = now
 
 
 class DynamixelRangeReadLoop(BaseSync):
@@ -281,6 +357,8 @@ class DynamixelRangeReadLoop(BaseSync):
     def setup(self):
         """Prepares to start the loop."""
         self.start_address, self.length, _ = self.get_register_range()
+        self.__use_image = self.use_image
+        self.__spans = self.get_register_spans()
 
     def atomic(self):
         """Executes a RangeRead for all devices."""
@@ -292,6 +370,7 @@ class DynamixelRangeReadLoop(BaseSync):
 
         for device in self.devices:
             # call the function
+            now = self.clock.time()
             try:
                 res, cerr, derr = self.bus.packet_handler.readTxRx(
                     self.bus.port_handler, device.dev_id,
@@ -320,6 +399,11 @@ class DynamixelRangeReadLoop(BaseSync):
                                f'return error: {err_desc}')
 
             # process results
+            if self.__use_image:
+                device.load_image(self.start_address, res, self.__spans)
+                for reg_name in self.register_names:
+                    getattr(device, reg_name).timestamp = now
+                continue
             for reg_name in self.register_names:
                 reg = getattr(device, reg_name)
                 pos = reg.address - self.start_address
@@ -334,5 +418,7 @@ class DynamixelRangeReadLoop(BaseSync):
                 else:
                     raise NotImplementedError
                 reg.int_value = value
+                reg.timestamp = now
 
         self.bus.stop_using()       # !! as soon as possible
+        self.notify_listeners()
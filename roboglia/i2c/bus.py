@@ -169,7 +169,8 @@ class I2CBus(BaseBus):
 
     def write(self, reg, value):
         """Depending on the size of the register it calls the corresponding
-        write function from ``SMBus``.
+        write function from ``SMBus``. Returns ``True`` if the value was
+        written successfully.
         """
         if not self.is_open:
             logger.error(f'attempted to write to a closed bus: {self.name}')
@@ -197,7 +198,8 @@ class I2CBus(BaseBus):
                              f'{self.name} for device {dev.name} and '
                              f'register {reg.name}')
                 logger.error(str(e))
-                return None
+                return False
+        return True
 
     def read_block(self, device, start_address, length):
         """Reads a block of registers of given length.
@@ -250,8 +252,9 @@ class I2CBus(BaseBus):
 
         Returns
         -------
-        ``None``:
-            It intercepts any exceptions and logs them.
+        bool:
+            ``True`` if the data was written successfully. It intercepts
+            any exceptions and logs them.
         """
         if not self.is_open:
             logger.error(f'attempted to write to a closed bus: {self.name}')
@@ -263,6 +266,8 @@ class I2CBus(BaseBus):
             logger.error(f'Failed to execute write block command on I2C bus '
                          f'{self.name} for device {device.name}')
             logger.error(str(e))
+            return False
+        return True
 
 
 class SharedI2CBus(SharedBus):
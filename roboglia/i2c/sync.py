@@ -39,30 +39,44 @@ class I2CWriteLoop(BaseSync):
             mess = f'WriteLoop {self.name} requires registers to be contiguous'
             logger.error(mess)
             raise RuntimeError(mess)
+        self.__use_image = self.use_image
 
     def atomic(self):
         """Executes a SyncWrite."""
-        for device in self.devices:
+        for device in self.devices_to_write():
+            registers = self.mark_clean([device])
             # prepare data
-            data = [0] * self.length
-            for reg_name in self.register_names:
-                register = getattr(device, reg_name)
-                pos = register.address - self.start_address
-                if register.size == 1:
-                    data[pos] = register.int_value
-                elif register.size == 2:
-                    data[pos] = register.int_value % 256
-                    data[pos + 1] = register.int_value // 256
-                else:
-                    raise NotImplementedError
+            if self.__use_image:
+                start = self.start_address
+                data = list(device.image[start:start + self.length])
+            else:
+                data = self.__pack(device)
 
             # write
             # I2CSharedBus does to handling of exceptions
-            self.bus.write_block(device,
-                                 self.start_address,
-                                 data)
+            success = self.bus.write_block(device,
+                                           self.start_address,
+                                           data)
+            # the bus logs the errors and reports the failure
+            self.mark_transmitted(registers, success)
             logger.debug(f'{self.name} written block data {data}')
 
+    def __pack(self, device):
+        """Assembles the data from the registers that are not bound to the
+        device image."""
+        data = [0] * self.length
+        for reg_name in self.register_names:
+            register = getattr(device, reg_name)
+            pos = register.address - self.start_address
+            if register.size == 1:
+                data[pos] = register.int_value
+            elif register.size == 2:
+                data[pos] = register.int_value % 256
+                data[pos + 1] = register.int_value // 256
+            else:
+                raise NotImplementedError
+        return data
+
 
 class I2CReadLoop(BaseSync):
     """Implements a read loop that is leveraging the ability to read a
@@ -79,17 +93,24 @@ class I2CReadLoop(BaseSync):
         available in all devices.
         """
         self.start_address, self.length, _ = self.get_register_range()
+        self.__use_image = self.use_image
+        self.__spans = self.get_register_spans()
 
     def atomic(self):
         """Executes a SyncRead."""
         for device in self.devices:
             # read one device
             # I2CSharedBus does to handling of exceptions
+            now = self.clock.time()
             data = self.bus.read_block(device,
                                        self.start_address,
                                        self.length)
             logger.debug(f'{self.name} read block data {data}')
-            if data is not None:
+            if data is not None and self.__use_image:
+                device.load_image(self.start_address, data, self.__spans)
+                for reg_name in self.register_names:
+                    getattr(device, reg_name).timestamp = now
+            elif data is not None:
                 for reg_name in self.register_names:
                     register = getattr(device, reg_name)
                     pos = register.address - self.start_address
@@ -99,3 +120,5 @@ class I2CReadLoop(BaseSync):
                         register.int_value = data[pos] + data[pos + 1] * 256
                     else:
                         raise NotImplementedError
+                    register.timestamp = now
+        self.notify_listeners()
@@ -5,3 +5,16 @@ from .moves import Script                       # noqa: 401
 from .moves import Scene                        # noqa: 401
 from .moves import Sequence                     # noqa: 401
 from .moves import Frame                        # noqa: 401
+from .moves import Timeline                     # noqa: 401
+
+from .stream import FrameSource                 # noqa: 401
+from .stream import StreamScript                # noqa: 401
+from .scheduler import MoveScheduler            # noqa: 401
+
+from .motions import ArrayMotion                # noqa: 401
+from .motions import SineOscillator             # noqa: 401
+from .motions import CPGOscillator              # noqa: 401
+from .motions import BezierGait                 # noqa: 401
+from .motions import LinearRamp                 # noqa: 401
+from .offload import OffloadedMotion            # noqa: 401
+from .recorder import Recorder                  # noqa: 401
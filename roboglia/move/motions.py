@@ -0,0 +1,339 @@
+import logging
+import numpy as np
+from math import nan, pi
+
+from .thread import Motion
+from ..utils import check_not_empty, check_type
+
+logger = logging.getLogger(__name__)
+
+
+class ArrayMotion(Motion):
+    """A :py:class:`Motion` that produces the commands for all its joints
+    at once as ``numpy`` arrays and submits them to the joint manager in one
+    call.
+
+    Subclasses implement :py:meth:`evaluate` that returns the positions
+    (joints) or the commands (joints x 1..3) for a moment. Periodic motions
+    can precompute one cycle in a table so that each tick only looks up the
+    row for the current moment.
+
+    ``ArrayMotion`` inherits the parameters of :py:class:`Motion`. In
+    addition:
+
+    Parameters
+    ----------
+    cycle: float or ``None``
+        The duration of one cycle in seconds for periodic motions.
+
+    table_rate: float or ``None``
+        If provided (and ``cycle`` is provided), one cycle is precomputed
+        when the motion starts, sampled at this frequency (Hz), and the
+        ticks use the nearest row of the table instead of calling
+        :py:meth:`evaluate`. Default ``None``.
+    """
+    def __init__(self, cycle=None, table_rate=None, **kwargs):
+        super().__init__(**kwargs)
+        if cycle is not None:
+            check_type(cycle, (float, int), 'motion', self.name, logger)
+        self.__cycle = cycle
+        if table_rate is not None:
+            check_type(table_rate, (float, int), 'motion', self.name, logger)
+        self.__table_rate = table_rate
+        self.__table = None
+        names = [joint.name for joint in self.manager().joints]
+        missing = [joint.name for joint in self.joints()
+                   if joint.name not in names]
+        if missing:
+            mess = f'Joints {missing} used by motion "{self.name}" are ' \
+                   'not managed by the joint manager'
+            logger.error(mess)
+            raise ValueError(mess)
+        # the columns of the motion's joints in the manager's commands
+        self.__columns = [names.index(joint.name) for joint in self.joints()]
+        self.__commands = np.full((len(names), 3), nan)
+
+    @property
+    def cycle(self):
+        """The duration of one cycle or ``None``."""
+        return self.__cycle
+
+    @property
+    def table(self):
+        """The precomputed cycle (samples x joints x 3) or ``None``."""
+        return self.__table
+
+    def evaluate(self, moment):
+        """Returns the commands for all the joints of the motion at
+        ``moment`` (seconds since the motion started) as an array (joints)
+        with the positions or (joints x 1..3) with positions, velocities and
+        loads, or ``None`` if there is nothing to submit in this tick. Must be
+        implemented by subclasses."""
+        raise NotImplementedError
+
+    def precompute(self, rate):
+        """Evaluates one :py:attr:`cycle` at ``rate`` (Hz) and returns the
+        table (samples x joints x 3)."""
+        moments = np.arange(0.0, self.__cycle, 1.0 / rate)
+        table = np.full((len(moments), len(self.__columns), 3), nan)
+        for index, moment in enumerate(moments):
+            self.__store(table[index], self.evaluate(moment))
+        return table
+
+    @staticmethod
+    def __store(out, values):
+        """Copies the positions or the commands in ``out`` (joints x 3)."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            out[:, 0] = values
+        else:
+            out[:, :values.shape[1]] = values[:, :3]
+
+    def setup(self):
+        """Resets the ticks and, if requested, precomputes the table."""
+        super().setup()
+        if self.__cycle is not None and self.__table_rate is not None:
+            self.__table = self.precompute(self.__table_rate)
+
+    def atomic(self):
+        """Produces the commands for the current tick and submits them."""
+        moment = self.ticks()
+        commands = self.__commands
+        if self.__table is not None:
+            index = int((moment % self.__cycle) * self.__table_rate)
+            commands[self.__columns] = \
+                self.__table[min(index, len(self.__table) - 1)]
+        else:
+            values = self.evaluate(moment)
+            if values is None:
+                return
+            values = np.asarray(values, dtype=float)
+            if values.ndim == 1:
+                commands[self.__columns, 0] = values
+            else:
+                commands[self.__columns, :values.shape[1]] = values[:, :3]
+        self.manager().submit(self, commands)
+
+    def teardown(self):
+        """Informs the joint manager we are finished."""
+        self.manager().stop_submit(self)
+
+
+def _per_joint(values, count, default):
+    """Broadcasts a scalar or a list to an array with a value per joint."""
+    if values is None:
+        values = default
+    return np.broadcast_to(np.asarray(values, dtype=float), (count,)).copy()
+
+
+class SineOscillator(ArrayMotion):
+    """Sinusoidal oscillations of the joints::
+
+        position = offset + amplitude * sin(2 * pi * (t / cycle + phase))
+
+    The velocity commands are the absolute values of the derivative (the
+    speed needed to follow the sine).
+
+    ``SineOscillator`` inherits the parameters of :py:class:`ArrayMotion`
+    (``cycle`` is mandatory). In addition:
+
+    Parameters
+    ----------
+    amplitudes: float or list of float
+        The amplitude for each joint (or the same for all).
+
+    offsets: float or list of float
+        The center of the oscillation for each joint. Default 0.
+
+    phases: float or list of float
+        The phase of each joint as a fraction [0..1) of the cycle.
+        Default 0.
+    """
+    def __init__(self, amplitudes=0.0, offsets=None, phases=None, **kwargs):
+        super().__init__(**kwargs)
+        check_not_empty(self.cycle, 'cycle', 'motion', self.name, logger)
+        count = len(self.joints())
+        self.__amplitudes = _per_joint(amplitudes, count, 0.0)
+        self.__offsets = _per_joint(offsets, count, 0.0)
+        self.__phases = _per_joint(phases, count, 0.0)
+        self.__out = np.empty((count, 2))
+
+    def evaluate(self, moment):
+        angle = 2 * pi * (moment / self.cycle + self.__phases)
+        out = self.__out
+        out[:, 0] = self.__offsets + self.__amplitudes * np.sin(angle)
+        out[:, 1] = np.abs(self.__amplitudes * np.cos(angle) *
+                           2 * pi / self.cycle)
+        return out
+
+
+class CPGOscillator(ArrayMotion):
+    """A central pattern generator made of coupled phase oscillators, one
+    for each joint::
+
+        dphi_i / dt = 2 * pi / cycle +
+                      sum_j weight_ij * sin(phi_j - phi_i - 2 * pi * bias_ij)
+        position_i = offset_i + amplitude_i * sin(phi_i)
+
+    The couplings pull the oscillators towards the phase differences
+    ``bias`` (fractions of the cycle) from any initial state, which makes
+    the pattern robust to perturbations (ex. when the ``cycle`` or the
+    biases change while the motion runs). The phases are integrated at each
+    tick.
+
+    The oscillators start with the phase differences of the biases of the
+    first joint (the pattern is already formed when the motion starts).
+
+    ``CPGOscillator`` inherits the parameters of :py:class:`ArrayMotion`
+    (``cycle`` is mandatory; ``table_rate`` is not supported as the phases
+    are integrated at each tick). In addition:
+
+    Parameters
+    ----------
+    amplitudes: float or list of float
+        The amplitude for each joint (or the same for all).
+
+    offsets: float or list of float
+        The center of the oscillation for each joint. Default 0.
+
+    weights: float or list of lists of float
+        The coupling strengths (joints x joints). Default 1.0 between all
+        the oscillators.
+
+    biases: list of lists of float or ``None``
+        The desired phase differences ``phi_j - phi_i`` as fractions of the
+        cycle (joints x joints). Default 0 (synchronized).
+    """
+    def __init__(self, amplitudes=0.0, offsets=None, weights=1.0,
+                 biases=None, **kwargs):
+        super().__init__(**kwargs)
+        check_not_empty(self.cycle, 'cycle', 'motion', self.name, logger)
+        if kwargs.get('table_rate') is not None:
+            mess = f'Motion "{self.name}" cannot precompute a table; ' \
+                   'the phases are integrated at each tick'
+            logger.error(mess)
+            raise ValueError(mess)
+        count = len(self.joints())
+        self.__amplitudes = _per_joint(amplitudes, count, 0.0)
+        self.__offsets = _per_joint(offsets, count, 0.0)
+        self.__weights = np.broadcast_to(np.asarray(weights, dtype=float),
+                                         (count, count)).copy()
+        np.fill_diagonal(self.__weights, 0.0)
+        if biases is None:
+            biases = 0.0
+        self.__biases = 2 * pi * np.broadcast_to(
+            np.asarray(biases, dtype=float), (count, count))
+        # phi_j - phi_0 = bias_0j: the equilibrium of the couplings
+        self.__phi = self.__biases[0].copy()
+        self.__last = 0.0
+
+    @property
+    def phases(self):
+        """The current phases of the oscillators (radians)."""
+        return self.__phi
+
+    def setup(self):
+        """Resets the oscillators."""
+        self.__phi[:] = self.__biases[0]
+        self.__last = 0.0
+        super().setup()
+
+    def evaluate(self, moment):
+        dt = moment - self.__last
+        self.__last = moment
+        phi = self.__phi
+        if dt > 0:
+            # differences phi_j - phi_i in [i, j]
+            delta = phi[np.newaxis, :] - phi[:, np.newaxis] - self.__biases
+            coupling = (self.__weights * np.sin(delta)).sum(axis=1)
+            phi += dt * (2 * pi / self.cycle + coupling)
+        return self.__offsets + self.__amplitudes * np.sin(phi)
+
+
+class BezierGait(ArrayMotion):
+    """A periodic gait where the trajectory of each joint over one cycle
+    is a Bezier curve defined by its control points; the first and the
+    last control points should be equal for a smooth cycle.
+
+    ``BezierGait`` inherits the parameters of :py:class:`ArrayMotion`
+    (``cycle`` is mandatory). In addition:
+
+    Parameters
+    ----------
+    points: list of lists of float
+        The control points (joints x points) of the curve of each joint.
+
+    phases: float or list of float
+        The phase of each joint as a fraction [0..1) of the cycle, used
+        to shift the same curve between legs. Default 0.
+    """
+    def __init__(self, points=[], phases=None, **kwargs):
+        super().__init__(**kwargs)
+        check_not_empty(self.cycle, 'cycle', 'motion', self.name, logger)
+        count = len(self.joints())
+        self.__points = np.array(points, dtype=float)
+        if self.__points.ndim != 2 or len(self.__points) != count:
+            mess = f'Control points of motion "{self.name}" must be a ' \
+                   f'list with one list of points for each of the ' \
+                   f'{count} joints'
+            logger.error(mess)
+            raise ValueError(mess)
+        degree = self.__points.shape[1] - 1
+        # binomial coefficients (Pascal's triangle row)
+        binomials = [1.0]
+        for k in range(degree):
+            binomials.append(binomials[-1] * (degree - k) / (k + 1))
+        self.__binomials = np.array(binomials)
+        self.__powers = np.arange(degree + 1)
+        self.__phases = _per_joint(phases, count, 0.0)
+
+    def evaluate(self, moment):
+        # curve parameter for each joint (joints x 1)
+        s = ((moment / self.cycle + self.__phases) % 1.0)[:, np.newaxis]
+        powers = self.__powers
+        basis = self.__binomials * s ** powers * \
+            (1 - s) ** (powers[-1] - powers)
+        return (basis * self.__points).sum(axis=1)
+
+
+class LinearRamp(ArrayMotion):
+    """Moves the joints with constant speed from their ``start`` positions
+    to the ``end`` positions in ``duration`` seconds and then holds them
+    until the motion is stopped.
+
+    ``LinearRamp`` inherits the parameters of :py:class:`ArrayMotion`. In
+    addition:
+
+    Parameters
+    ----------
+    end: float or list of float
+        The final positions.
+
+    duration: float
+        The duration of the ramp in seconds.
+
+    start: float or list of float or ``None``
+        The initial positions. If ``None`` (default) the positions of the
+        joints when the motion starts are used.
+    """
+    def __init__(self, end=0.0, duration=1.0, start=None, **kwargs):
+        super().__init__(**kwargs)
+        count = len(self.joints())
+        self.__end = _per_joint(end, count, 0.0)
+        check_type(duration, (float, int), 'motion', self.name, logger)
+        self.__duration = duration
+        self.__start = None if start is None \
+            else _per_joint(start, count, 0.0)
+        self.__from = self.__start
+
+    def setup(self):
+        """Captures the initial positions if they were not provided."""
+        if self.__start is None:
+            self.__from = np.array([joint.position
+                                    for joint in self.joints()], dtype=float)
+        super().setup()
+
+    def evaluate(self, moment):
+        alpha = min(max(moment / self.__duration, 0.0), 1.0) \
+            if self.__duration > 0 else 1.0
+        return self.__from + (self.__end - self.__from) * alpha
@@ -1,12 +1,27 @@
 import yaml
 import logging
+import numpy as np
+from math import nan
 
 # from ..utils import check_key
 from .thread import StepLoop
-from ..base import PVLList
+from ..base import PVLList, Trajectory
+from ..utils import check_options, check_type
 
 logger = logging.getLogger(__name__)
 
+COMPILED_VERSION = 2
+"""The version of the format written by :py:meth:`Script.compile`."""
+
+
+def _compiled_names(file_name):
+    """Returns the names of the files of a compiled script: the commands
+    (``.npy``) and the other information (``.npz``)."""
+    base = file_name
+    if base.endswith('.npy') or base.endswith('.npz'):
+        base = base[:-4]
+    return base + '.npy', base + '.npz'
+
 
 class Script(StepLoop):
     """A Script is the top level structure used for defining prescribed
@@ -62,11 +77,60 @@ class Script(StepLoop):
         the script is played the scenes are run in the order provided and,
         if the ``times`` parameter is different than 1, it will repeat the
         execution in a loop.
+
+    late: str
+        The policy for the frames that are late: 'compress' (default) or
+        'skip'. See :py:class:`StepLoop`.
+
+    interpolation: str or ``None``
+        If provided, the frames are used as keyframes and the timeline is
+        produced by interpolating between them at ``rate``: 'linear',
+        'cubic' (cubic Hermite) or 'minjerk' (minimum jerk). Each frame is
+        reached at its start and the transition to the next frame takes
+        the frame's duration. Each joint (and each of position, velocity
+        and load) is interpolated only between the keyframes where it is
+        defined: it is not commanded before its first one and it holds its
+        last one after. If the script is played more than once
+        (``times`` different than 1) the last frame transitions to the
+        first one so that the iterations join without a jump; as a result
+        such a script ends on its first frame, not on its last one.
+        Otherwise the last frame is held for its duration. Default
+        ``None``: the frames are submitted as they are and held for their
+        duration.
+
+    rate: float
+        The frequency (in Hz) of the commands produced when the frames are
+        interpolated. Default 50.0.
+
+    timeline: Timeline or ``None``
+        An already compiled timeline; if provided the ``frames``,
+        ``sequences``, ``scenes`` and ``script`` are not used. Normally
+        provided by :py:meth:`from_compiled`.
+
+    When the script is created the scenes, sequences, repeats and reverses
+    are compiled in a flat :py:class:`Timeline` with the commands already
+    arranged as arrays in the order of the joint manager's joints. Playing
+    the script only indexes the timeline and submits the preallocated
+    arrays. The timeline can be saved with :py:meth:`compile` and loaded
+    with :py:meth:`from_compiled` to avoid parsing the YAML definition at
+    every start.
     """
     def __init__(self, name='SCRIPT', patience=1.0, times=1,
                  robot=None, defaults={},
-                 joints=[], frames={}, sequences={}, scenes={}, script=[]):
-        super().__init__(name=name, patience=patience, times=times)
+                 joints=[], frames={}, sequences={}, scenes={}, script=[],
+                 late='compress', interpolation=None, rate=50.0,
+                 timeline=None):
+        super().__init__(name=name, patience=patience, times=times,
+                         late=late)
+        check_options(interpolation, [None, 'linear', 'cubic', 'minjerk'],
+                      'script', name, logger)
+        self.__interpolation = interpolation
+        check_type(rate, (float, int), 'script', name, logger)
+        if rate <= 0:
+            mess = f'Rate of script "{name}" must be positive; got {rate}'
+            logger.error(mess)
+            raise ValueError(mess)
+        self.__rate = rate
         self.__robot = robot
         self.__defaults = defaults
         self.__init_joints(joints)
@@ -74,6 +138,10 @@ class Script(StepLoop):
         self.__init_sequences(sequences)
         self.__init_scenes(scenes)
         self.__init_script(script)
+        if timeline is None:
+            timeline = self.__compile()
+        self.__timeline = timeline
+        self.__durations = self.__timeline.durations.tolist()
 
     @classmethod
     def from_yaml(cls, robot, file_name):
@@ -86,12 +154,84 @@ class Script(StepLoop):
         components = init_dict[name]
         return cls(name=name, robot=robot, **components)
 
+    def compile(self, file_name):
+        """Writes the compiled script in two binary files that can be
+        loaded quickly with :py:meth:`from_compiled`: the commands of the
+        flat :py:attr:`timeline` in a NumPy ``.npy`` file (that can be
+        memory mapped) and, in a NumPy ``.npz`` archive with the same name,
+        a format version, the name and the settings of the script, the
+        names of the joints and the durations of the timeline.
+
+        Parameters
+        ----------
+        file_name: str
+            The name of the files; the ``.npy`` or ``.npz`` extension, if
+            present, is replaced by the extension of each file.
+        """
+        commands_file, info_file = _compiled_names(file_name)
+        joints = [joint.name if joint else '' for joint in self.joints]
+        columns = [joint.name for joint in self.robot.manager.joints]
+        np.save(commands_file, self.__timeline.commands)
+        np.savez(info_file,
+                 version=np.array(COMPILED_VERSION),
+                 name=np.array(self.name),
+                 times=np.array(self.times),
+                 late=np.array(self.late),
+                 joints=np.array(joints, dtype=str),
+                 columns=np.array(columns, dtype=str),
+                 durations=self.__timeline.durations)
+        logger.info(f'Script {self.name} compiled in {commands_file} '
+                    f'and {info_file}')
+
+    @classmethod
+    def from_compiled(cls, robot, file_name):
+        """Loads a script written by :py:meth:`compile` (``file_name``
+        with or without the ``.npy`` or ``.npz`` extension). The commands
+        are memory mapped from the ``.npy`` file (not read) and, if the
+        joint manager of the robot has the same joints as the one used when
+        compiling, are used without copying.
+
+        Raises
+        ------
+        ValueError:
+            If the files were written with an incompatible format version.
+        """
+        commands_file, info_file = _compiled_names(file_name)
+        with np.load(info_file) as archive:
+            version = int(archive['version']) \
+                if 'version' in archive.files else None
+            if version != COMPILED_VERSION:
+                mess = f'Compiled script {file_name} has format version ' \
+                       f'{version}; expected {COMPILED_VERSION}'
+                logger.error(mess)
+                raise ValueError(mess)
+            meta = {key: archive[key]
+                    for key in ['name', 'times', 'late', 'joints', 'columns',
+                                'durations']}
+        commands = np.load(commands_file, mmap_mode='r')
+        columns = meta['columns'].tolist()
+        names = [joint.name for joint in robot.manager.joints]
+        if columns != names:
+            # the joints of the manager changed; rearrange the columns
+            remapped = np.full((len(commands), len(names), 3), nan)
+            for index, name in enumerate(columns):
+                if name in names:
+                    remapped[:, names.index(name)] = commands[:, index]
+            commands = remapped
+        joints = [name or None for name in meta['joints'].tolist()]
+        return cls(name=str(meta['name']), robot=robot,
+                   times=int(meta['times']), late=str(meta['late']),
+                   joints=joints,
+                   timeline=Timeline(meta['durations'], commands))
+
     def __init_joints(self, joints):
         """Used by __init__ to setup the joints. Incorrect joints will be
         marked with ``None`` and will be filtered out when commands are
         issued.
         """
         for index, joint_name in enumerate(joints):
+            if joint_name is None:
+                continue
             rm_joints = [joint.name for joint in self.robot.manager.joints]
             if joint_name not in rm_joints:
                 logger.warning(f'Joint {joint_name} used in script {self.name}'
@@ -188,6 +328,99 @@ class Script(StepLoop):
                 script[index] = self.scenes[scene_name]
         self.__script = script
 
+    def __compile(self):
+        """Called by __init__ to flatten the script into a
+        :py:class:`Timeline` with the commands in the order of the joints
+        of the robot manager."""
+        names = [joint.name for joint in self.robot.manager.joints]
+        # column in the commands for each joint of the script
+        columns = [names.index(joint.name) if joint else None
+                   for joint in self.joints]
+        used = [(index, column) for index, column in enumerate(columns)
+                if column is not None]
+        rows = [index for index, _ in used]
+        cols = [column for _, column in used]
+        durations = []
+        commands = []
+        for frame, duration in self.__play_scenes():
+            values = frame.values
+            if len(values) != len(self.joints):
+                mess = f'Frame with {len(values)} values used in script ' \
+                       f'"{self.name}" that has {len(self.joints)} joints'
+                logger.error(mess)
+                raise ValueError(mess)
+            command = np.full((len(names), 3), nan)
+            command[cols] = values[rows]
+            commands.append(command)
+            durations.append(duration)
+        if self.__interpolation and commands:
+            return self.__interpolate(durations, commands)
+        return Timeline(durations, commands)
+
+    def __interpolate(self, durations, commands):
+        """Samples the keyframes at the script's ``rate`` with the
+        requested interpolation and returns the dense timeline. The values
+        are interpolated across the keyframes where they are defined (not
+        ``nan``); the values with the same keyframes share a trajectory."""
+        durations = np.array(durations, dtype=float)
+        # the keyframes at the start of each frame and, at the end of the
+        # last frame, the first one if the script repeats (so that the
+        # iterations join) or the last one held
+        times = np.concatenate(([0.0], np.cumsum(durations)))
+        end = commands[:1] if self.times != 1 else commands[-1:]
+        values = np.concatenate((commands, end))
+        keep = np.concatenate((durations > 0, [True]))
+        total = times[-1]
+        times = times[keep]
+        flat = values[keep].reshape(len(times), -1)
+        groups = {}
+        for column, defined in enumerate(~np.isnan(flat).T):
+            if defined.any():
+                group = groups.setdefault(defined.tobytes(), (defined, []))
+                group[1].append(column)
+        period = 1.0 / self.__rate
+        moments = np.arange(0.0, total, period)
+        samples = np.full((len(moments), flat.shape[1]), nan)
+        for defined, columns in groups.values():
+            trajectory = Trajectory(times[defined],
+                                    flat[defined][:, columns],
+                                    method=self.__interpolation)
+            sample = np.empty((len(columns), 3))
+            for index, moment in enumerate(moments):
+                trajectory.sample(moment, out=sample)
+                samples[index, columns] = sample[:, 0]
+        samples = samples.reshape((len(moments),) + values.shape[1:])
+        steps = np.full(len(moments), period)
+        if len(steps):
+            steps[-1] = total - moments[-1]
+        return Timeline(steps, samples)
+
+    def __play_scenes(self):
+        """Iterates over the scenes producing the frames' commands; used
+        to compile the timeline."""
+        for scene in self.script:
+            if scene:           # pragma: no branch
+                logger.debug(f'Script {self.name} compiling scene '
+                             f'{scene.name}')
+                for frame, duration in scene.play():
+                    yield frame, duration
+
+    @property
+    def timeline(self):
+        """The compiled :py:class:`Timeline` of the script (one iteration).
+        """
+        return self.__timeline
+
+    @property
+    def interpolation(self):
+        """The interpolation between the frames or ``None``."""
+        return self.__interpolation
+
+    @property
+    def rate(self):
+        """The frequency of the interpolated commands."""
+        return self.__rate
+
     @property
     def robot(self):
         """The robot associated with the Script."""
@@ -224,36 +457,23 @@ class Script(StepLoop):
         return self.__script
 
     def play(self):
-        """Inherited from :py:class:`StepLoop`. Iterates over the scenes
-        and produces the commands."""
+        """Inherited from :py:class:`StepLoop`. Iterates over the compiled
+        :py:attr:`timeline` and produces the commands."""
         logger.debug(f'Script {self.name} playing')
-        for scene in self.script:
-            if scene:           # pragma: no branch
-                logger.debug(f'Script {self.name} playing scene {scene.name}')
-                for frame, duration in scene.play():
-                    yield frame, duration
+        commands = self.__timeline.commands
+        for index, duration in enumerate(self.__durations):
+            yield commands[index], duration
 
     def atomic(self, data):
-        """Inherited from :py:class:`StepLoop`. Submits the data to the
-        robot manager only for valid joints."""
-        # data is a list of tuples with the commands for each joint
-        assert len(data) == len(self.joints)
-        # because self.joints could contain None values we cannot use zip
-        commands = {}
-        for index, joint in enumerate(self.joints):
-            if joint:
-                commands[joint.name] = data[index]
-        logger.debug(f'Submitting: {commands}')
-        self.robot.manager.submit(self, commands)
+        """Inherited from :py:class:`StepLoop`. Submits the data (an array
+        with the commands for all the joints of the robot manager) to the
+        robot manager."""
+        self.robot.manager.submit(self, data)
 
     def teardown(self):
         """Informs the robot manager we are finished."""
-        for _ in range(5):
-            if self.robot.manager.stop_submit(self):
-                logger.info(f'Script {self.name} successfully unsubscribed')
-                return None
-        logger.warning(f'Script {self.name} failed to unsubscribe from '
-                       'Joint Manager')
+        self.robot.manager.stop_submit(self)
+        logger.info(f'Script {self.name} successfully unsubscribed')
 
 
 class Scene():
@@ -457,3 +677,75 @@ class Frame():
         frame.
         """
         return self.__pvl
+
+
+class Timeline():
+    """A flat representation of a :py:class:`Script`: the frames produced
+    by all the scenes, sequences, repeats and reverses are laid out one
+    after the other in ``numpy`` arrays.
+
+    Parameters
+    ----------
+    durations: list of float
+        The duration of each step.
+
+    commands: list or array of float
+        The commands for each step as an array (steps x joints x 3) with
+        position, velocity and load for each joint; ``nan`` marks the
+        values that are not commanded.
+    """
+    def __init__(self, durations=[], commands=[]):
+        self.__durations = np.array(durations, dtype=float)
+        count = len(self.__durations)
+        # memory mapped commands are used without copying
+        self.__commands = np.asanyarray(commands, dtype=float)
+        if count == 0:
+            self.__commands = self.__commands.reshape(0, 0, 3)
+        if self.__commands.ndim != 3 or len(self.__commands) != count:
+            mess = f'Timeline commands with shape {self.__commands.shape} ' \
+                   f'do not match {count} durations'
+            logger.error(mess)
+            raise ValueError(mess)
+        # the start moment of each step
+        self.__times = np.concatenate(([0.0],
+                                       np.cumsum(self.__durations)[:-1]))
+        self.__times = self.__times[:count]
+        self.__duration = float(self.__durations.sum())
+
+    @property
+    def times(self):
+        """The moments (relative to the start) when each step starts."""
+        return self.__times
+
+    @property
+    def durations(self):
+        """The duration of each step."""
+        return self.__durations
+
+    @property
+    def commands(self):
+        """The commands (steps x joints x 3)."""
+        return self.__commands
+
+    @property
+    def duration(self):
+        """The total duration of the timeline."""
+        return self.__duration
+
+    def __len__(self):
+        return len(self.__durations)
+
+    def index_at(self, moment):
+        """Returns the index of the step active at ``moment`` (relative to
+        the start) or ``None`` if the moment is outside the timeline."""
+        if moment < 0 or moment >= self.__duration:
+            return None
+        return int(np.searchsorted(self.__times, moment, side='right')) - 1
+
+    def sample(self, moment):
+        """Returns the commands (joints x 3) active at ``moment`` (relative
+        to the start) or ``None`` if the moment is outside the timeline."""
+        index = self.index_at(moment)
+        if index is None:
+            return None
+        return self.__commands[index]
@@ -0,0 +1,234 @@
+import logging
+import multiprocessing
+import numpy as np
+from math import nan
+
+from .motions import ArrayMotion
+from ..utils import check_not_empty, check_type
+
+logger = logging.getLogger(__name__)
+
+
+def _worker(function, state, result, moments, request, ready, stop):
+    """The loop of the worker process: waits for a request, calls the
+    ``function`` with the snapshot of the joints and publishes the result.
+    ``moments`` holds the moment of the request, the moment of the result
+    and a failure flag. ``ready`` is also set once the worker runs."""
+    count = len(state) // 3
+    state = np.frombuffer(state).reshape(count, 3)
+    result = np.frombuffer(result).reshape(count, 3)
+    ready.set()
+    while not stop.is_set():
+        if not request.wait(0.1):
+            continue
+        request.clear()
+        if stop.is_set():
+            break
+        moment = moments[0]
+        try:
+            values = np.asarray(function(moment, state.copy()), dtype=float)
+            result[:] = nan
+            if values.ndim == 1:
+                result[:, 0] = values
+            else:
+                result[:, :values.shape[1]] = values[:, :3]
+            moments[1] = moment
+        except Exception:
+            logger.exception(f'Offloaded function failed at {moment}')
+            moments[2] = 1.0
+        ready.set()
+
+
+class OffloadedMotion(ArrayMotion):
+    """A motion that runs its expensive computation (ex. inverse kinematics
+    or optimizations) in a separate worker process so that it does not hold
+    the GIL while the syncs and the joint manager run.
+
+    At every tick the motion:
+
+    - collects the result of the worker if it finished and, as long as the
+      result is not older than ``staleness``, submits it to the joint
+      manager (the last result is submitted again while the worker computes
+      the next one),
+    - if the worker is idle, takes a snapshot of the joints (positions,
+      velocities and loads) and passes it to the worker to compute the next
+      commands.
+
+    The snapshot and the results are exchanged through shared memory
+    arrays, without pickling. Results older than ``staleness`` are dropped
+    and counted in :py:attr:`dropped`, and the commands submitted before
+    are withdrawn from the joint manager, so that the robot never follows
+    commands computed from an outdated state. The same happens if the
+    computation fails.
+
+    The ``function`` is called in the worker process as
+    ``function(moment, state)`` where ``moment`` is the time since the
+    motion started when the snapshot was taken and ``state`` is an array
+    (joints x 3) with the positions, velocities and loads of the joints
+    (``nan`` if the joint does not report them). It must return the
+    positions (joints) or the commands (joints x 1..3) in the same order.
+    The worker is started with the ``forkserver`` start method (``spawn``
+    where it is not available) so the function must be picklable (ex.
+    defined at the module level). ``fork`` can be requested with
+    ``context`` but the robot is multi-threaded: a lock held by another
+    thread (ex. a bus or the logging lock) at the moment of the fork stays
+    locked in the worker and can deadlock it.
+
+    ``OffloadedMotion`` inherits the parameters of :py:class:`Motion`
+    (``table_rate`` is not supported as the commands depend on the state of
+    the joints). In addition:
+
+    Parameters
+    ----------
+    function: callable
+        The computation performed in the worker process.
+
+    staleness: float
+        The maximum age in seconds of a result (measured from the moment the
+        snapshot was taken) that is still submitted. Default 0.1.
+
+    context: str or ``None``
+        The ``multiprocessing`` start method ('fork', 'spawn' or
+        'forkserver'); ``None`` (default) uses 'forkserver' if the platform
+        supports it and 'spawn' otherwise.
+    """
+    def __init__(self, function=None, staleness=0.1, context=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        if kwargs.get('table_rate') is not None:
+            mess = f'Motion "{self.name}" cannot precompute a table; ' \
+                   'the commands are computed from the state of the joints'
+            logger.error(mess)
+            raise ValueError(mess)
+        check_not_empty(function, 'function', 'motion', self.name, logger)
+        if not callable(function):
+            mess = f'Function of motion "{self.name}" must be callable'
+            logger.error(mess)
+            raise ValueError(mess)
+        self.__function = function
+        check_type(staleness, (float, int), 'motion', self.name, logger)
+        self.__staleness = staleness
+        if context is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = 'forkserver' if 'forkserver' in methods else 'spawn'
+        self.__context = multiprocessing.get_context(context)
+        self.__process = None
+        self.__dropped = 0
+        count = len(self.joints())
+        self.__state = np.empty((count, 3))
+        self.__latest = np.full((count, 3), nan)
+        self.__latest_moment = None
+
+    @property
+    def function(self):
+        """The function computed in the worker process."""
+        return self.__function
+
+    @property
+    def staleness(self):
+        """The maximum age in seconds of a result that is submitted."""
+        return self.__staleness
+
+    @property
+    def dropped(self):
+        """The number of ticks when the available result was too old to be
+        submitted."""
+        return self.__dropped
+
+    @property
+    def worker(self):
+        """The worker process or ``None`` if the motion is not running."""
+        return self.__process
+
+    def setup(self):
+        """Creates the shared memory and starts the worker process."""
+        context = self.__context
+        count = len(self.joints())
+        self.__shared_state = context.RawArray('d', count * 3)
+        self.__shared_result = context.RawArray('d', count * 3)
+        # request moment, result moment, failure flag
+        self.__moments = context.RawArray('d', [nan, nan, 0.0])
+        self.__request = context.Event()
+        self.__ready = context.Event()
+        self.__stop = context.Event()
+        self.__state = np.frombuffer(self.__shared_state).reshape(count, 3)
+        self.__result = np.frombuffer(self.__shared_result).reshape(count, 3)
+        self.__latest[:] = nan
+        self.__latest_moment = None
+        self.__pending = False
+        self.__failed = False
+        # nothing submitted to the joint manager yet
+        self.__withdrawn = True
+        self.__dropped = 0
+        self.__process = context.Process(
+            target=_worker, name=f'{self.name}-worker', daemon=True,
+            args=(self.__function, self.__shared_state, self.__shared_result,
+                  self.__moments, self.__request, self.__ready, self.__stop))
+        self.__process.start()
+        # a new process imports the module of the function before it runs;
+        # wait for it so that the first ticks do not count as stale
+        if not self.__ready.wait(self.patience):
+            logger.warning(f'Worker of motion "{self.name}" did not start '
+                           f'in {self.patience}s')
+        self.__ready.clear()
+        # the ticks start once the worker is running
+        super().setup()
+
+    def __snapshot(self):
+        """Copies the current state of the joints in the shared memory."""
+        state = self.__state
+        for index, joint in enumerate(self.joints()):
+            state[index, 0] = joint.position
+            state[index, 1] = getattr(joint, 'velocity', nan)
+            state[index, 2] = getattr(joint, 'load', nan)
+
+    def __withdraw(self):
+        """Removes the commands submitted before from the joint manager so
+        that the joints no longer follow them."""
+        if not self.__withdrawn:
+            self.manager().stop_submit(self)
+            self.__withdrawn = True
+
+    def evaluate(self, moment):
+        """Collects the result of the worker, sends a new request if the
+        worker is idle and returns the latest result if it is fresh
+        enough. Otherwise the previous commands are withdrawn."""
+        if self.__failed:
+            return None
+        if self.__pending and self.__ready.is_set():
+            self.__ready.clear()
+            self.__pending = False
+            if self.__moments[2]:
+                self.__failed = True
+                logger.error(f'Computation of motion "{self.name}" failed; '
+                             'no more commands will be submitted')
+                self.__withdraw()
+                return None
+            self.__latest[:] = self.__result
+            self.__latest_moment = self.__moments[1]
+        if not self.__pending:
+            self.__snapshot()
+            self.__moments[0] = moment
+            self.__pending = True
+            self.__request.set()
+        if self.__latest_moment is None:
+            return None
+        if moment - self.__latest_moment > self.__staleness:
+            self.__dropped += 1
+            self.__withdraw()
+            return None
+        self.__withdrawn = False
+        return self.__latest
+
+    def teardown(self):
+        """Stops the worker process and informs the joint manager we are
+        finished."""
+        self.__stop.set()
+        self.__request.set()
+        self.__process.join(1.0)
+        if self.__process.is_alive():
+            logger.warning(f'Worker of motion "{self.name}" did not finish; '
+                           'terminating it')
+            self.__process.terminate()
+        self.__process = None
+        super().teardown()
@@ -0,0 +1,290 @@
+import logging
+import threading
+import yaml
+import numpy as np
+
+from .moves import Script
+from ..base.clock import SYSTEM_CLOCK
+from ..utils import check_key, check_not_empty, check_type
+
+logger = logging.getLogger(__name__)
+
+
+def _keyframes(times, positions, tolerance):
+    """Selects the samples that need to be kept so that the linear
+    interpolation between them does not deviate from any of the recorded
+    positions with more than ``tolerance`` (Ramer-Douglas-Peucker). Joints
+    with ``nan`` positions are ignored. Returns the sorted indices."""
+    keep = {0, len(times) - 1}
+    segments = [(0, len(times) - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        inner = slice(first + 1, last)
+        alpha = (times[inner] - times[first]) / (times[last] - times[first])
+        line = positions[first] + \
+            alpha[:, np.newaxis] * (positions[last] - positions[first])
+        deviation = np.nan_to_num(np.abs(positions[inner] - line))
+        errors = deviation.max(axis=1)
+        worst = int(errors.argmax())
+        if errors[worst] > tolerance:
+            split = first + 1 + worst
+            keep.add(split)
+            segments.append((first, split))
+            segments.append((split, last))
+    return sorted(keep)
+
+
+class Recorder():
+    """Records the state of a group of joints at the rate of a read sync,
+    for instance to teach motions by demonstration.
+
+    When started the recorder registers itself as a listener of the read
+    sync and, at the end of each sync cycle, takes a snapshot of the
+    positions, velocities and loads of the joints (read in bulk with a
+    :py:class:`JointGroup`) into a preallocated ring buffer. No objects are
+    created for the samples and no additional bus reads are performed, as
+    the values are those just updated by the sync.
+
+    The recording can be converted in a :py:class:`Script` definition with
+    :py:meth:`to_script` or saved with :py:meth:`save` as a YAML file or
+    a compiled script. With a ``tolerance`` the recording is reduced to the
+    keyframes needed to reproduce it with linear interpolation::
+
+        recorder = Recorder(robot=robot, group='arm')
+        recorder.start()
+        ...                         # move the arm by hand
+        recorder.stop()
+        recorder.save('wave.yml', name='wave', tolerance=0.5)
+
+    Parameters
+    ----------
+    name: str
+        The name of the recorder.
+
+    robot: BaseRobot or subclass
+        The robot whose joints are recorded.
+
+    group: str
+        The name of the robot group with the joints recorded. The joints are
+        ordered by name (see :py:class:`JointGroup`).
+
+    capacity: int
+        The number of samples kept; when the buffer is full the oldest
+        samples are overwritten. Default 10000.
+
+    sync: str or ``None``
+        The name of the read sync that triggers the samples. If ``None``
+        (default) the first sync that reads the position registers of the
+        joints is used. If no sync reads them the recorder can still be
+        driven by calling :py:meth:`record` explicitly.
+    """
+    def __init__(self, name='RECORDER', robot=None, group=None,
+                 capacity=10000, sync=None):
+        self.__name = name
+        check_not_empty(robot, 'robot', 'recorder', name, logger)
+        self.__robot = robot
+        check_not_empty(group, 'group', 'recorder', name, logger)
+        self.__group = robot.joint_group(group)
+        check_type(capacity, int, 'recorder', name, logger)
+        self.__capacity = capacity
+        if sync is None:
+            self.__sync = self.__find_sync()
+        else:
+            check_key(sync, robot.syncs, 'recorder', name, logger)
+            self.__sync = robot.syncs[sync]
+        self.__times = np.empty(capacity)
+        self.__values = np.empty((capacity, len(self.__group), 3))
+        self.__count = 0
+        self.__recording = False
+        self.__lock = threading.Lock()
+
+    def __find_sync(self):
+        """Returns the first sync that reads the position registers of the
+        joints or ``None``."""
+        wanted = set()
+        for joint in self.__group.joints:
+            register = joint.position_read_register
+            wanted.add(register.clone or register)
+        for sync in self.__robot.syncs.values():
+            if any((register.clone or register) in wanted
+                   for register in sync.all_registers):
+                return sync
+        return None
+
+    @property
+    def name(self):
+        """The name of the recorder."""
+        return self.__name
+
+    @property
+    def joints(self):
+        """The joints recorded, in the order used in the samples."""
+        return self.__group.joints
+
+    @property
+    def sync(self):
+        """The read sync that triggers the samples or ``None``."""
+        return self.__sync
+
+    @property
+    def capacity(self):
+        """The number of samples kept."""
+        return self.__capacity
+
+    @property
+    def recording(self):
+        """``True`` if the recorder is started."""
+        return self.__recording
+
+    def __len__(self):
+        return min(self.__count, self.__capacity)
+
+    def start(self):
+        """Starts recording at the end of each cycle of the sync."""
+        if self.__sync is None:
+            logger.warning(f'Recorder "{self.name}" has no sync; samples '
+                           'are taken only when "record" is called')
+        else:
+            self.__sync.add_listener(self.record)
+        self.__recording = True
+
+    def stop(self):
+        """Stops recording. The samples are kept."""
+        if self.__sync is not None:
+            self.__sync.remove_listener(self.record)
+        self.__recording = False
+
+    def clear(self):
+        """Removes all the samples."""
+        with self.__lock:
+            self.__count = 0
+
+    def record(self, sync=None):
+        """Takes one sample of the joints. Invoked by the sync at the end of
+        each cycle with itself as the ``sync`` parameter; can also be called
+        explicitly."""
+        clock = SYSTEM_CLOCK if sync is None else sync.clock
+        group = self.__group
+        with self.__lock:
+            row = self.__count % self.__capacity
+            self.__times[row] = clock.time()
+            values = self.__values[row]
+            values[:, 0] = group.positions
+            values[:, 1] = group.velocities
+            values[:, 2] = group.loads
+            self.__count += 1
+
+    def samples(self):
+        """Returns a copy of the samples in chronological order.
+
+        Returns
+        -------
+        tuple (times, values)
+            ``times`` is an array (samples) with the moments of the samples
+            and ``values`` an array (samples x joints x 3) with the
+            positions, velocities and loads of the joints.
+        """
+        with self.__lock:
+            count = self.__count
+            if count <= self.__capacity:
+                return self.__times[:count].copy(), \
+                    self.__values[:count].copy()
+            order = np.roll(np.arange(self.__capacity),
+                            -(count % self.__capacity))
+            return self.__times[order], self.__values[order]
+
+    def to_script(self, name='recording', tolerance=None,
+                  velocities=False, loads=False):
+        """Converts the samples in a :py:class:`Script` definition in the
+        format used by the YAML files (see :py:meth:`Script.from_yaml`).
+
+        Parameters
+        ----------
+        name: str
+            The name of the script.
+
+        tolerance: float or ``None``
+            If provided, only the keyframes needed to reproduce the
+            positions within ``tolerance`` with linear interpolation are
+            kept and the script uses ``linear`` interpolation at the rate of
+            the recording. If ``None`` (default) all the samples are
+            converted to frames.
+
+        velocities: bool
+            Include the velocities in the frames. Default ``False``.
+
+        loads: bool
+            Include the loads in the frames. Default ``False``.
+
+        Returns
+        -------
+        dict:
+            {name: {'joints', 'frames', 'sequences', 'scenes', 'script'}}
+
+        Raises
+        ------
+        ValueError:
+            If there are less than 2 samples.
+        """
+        times, values = self.samples()
+        if len(times) < 2:
+            mess = f'Recorder "{self.name}" needs at least 2 samples to ' \
+                   'produce a script'
+            logger.error(mess)
+            raise ValueError(mess)
+        intervals = np.diff(times)
+        interval = float(np.median(intervals))
+        if tolerance is None:
+            indices = list(range(len(times)))
+        else:
+            check_type(tolerance, (float, int), 'recorder', self.name,
+                       logger)
+            indices = _keyframes(times, values[:, :, 0], tolerance)
+        # each frame lasts until the next one; the last one a sample
+        durations = np.diff(times[indices]).tolist() + [interval]
+        frames = {}
+        frame_names = []
+        for number, index in enumerate(indices):
+            frame_name = f'frame_{number:05d}'
+            positions = values[index, :, 0].tolist()
+            if velocities or loads:
+                frame = {'positions': positions}
+                if velocities:
+                    frame['velocities'] = values[index, :, 1].tolist()
+                if loads:
+                    frame['loads'] = values[index, :, 2].tolist()
+            else:
+                frame = positions
+            frames[frame_name] = frame
+            frame_names.append(frame_name)
+        definition = {
+            'joints': [joint.name for joint in self.joints],
+            'frames': frames,
+            'sequences': {name: {'frames': frame_names,
+                                 'durations': durations}},
+            'scenes': {name: {'sequences': [name]}},
+            'script': [name]
+        }
+        if tolerance is not None:
+            definition['interpolation'] = 'linear'
+            definition['rate'] = 1.0 / interval
+        return {name: definition}
+
+    def save(self, file_name, name='recording', tolerance=None,
+             velocities=False, loads=False):
+        """Saves the recording as a script definition in a YAML file or, if
+        the ``file_name`` ends in ``.npy`` or ``.npz``, as a compiled script
+        (see :py:meth:`Script.compile`). The other parameters are the same
+        as for :py:meth:`to_script`."""
+        definition = self.to_script(name=name, tolerance=tolerance,
+                                    velocities=velocities, loads=loads)
+        if file_name.endswith('.npy') or file_name.endswith('.npz'):
+            script = Script(name=name, robot=self.__robot,
+                            **definition[name])
+            script.compile(file_name)
+        else:
+            with open(file_name, 'w') as f:
+                yaml.dump(definition, f, sort_keys=False)
+            logger.info(f'Recording of "{self.name}" saved in {file_name}')
@@ -0,0 +1,124 @@
+import logging
+import threading
+
+from ..base import BaseThread, CooperativeExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class _SharedExecutor(CooperativeExecutor):
+    """A :py:class:`CooperativeExecutor` whose tasks can be started and
+    stopped from other threads while the scheduler's thread processes them.
+    The scheduler is notified when tasks are started so that it can wake
+    up earlier."""
+    def __init__(self, clock):
+        super().__init__(clock=clock)
+        # reentrant: tasks may start or stop other tasks (or themselves)
+        # while they are processed
+        self.condition = threading.Condition(threading.RLock())
+
+    def start(self, thread):
+        with self.condition:
+            super().start(thread)
+            self.condition.notify_all()
+
+    def stop(self, thread):
+        with self.condition:
+            super().stop(thread)
+
+
+class MoveScheduler(BaseThread):
+    """Runs many scripts and motions as cooperative tasks in one thread
+    instead of starting an OS thread for each of them.
+
+    The scripts and motions are attached to the scheduler with
+    :py:meth:`attach`; after that their :py:meth:`BaseThread.start`,
+    :py:meth:`BaseThread.pause`, :py:meth:`BaseThread.resume` and
+    :py:meth:`BaseThread.stop` methods work as usual (and can be called from
+    any thread), but the processing is done by the scheduler's thread that
+    calls their :py:meth:`BaseThread.step` in the order of their next
+    deadline. All the tasks that are due at the same moment are processed
+    in one batch, one after the other, so their submissions reach the
+    :py:class:`JointManager` together::
+
+        scheduler = MoveScheduler()
+        scheduler.start()
+        for name in ['wave', 'nod', 'blink']:
+            gesture = Script.from_yaml(robot=robot, file_name=f'{name}.yml')
+            scheduler.attach(gesture)
+            gesture.start()
+
+    The scheduler uses its :py:attr:`clock` for the tasks attached. When
+    the scheduler is paused the tasks are not processed and when it is
+    stopped all the tasks still running are stopped.
+
+    Parameters
+    ----------
+    name: str
+        The name of the scheduler.
+
+    patience: float
+        A duration in seconds that the main thread will wait for the
+        background thread to finish setup activities and indicate that it
+        is in ``started`` mode.
+
+    idle: float
+        The longest time in seconds the scheduler waits without checking
+        if it was paused or stopped. Default 0.1.
+    """
+    def __init__(self, name='SCHEDULER', patience=1.0, idle=0.1):
+        super().__init__(name=name, patience=patience)
+        self.__idle = idle
+        self.__executor = None
+
+    @property
+    def tasks(self):
+        """The scripts and motions currently running in the scheduler."""
+        if self.__executor is None:
+            return []
+        return self.__executor.tasks
+
+    def __get_executor(self):
+        if self.__executor is None:
+            self.__executor = _SharedExecutor(self.clock)
+        return self.__executor
+
+    def attach(self, *threads):
+        """Attaches the scripts or motions to the scheduler. They will be
+        processed by the scheduler when they are started."""
+        self.__get_executor().attach(*threads)
+
+    def run(self):
+        """Waits for the next deadline of the tasks and processes all the
+        tasks that are due."""
+        executor = self.__get_executor()
+        condition = executor.condition
+        clock = self.clock
+        while not self.stopped:
+            with condition:
+                if self.paused:
+                    condition.wait(self.__idle)
+                    continue
+                deadline = executor.next_deadline()
+                if deadline is None:
+                    wait = self.__idle
+                else:
+                    wait = deadline - clock.time()
+                if wait > 0:
+                    condition.wait(min(wait, self.__idle))
+                    continue
+                # process in a batch all the tasks that are due
+                now = clock.time()
+                while deadline is not None and deadline <= now:
+                    try:
+                        executor.run_once()
+                    except Exception:
+                        # the executor already marked the task as crashed
+                        logger.exception(f'Task failed in scheduler '
+                                         f'"{self.name}"')
+                    deadline = executor.next_deadline()
+
+    def teardown(self):
+        """Stops the tasks that are still running."""
+        for task in self.tasks:
+            task.stop()
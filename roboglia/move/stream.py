@@ -0,0 +1,230 @@
+import csv
+import logging
+import numpy as np
+from math import nan
+
+from .thread import StepLoop
+from ..utils import check_not_empty, check_type
+
+logger = logging.getLogger(__name__)
+
+
+class FrameSource():
+    """A source of frames read in chunks from a CSV file, a NumPy ``.npy``
+    file (memory mapped) or an array, so that very long choreographies can
+    be played without loading them completely in memory.
+
+    Each frame is a row with the duration of the frame followed by the
+    commands for the joints. The columns are named:
+
+    - ``duration``: the duration of the frame in seconds; must be the first
+      column
+    - ``<joint>`` or ``<joint>.p``: the position of the joint
+    - ``<joint>.v``: the velocity of the joint
+    - ``<joint>.ld``: the load of the joint
+
+    Empty cells (CSV) or ``nan`` values mark the values that are not
+    commanded in that frame.
+
+    Parameters
+    ----------
+    source: str or numpy.ndarray
+        A file name ending in ``.csv`` or ``.npy`` or an array (frames x
+        columns); a ``numpy.memmap`` can be used for arrays stored in
+        other formats.
+
+    columns: list of str or ``None``
+        The names of the columns. For CSV files they are read from the
+        header (first row) if not provided. Mandatory for ``.npy`` files and
+        arrays.
+
+    chunk_size: int
+        The number of frames read at once. Default 1024.
+    """
+    def __init__(self, source=None, columns=None, chunk_size=1024):
+        check_not_empty(source, 'source', 'frame source', 'FrameSource',
+                        logger)
+        check_type(chunk_size, int, 'frame source', 'FrameSource', logger)
+        self.__source = source
+        self.__chunk_size = chunk_size
+        self.__csv = isinstance(source, str) and source.endswith('.csv')
+        if columns is None and self.__csv:
+            with open(source, newline='') as f:
+                columns = [name.strip() for name in next(csv.reader(f))]
+            self.__header = True
+        else:
+            self.__header = False
+        check_not_empty(columns, 'columns', 'frame source', 'FrameSource',
+                        logger)
+        if columns[0] != 'duration':
+            mess = f'The first column of a frame source must be ' \
+                   f'"duration"; got "{columns[0]}"'
+            logger.error(mess)
+            raise ValueError(mess)
+        self.__columns = list(columns)
+
+    @property
+    def columns(self):
+        """The names of the columns."""
+        return self.__columns
+
+    @property
+    def chunk_size(self):
+        """The number of frames read at once."""
+        return self.__chunk_size
+
+    def chunks(self):
+        """Iterates over the frames in chunks.
+
+        Returns
+        -------
+        iterator of tuple (durations, values)
+            ``durations`` is an array (frames) and ``values`` an array
+            (frames x columns - 1) with the commands.
+        """
+        if self.__csv:
+            return self.__csv_chunks()
+        return self.__array_chunks()
+
+    def __csv_chunks(self):
+        """Reads the CSV file row by row and groups the rows in chunks."""
+        chunk = np.empty((self.__chunk_size, len(self.__columns)))
+        count = 0
+        with open(self.__source, newline='') as f:
+            reader = csv.reader(f)
+            if self.__header:
+                next(reader)
+            for row in reader:
+                if not row:
+                    continue
+                chunk[count] = [float(cell) if cell.strip() else nan
+                                for cell in row]
+                count += 1
+                if count == self.__chunk_size:
+                    yield chunk[:, 0], chunk[:, 1:]
+                    count = 0
+        if count:
+            yield chunk[:count, 0], chunk[:count, 1:]
+
+    def __array_chunks(self):
+        """Slices the (memory mapped) array in chunks."""
+        data = self.__source
+        if isinstance(data, str):
+            data = np.load(data, mmap_mode='r')
+        if data.ndim != 2 or data.shape[1] != len(self.__columns):
+            mess = f'Frame source data with shape {data.shape} does not ' \
+                   f'match the {len(self.__columns)} columns'
+            logger.error(mess)
+            raise ValueError(mess)
+        for start in range(0, len(data), self.__chunk_size):
+            chunk = np.asarray(data[start:start + self.__chunk_size],
+                               dtype=float)
+            yield chunk[:, 0], chunk[:, 1:]
+
+
+class StreamScript(StepLoop):
+    """A script that plays the frames of a :py:class:`FrameSource` as they
+    are read, chunk by chunk. The memory used does not depend on the length
+    of the choreography and the playback starts as soon as the first chunk
+    is read.
+
+    Parameters
+    ----------
+    name: str
+        The name of the script
+
+    patience: float
+        A duration in seconds that the main thread will wait for the
+        background thread to finish setup activities and indicate that it
+        is in ``started`` mode.
+
+    times: int
+        How many times the frames should be played. If a negative number is
+        given (ex. -1) the script will play to infinite
+
+    robot: BaseRobot or subclass
+        The robot that will be performing the script
+
+    source: FrameSource or str or numpy.ndarray
+        The source of the frames. File names and arrays are wrapped in a
+        :py:class:`FrameSource` with the ``columns`` and ``chunk_size``
+        provided.
+
+    columns: list of str or ``None``
+        The names of the columns (see :py:class:`FrameSource`).
+
+    chunk_size: int
+        The number of frames read at once. Default 1024.
+
+    late: str
+        The policy for the frames that are late: 'compress' (default) or
+        'skip'. See :py:class:`StepLoop`.
+    """
+    def __init__(self, name='STREAM', patience=1.0, times=1, robot=None,
+                 source=None, columns=None, chunk_size=1024,
+                 late='compress'):
+        super().__init__(name=name, patience=patience, times=times,
+                         late=late)
+        check_not_empty(robot, 'robot', 'script', name, logger)
+        self.__robot = robot
+        if not isinstance(source, FrameSource):
+            source = FrameSource(source, columns=columns,
+                                 chunk_size=chunk_size)
+        self.__source = source
+        self.__init_columns()
+
+    def __init_columns(self):
+        """Maps the columns of the source to the joints (columns of the
+        commands submitted to the manager) and the values (p, v, ld).
+        Columns of joints that are not managed are skipped."""
+        names = [joint.name for joint in self.robot.manager.joints]
+        kinds = {'p': 0, 'v': 1, 'ld': 2}
+        self.__sources = []
+        self.__joints = []
+        self.__kinds = []
+        for index, column in enumerate(self.__source.columns[1:]):
+            joint_name, _, kind = column.partition('.')
+            kind = kind or 'p'
+            if joint_name not in names or kind not in kinds:
+                logger.warning(f'Column "{column}" used by script '
+                               f'{self.name} does not refer to a joint '
+                               'managed by the robot manager and will be '
+                               'skipped')
+                continue
+            self.__sources.append(index)
+            self.__joints.append(names.index(joint_name))
+            self.__kinds.append(kinds[kind])
+        self.__commands = np.full((self.__source.chunk_size, len(names), 3),
+                                  nan)
+
+    @property
+    def robot(self):
+        """The robot associated with the script."""
+        return self.__robot
+
+    @property
+    def source(self):
+        """The :py:class:`FrameSource` of the script."""
+        return self.__source
+
+    def play(self):
+        """Inherited from :py:class:`StepLoop`. Reads the source chunk by
+        chunk and produces the commands for each frame."""
+        commands = self.__commands
+        for durations, values in self.__source.chunks():
+            count = len(durations)
+            commands[:count] = nan
+            commands[:count, self.__joints, self.__kinds] = \
+                values[:, self.__sources]
+            for index, duration in enumerate(durations.tolist()):
+                yield commands[index], duration
+
+    def atomic(self, data):
+        """Inherited from :py:class:`StepLoop`. Submits the commands of the
+        frame to the robot manager."""
+        self.robot.manager.submit(self, data)
+
+    def teardown(self):
+        """Informs the robot manager we are finished."""
+        self.robot.manager.stop_submit(self)
+        logger.info(f'Script {self.name} successfully unsubscribed')
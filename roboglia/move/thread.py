@@ -1,8 +1,7 @@
-import time
 import logging
 
 from ..base import BaseThread, BaseLoop
-from ..utils import check_not_empty
+from ..utils import check_not_empty, check_options
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +9,12 @@ logger = logging.getLogger(__name__)
 class StepLoop(BaseThread):
     """A thread that runs in the background and runs a sequence of steps.
 
+    The steps are scheduled on an absolute timeline: each step starts at
+    the moment the loop started plus the durations of all the previous
+    steps (plus the time spent in pause). Delays in waking up or in
+    processing a step are therefore corrected in the following steps and
+    do not accumulate over long sequences.
+
     Parameters
     ----------
     name: str
@@ -23,15 +28,46 @@ class StepLoop(BaseThread):
     times: int
         How many times the loop should be played. If a negative number is
         given (ex. -1) the loop will play to infinite
+
+    late: str
+        The policy for steps that are late, i.e. the loop reaches them
+        after their deadline:
+
+        - ``compress`` (default): the late steps are processed immediately
+          one after the other (the timeline is compressed) until the loop
+          catches up with the schedule
+        - ``skip``: steps whose complete interval has already passed are
+          not processed at all; the loop jumps to the step that should be
+          active now, which keeps it in sync with external timelines (ex.
+          music or other robots); the last step is always processed so
+          that the loop ends on its final state
     """
-    def __init__(self, name='STEPLOOP', patience=1.0, times=1):
+    def __init__(self, name='STEPLOOP', patience=1.0, times=1,
+                 late='compress'):
         super().__init__(name=name, patience=patience)
         self.__times = times
+        check_options(late, ['compress', 'skip'], 'steploop', name, logger)
+        self.__late = late
+        self.__steps = None
+        self.__skipped = 0
+        # the scheduled moment of the next step in cooperative mode
+        self.__deadline = None
 
     @property
     def times(self):
         return self.__times
 
+    @property
+    def late(self):
+        """The policy for late steps: 'compress' or 'skip'."""
+        return self.__late
+
+    @property
+    def skipped(self):
+        """The number of steps skipped because they were late since the
+        loop was started."""
+        return self.__skipped
+
     def play(self):
         """Provides the step data. Should be overridden by subclasses and
         implement a ``yield`` logic. :py:meth:`run` invokes ``next`` on this
@@ -43,29 +79,97 @@ class StepLoop(BaseThread):
         """Resets the loop from the begining."""
         pass
 
-    def run(self):
-        """Wraps the execution between the duration provided and
-        decrements iteration run.
-        """
+    def steps(self):
+        """Iterates over the steps produced by :py:meth:`play` as many
+        ``times`` as requested."""
         iteration = self.times
         while iteration != 0:
             for data, duration in self.play():
-                logger.debug(f'data={data}, duration={duration}')
-                # handle stop requests
-                if self.stopped:
-                    logger.debug('Thread stopped')
-                    return None
-                # handle pause requests
+                yield data, duration
+            iteration -= 1
+
+    def __steps_ahead(self):
+        """Iterates over :py:meth:`steps` looking one step ahead; yields
+        the step data, duration and if the step is the last one."""
+        steps = self.steps()
+        try:
+            previous = next(steps)
+        except StopIteration:
+            return
+        for current in steps:
+            yield previous[0], previous[1], False
+            previous = current
+        yield previous[0], previous[1], True
+
+    def _begin(self):
+        """Resets the iterator used by :py:meth:`step` before starting."""
+        self.__steps = None
+        self.__skipped = 0
+        self.__deadline = None
+        super()._begin()
+
+    def __is_late(self, end, last):
+        """Checks if a step ending at ``end`` should be skipped; the last
+        step is never skipped."""
+        if self.__late == 'skip' and not last and self.clock.time() >= end:
+            self.__skipped += 1
+            logger.debug(f'Step loop "{self.name}" skipped a late step')
+            return True
+        return False
+
+    def run(self):
+        """Processes the steps at their absolute deadlines, computed from
+        the start moment and the cumulative durations of the steps. The
+        time spent in pause moves the deadlines of the remaining steps.
+        """
+        clock = self.clock
+        deadline = clock.time()
+        for data, duration, last in self.__steps_ahead():
+            logger.debug(f'data={data}, duration={duration}')
+            # handle stop requests
+            if self.stopped:
+                logger.debug('Thread stopped')
+                return None
+            # handle pause requests
+            if self.paused:
+                paused_at = clock.time()
                 while self.paused:
-                    time.sleep(0.001)          # 1ms
-                # process
-                start_time = time.time()
+                    clock.sleep(0.001)          # 1ms
+                deadline += clock.time() - paused_at
+            # process
+            end = deadline + duration
+            if not self.__is_late(end, last):
                 self.atomic(data)
-                end_time = time.time()
-                wait_time = duration - (end_time - start_time)
-                if wait_time > 0:               # pragma: no branch
-                    time.sleep(wait_time)
-            iteration -= 1
+            deadline = end
+            clock.sleep(deadline - clock.time())
+
+    def step(self):
+        """Cooperative version of :py:meth:`run`: processes the next step
+        and returns its duration. While paused it asks to be polled again
+        in 1ms. The executor schedules the steps at absolute deadlines;
+        with the ``skip`` policy the late steps are skipped and their
+        durations are added to the one returned."""
+        if self.__deadline is None:
+            self.__deadline = self.clock.time()
+        if self.paused:
+            self.__deadline += 0.001
+            return 0.001
+        if self.__steps is None:
+            self.__steps = self.__steps_ahead()
+        delay = 0.0
+        while True:
+            try:
+                data, duration, last = next(self.__steps)
+            except StopIteration:
+                self.__steps = None
+                return None
+            logger.debug(f'data={data}, duration={duration}')
+            delay += duration
+            if not self.__is_late(self.__deadline + delay, last):
+                break
+        self.atomic(data)
+        self.__deadline += delay
+        return delay
 
     def atomic(self, data):
         """Executes the step.
@@ -114,6 +218,10 @@ class Motion(BaseLoop):
     review: float
         The time in [s] to calculate the statistics for the frequency.
 
+    phase: float or ``None``
+        An offset of the loop wakeups expressed as a fraction [0..1) of the
+        period. See :py:class:`BaseLoop`.
+
     robot: JointManager or subclass
         The robot Joint Manager that controls the moves.
 
@@ -121,19 +229,20 @@ class Motion(BaseLoop):
         The joints used by the motion process.
     """
     def __init__(self, name='MOTION', patience=1.0, frequency=None,
-                 warning=0.90, throttle=0.1, review=1.0, manager=None,
-                 joints=[]):
+                 warning=0.90, throttle=0.1, review=1.0, phase=None,
+                 manager=None, joints=[]):
         super().__init__(name=name, patience=patience, frequency=frequency,
-                         warning=warning, throttle=throttle, review=review)
+                         warning=warning, throttle=throttle, review=review,
+                         phase=phase)
         check_not_empty(manager, 'manager', 'motion', self.name, logger)
         self.__manager = manager
         check_not_empty(joints, 'joints', 'motion', self.name, logger)
         self.__joints = joints
-        self.__ticks = time.time()
+        self.__ticks = self.clock.time()
 
     def setup(self):
         """Called when starting the loop. Resets the ticks counter."""
-        self.__ticks = time.time()
+        self.__ticks = self.clock.time()
 
     def manager(self):
         """The robot associated with the motion."""
@@ -145,7 +254,7 @@ class Motion(BaseLoop):
 
     def ticks(self):
         """Seconds passed since the loop started."""
-        return time.time() - self.__ticks
+        return self.clock.time() - self.__ticks
 
     def atomic(self):
         """Called with frequency ``frequency``, this should be implemented
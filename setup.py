@@ -39,7 +39,7 @@ manually as needed.
  - if you want to use I2C devices you need to install SMBus
  - if you want to use SPI devices you need to install spidev
 """
-install_requires = ['pyyaml']
+install_requires = ['pyyaml', 'numpy']
 
 extras = {
     "spi": ['spidev'],
@@ -1,7 +1,10 @@
 import pytest
 import logging
+import gc
 import time
+import threading
 import yaml
+import numpy
 from math import nan
 
 from roboglia.utils import register_class, unregister_class, registered_classes, get_registered_class
@@ -9,16 +12,25 @@ from roboglia.utils import check_key, check_options, check_type, check_not_empty
 
 from roboglia.base import BaseRobot, BaseDevice, BaseBus, BaseRegister
 from roboglia.base import RegisterWithConversion, RegisterWithThreshold
-from roboglia.base import RegisterWithMapping
-from roboglia.base import BaseThread
-from roboglia.base import PVL, PVLList
+from roboglia.base import RegisterWithMapping, RegisterWithDynamicConversion
+from roboglia.base import RegisterSpec
+from roboglia.base import BaseThread, BaseLoop, BaseWriteSync
+from roboglia.base import VirtualClock, CooperativeExecutor
+from roboglia.base import PVL, PVLList, Joint
+from roboglia.base import CommandBuffer, Mailbox, Trajectory, LatencyTracer
+from roboglia.base import KinematicChain
+from roboglia.base.robot import _nan_mean, _nan_max
 from roboglia.base import SharedFileBus
 
 from roboglia.dynamixel import DynamixelBus
 
 from roboglia.i2c import SharedI2CBus
 
-from roboglia.move import Script
+from roboglia.move import Script, Timeline, StepLoop
+from roboglia.move import FrameSource, StreamScript, MoveScheduler
+from roboglia.move import SineOscillator, CPGOscillator, BezierGait, LinearRamp
+from roboglia.move import OffloadedMotion, Recorder
+from roboglia.move.recorder import _keyframes
 
 # format = '%(asctime)s %(levelname)-7s %(threadName)-18s %(name)-32s %(message)s'
 # logging.basicConfig(format=format, 
@@ -190,6 +202,134 @@ class TestMockRobot:
         assert len(caplog.records) == 1
         assert 'when converting to internal for register' in caplog.text
 
+    def test_register_spec_shared(self, mock_robot):
+        d01 = mock_robot.devices['d01']
+        d02 = mock_robot.devices['d02']
+        for name, reg in d01.registers.items():
+            other = d02.registers[name]
+            # same model: one spec, separate state
+            assert reg.spec is other.spec
+            assert not hasattr(reg, '__dict__')
+        d01.current_pos.int_value = 100
+        d02.current_pos.int_value = 200
+        assert d01.current_pos.int_value == 100
+        spec = d01.current_pos.spec
+        assert isinstance(spec, RegisterSpec)
+        assert spec.params['factor'] == d01.current_pos.factor
+        with pytest.raises(AttributeError):
+            spec.size = 4
+        with pytest.raises(TypeError):
+            spec.params['factor'] = 2.0
+        # specs no longer used are released
+        register = BaseRegister(name='unique', device=d01, address=1234,
+                                default=7)
+        count = len(RegisterSpec.cache)
+        del register
+        gc.collect()
+        assert len(RegisterSpec.cache) == count - 1
+
+    def test_write_sync_failed(self, mock_robot, monkeypatch):
+        sync = mock_robot.syncs['write']
+        dev = mock_robot.devices['d01']
+        monkeypatch.setattr(sync.bus, 'naked_write', lambda reg, value: False)
+        dev.desired_pos.int_value = 600
+        sync.atomic()
+        # not written: retried in the next cycle
+        assert dev.desired_pos.dirty
+        monkeypatch.undo()
+        sync.atomic()
+        assert not dev.desired_pos.dirty
+        # a value changed after packing stays dirty
+        registers = sync.mark_clean([dev])
+        dev.desired_pos.int_value = 700
+        sync.mark_transmitted(registers, True)
+        assert dev.desired_pos.dirty
+
+    def test_sync_listeners(self, mock_robot):
+        sync = mock_robot.syncs['read']
+        calls = []
+
+        def once(source):
+            calls.append('once')
+            source.remove_listener(once)
+            source.add_listener(late)
+
+        def late(source):
+            calls.append('late')
+
+        sync.add_listener(once)
+        sync.add_listener(once)
+        listeners = sync.listeners
+        sync.notify_listeners()
+        # changes made while notifying apply from the next cycle
+        assert calls == ['once']
+        assert listeners == (once,)
+        assert sync.listeners == (late,)
+        sync.notify_listeners()
+        assert calls == ['once', 'late']
+        sync.remove_listener(late)
+        assert sync.listeners == ()
+
+    def test_device_image(self, mock_robot):
+        d01 = mock_robot.devices['d01']
+        assert len(d01.image) == 100
+        assert d01.current_pos.bound
+        assert d01.status_one.bound
+        # 95-96 and 96 overlap partially
+        assert not d01.writeable_current_load.bound
+        assert not d01.current_voltage.bound
+        assert bytes(d01.image[70:72]) == (512).to_bytes(2, 'little')
+        d01.desired_pos.int_value = 600
+        assert bytes(d01.image[30:32]) == (600).to_bytes(2, 'little')
+        assert d01.desired_pos.dirty
+        # values are stored as the buses encode them
+        d01.desired_pos.int_value = -1
+        assert d01.desired_pos.int_value == 0xFFFF
+        d01.desired_pos.int_value = 0x10258
+        assert d01.desired_pos.int_value == 0x258
+        # floats are rounded the same for bound and unbound registers
+        d01.desired_pos.int_value = 600.6
+        d01.current_voltage.int_value = 120.6
+        assert d01.desired_pos.int_value == 601
+        assert d01.current_voltage.int_value == 121
+        # one copy updates all the registers in the range
+        value = d01.current_pos.value
+        d01.load_image(70, [0x10, 0x02, 0, 0, 0, 0, 0, 0, 0, 0, 1, 2])
+        assert d01.current_pos.int_value == 0x210
+        assert d01.current_pos.value != value
+        assert d01.current_speed.int_value == 0x201
+        # clones see the main register in the image
+        d01.load_image(99, [0b00000001])
+        assert d01.status_one.value
+
+    def test_register_value_cache(self, dummy_device, monkeypatch):
+        dummy_device.scale = BaseRegister(name='scale', device=dummy_device,
+                                          address=40, sync=True, access='RW',
+                                          default=2)
+        reg = RegisterWithDynamicConversion(
+            name='test', device=dummy_device, address=42, sync=True,
+            access='RW', factor=10.0, factor_reg='scale')
+        reg.int_value = 100
+        assert reg.value == 20
+        calls = []
+        convert = RegisterWithDynamicConversion.value_to_external
+        monkeypatch.setattr(RegisterWithDynamicConversion,
+                            'value_to_external',
+                            lambda self, value: calls.append(value) or
+                            convert(self, value))
+        for _ in range(3):
+            assert reg.value == 20
+        assert calls == []
+        version = reg.version
+        reg.int_value = 100
+        assert reg.version == version
+        # changes of the value or of the factor register invalidate it
+        reg.int_value = 50
+        assert reg.value == 10
+        dummy_device.scale.int_value = 3
+        assert reg.value == 15
+        assert len(calls) == 2
+
     def test_sync_pause_resume(self, mock_robot):
         write_sync = mock_robot.syncs['write']
         write_sync.start()
@@ -639,6 +779,27 @@ class TestDynamixelRobot:
         time.sleep(1)
         robot.stop()
 
+    def test_dynamixel_syncwrite_changed_only(self, mock_robot_init, caplog):
+        init = mock_robot_init['dynamixel']
+        init['syncs']['syncwrite']['changed_only'] = True
+        robot = BaseRobot(**init)
+        robot.start()
+        sync = robot.syncs['syncwrite']
+        sync.setup()
+        sync.mark_clean(sync.devices)
+        assert sync.devices_to_write() == []
+        # nothing changed: the sync does not even try to use the bus
+        robot.buses['ttys1'].can_use()      # lock the bus
+        caplog.clear()
+        sync.atomic()
+        assert 'failed to acquire bus' not in caplog.text
+        robot.buses['ttys1'].stop_using()
+        dev = robot.devices['d11']
+        dev.goal_position_deg.value = dev.goal_position_deg.value + 10
+        assert dev.goal_position_deg.dirty
+        assert sync.devices_to_write() == [dev]
+        robot.stop()
+
     def test_dynamixel_syncread(self, mock_robot_init):
         robot = BaseRobot(**mock_robot_init['dynamixel'])
         robot.start()
@@ -646,6 +807,44 @@ class TestDynamixelRobot:
         time.sleep(1)
         robot.stop()
 
+    def test_dynamixel_syncread_image(self, mock_robot_init):
+        robot = BaseRobot(**mock_robot_init['dynamixel'])
+        sync = robot.syncs['syncread']
+        assert sync.use_image
+        robot.start()
+        sync.start()
+        time.sleep(0.5)
+        robot.stop()
+        for device in sync.devices:
+            assert device.image_version > 0
+            register = device.present_position_deg
+            assert register.timestamp is not None
+            start = register.address
+            assert list(device.image[start:start + register.size]) == \
+                device.register_low_endian(register.int_value, register.size)
+
+    def test_dynamixel_syncread_gaps(self, mock_robot_init):
+        init = mock_robot_init['dynamixel']
+        init['syncs']['syncread']['registers'] = ['torque_enable',
+                                                  'present_position_deg']
+        robot = BaseRobot(**init)
+        robot.start()
+        sync = robot.syncs['syncread']
+        dev = robot.devices['d11']
+        dev.goal_position_deg.value = 100.0
+        goal = dev.goal_position_deg.int_value
+        sync.setup()
+        # the mock bus produces random communication errors
+        for _ in range(20):
+            sync.atomic()
+            if dev.present_position_deg.timestamp is not None:
+                break
+        # the registers in the gap are not overwritten
+        assert dev.goal_position_deg.int_value == goal
+        assert dev.goal_position_deg.dirty
+        assert dev.present_position_deg.timestamp is not None
+        robot.stop()
+
     def test_dynamixel_bulkwrite(self, mock_robot_init):
         robot = BaseRobot(**mock_robot_init['dynamixel'])
         robot.start()
@@ -1008,11 +1207,25 @@ class TestI2CRobot:
 
     def test_i2c_write_loop(self, mock_robot_init):
         robot = BaseRobot(**mock_robot_init['i2crobot'])
+        # word_xl_z overlaps temp; falls back to the registers
+        assert not robot.syncs['write_xl'].use_image
         robot.start()
         robot.syncs['write_xl'].start()
         time.sleep(1)
         robot.stop()
 
+    def test_i2c_write_loop_failed(self, mock_robot_init, monkeypatch):
+        robot = BaseRobot(**mock_robot_init['i2crobot'])
+        robot.start()
+        sync = robot.syncs['write_xl']
+        sync.setup()
+        monkeypatch.setattr(sync.bus, 'write_block', lambda *args: False)
+        register = sync.devices[0].word_xl_x
+        register.int_value = 1234
+        sync.atomic()
+        assert register.dirty
+        robot.stop()
+
     def test_i2c_loop_failed_acquire(self, mock_robot_init, caplog):
         robot = BaseRobot(**mock_robot_init['i2crobot'])
         robot.start()
@@ -1079,6 +1292,23 @@ class TestI2CRobot:
         assert 'attempted to write to a closed bus' in caplog.text
 
 
+def _offloaded_plan(moment, state):
+    # runs in the worker process
+    return numpy.array([30.0, 40.0])
+
+
+def _offloaded_slow(moment, state):
+    time.sleep(0.2)
+    return numpy.array([-30.0, -40.0])
+
+
+def _offloaded_stall(moment, state):
+    # fresh results at the beginning, then the worker stalls
+    if moment > 0.2:
+        time.sleep(0.6)
+    return numpy.array([30.0, 40.0])
+
+
 class TestMove:
 
     @pytest.fixture
@@ -1130,6 +1360,46 @@ class TestMove:
         with pytest.raises(RuntimeError):
             _ = pvl1 - 'string'
 
+    def test_pvl_inplace(self):
+        pvl = PVL(10, nan, nan)
+        same = pvl
+        pvl += PVL(5, 10, nan)
+        pvl -= [1, 2, 3]
+        assert same is pvl and pvl == PVL(14, 8, -3)
+        assert not pvl.is_empty() and PVL().is_empty()
+        with pytest.raises(AttributeError):
+            pvl.other = 10
+        # PVLList is backed by an array that grows as needed
+        pvl_list = PVLList(p=['nan', 1, None])
+        for index in range(10):
+            pvl_list.append(pvl=PVL(index))
+        assert pvl_list.values.shape == (13, 3)
+        assert pvl_list.positions[:3] == [nan, 1, nan]
+        assert pvl_list[-1] == PVL(9) and len(pvl_list[1:3]) == 2
+
+    def test_pvl_aliasing(self):
+        robot = BaseRobot.from_yaml('tests/move_robot.yml')
+        manager = robot.manager
+        joint = robot.joints['j02']
+        stream = BaseThread(name='stream')
+        # the manager copies the submitted values: changing the PVL in
+        # place afterwards does not alter the commands
+        command = PVL(20, 10)
+        manager.submit(stream, {'j02': command})
+        command += 50
+        manager.atomic()
+        assert joint.desired_position == pytest.approx(20, abs=0.5)
+        # the PVLs returned by joints and lists are new objects
+        before = joint.desired
+        desired = joint.desired
+        desired += 50
+        assert joint.desired == before
+        pvl_list = PVLList(p=[1, 2])
+        item = pvl_list[0]
+        item += 10
+        assert pvl_list.positions == [1, 2]
+        manager.stop_submit(stream)
+
     def test_move_load_robot(self, mock_robot):
         manager = mock_robot.manager
         assert len(manager.joints) == 3
@@ -1158,6 +1428,400 @@ class TestMove:
         assert len(c) == 28
         assert len(caplog.records) >= 49
 
+    def test_script_timeline(self, mock_robot):
+        script = Script.from_yaml(robot=mock_robot, file_name='tests/moves/script_1.yml')
+        timeline = script.timeline
+        # 2 x greet (4 + 3 x 2 + 4 frames)
+        assert len(timeline) == 28
+        assert timeline.commands.shape == (28, 3, 3)
+        assert timeline.duration == pytest.approx(2 * (0.6 + 3 * 0.35 + 0.6))
+        assert timeline.times[1] == pytest.approx(0.2)
+        # first frame: positions, velocities and loads for j01..j03
+        assert timeline.commands[0].tolist() == [[0, 10, 100]] * 3
+        assert timeline.index_at(0.25) == 1
+        assert timeline.sample(0.25)[:, 0].tolist() == [100] * 3
+        # frame_04 only commands j03
+        assert numpy.isnan(timeline.commands[4, :2, 0]).all()
+        assert timeline.commands[4, 2, 0] == 300
+        # reversed move_1 ends with start
+        assert timeline.commands[13].tolist() == [[0, 10, 100]] * 3
+        assert timeline.sample(timeline.duration) is None
+        assert timeline.index_at(-1) is None
+        steps = list(script.play())
+        assert len(steps) == 28
+        assert steps[0][0] is not None and steps[0][1] == 0.2
+        with pytest.raises(ValueError):
+            Timeline([0.1, 0.2], [[[0, 0, 0]]])
+
+    @pytest.mark.parametrize('method', ['linear', 'minjerk', 'cubic'])
+    def test_script_interpolation(self, mock_robot, method):
+        script = Script(
+            robot=mock_robot, joints=['j01', 'j02'],
+            frames={'a': [0, 0], 'b': [100, nan]},
+            sequences={'move': {'frames': ['a', 'b'],
+                                'durations': [1.0, 0.5]}},
+            scenes={'scene': {'sequences': ['move']}},
+            script=['scene'], interpolation=method, rate=10.0)
+        timeline = script.timeline
+        assert len(timeline) == 15
+        assert timeline.duration == pytest.approx(1.5)
+        positions = timeline.commands[:, 0, 0]
+        assert positions[0] == 0
+        assert 0 < positions[5] < 100
+        if method != 'cubic':
+            # symmetric transitions that do not overshoot
+            assert positions[5] == pytest.approx(50)
+            assert positions[12] == 100
+            assert numpy.all(numpy.diff(positions) >= 0)
+        if method == 'minjerk':
+            assert positions[2] < 20
+        # not commanded in the last keyframe: holds the previous one
+        assert timeline.commands[3, 1, 0] == 0
+        assert timeline.commands[12, 1, 0] == 0
+        # interpolated only across the keyframes where it is defined
+        sparse = Script(
+            robot=mock_robot, joints=['j01', 'j02'],
+            frames={'a': [0, nan], 'b': [50, 0], 'c': [100, 100]},
+            sequences={'move': {'frames': ['a', 'b', 'c'],
+                                'durations': [1.0, 1.0, 0.5]}},
+            scenes={'scene': {'sequences': ['move']}},
+            script=['scene'], interpolation=method, rate=10.0)
+        commands = sparse.timeline.commands
+        assert numpy.all(numpy.isnan(commands[:10, 1, 0]))
+        assert commands[10, 1, 0] == 0
+        assert 0 < commands[15, 1, 0] < 100
+        assert commands[20, 1, 0] == 100
+        assert numpy.all(numpy.isnan(commands[:, :, 1]))
+        with pytest.raises(ValueError):
+            Script(robot=mock_robot, interpolation='linear', rate=0)
+        with pytest.raises(ValueError):
+            Script(robot=mock_robot, interpolation='spline')
+        # repeated scripts return to the first frame at the end
+        looped = Script(
+            robot=mock_robot, joints=['j01', 'j02'], times=2,
+            frames={'a': [0, 0], 'b': [100, nan]},
+            sequences={'move': {'frames': ['a', 'b'],
+                                'durations': [1.0, 0.5]}},
+            scenes={'scene': {'sequences': ['move']}},
+            script=['scene'], interpolation=method, rate=10.0)
+        positions = looped.timeline.commands[:, 0, 0]
+        assert positions[10] == 100
+        assert positions[-1] < 100
+
+    def test_script_compiled(self, mock_robot, tmp_path):
+        script = Script.from_yaml(robot=mock_robot, file_name='tests/moves/script_1.yml')
+        file_name = str(tmp_path / 'script_1.npz')
+        script.compile(file_name)
+        assert (tmp_path / 'script_1.npy').exists()
+        loaded = Script.from_compiled(mock_robot, str(tmp_path / 'script_1'))
+        assert loaded.name == 'script_1'
+        assert isinstance(loaded.timeline.commands, numpy.memmap)
+        numpy.testing.assert_array_equal(loaded.timeline.commands,
+                                         script.timeline.commands)
+        assert loaded.timeline.duration == script.timeline.duration
+        assert [joint.name if joint else None for joint in loaded.joints] == \
+            ['j01', 'j02', 'j03', None]
+        assert len(list(loaded.play())) == 28
+        # incompatible versions are rejected
+        data = dict(numpy.load(file_name))
+        data['version'] = numpy.array(99)
+        numpy.savez(file_name, **data)
+        with pytest.raises(ValueError):
+            Script.from_compiled(mock_robot, file_name)
+
+    def test_move_scheduler(self):
+
+        class Counter(BaseLoop):
+            def atomic(self):
+                self.count += 1
+
+        class Steps(StepLoop):
+            def play(self):
+                for index in range(5):
+                    yield index, 0.01
+
+            def atomic(self, data):
+                self.played.append(data)
+
+        scheduler = MoveScheduler()
+        scheduler.start()
+        threads = threading.active_count()
+        loops = [Counter(name=f'loop{index}', frequency=100.0)
+                 for index in range(3)]
+        steps = Steps(name='steps')
+        steps.played = []
+        for loop in loops:
+            loop.count = 0
+        scheduler.attach(steps, *loops)
+        for task in loops + [steps]:
+            task.start()
+        # no OS threads were created for the tasks
+        assert threading.active_count() == threads
+        time.sleep(0.3)
+        assert steps.played == [0, 1, 2, 3, 4]
+        assert steps not in scheduler.tasks
+        assert all(loop.count > 10 for loop in loops)
+        loops[0].pause()
+        count = loops[0].count
+        time.sleep(0.1)
+        assert loops[0].count == count
+        loops[1].stop()
+        assert loops[1].stopped
+        assert set(scheduler.tasks) == {loops[0], loops[2]}
+        scheduler.stop()
+        assert scheduler.tasks == []
+        assert loops[2].stopped
+
+    def test_array_motions(self, mock_robot):
+        manager = mock_robot.manager
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        sine = SineOscillator(manager=manager, joints=joints, frequency=50.0,
+                              cycle=2.0, amplitudes=[10, 20], offsets=5,
+                              phases=[0, 0.5])
+        numpy.testing.assert_allclose(sine.evaluate(0.5)[:, 0], [15, -15])
+        assert sine.evaluate(0.0)[0, 1] == pytest.approx(10 * numpy.pi)
+        gait = BezierGait(manager=manager, joints=joints, frequency=50.0,
+                          cycle=1.0, points=[[0, 30, 30, 0], [10, 10, 50, 10]],
+                          phases=[0, 0.5], table_rate=100.0)
+        numpy.testing.assert_allclose(gait.evaluate(0.0), [0, 25])
+        numpy.testing.assert_allclose(gait.evaluate(0.5), [22.5, 10])
+        for cls in (SineOscillator, CPGOscillator):
+            with pytest.raises(ValueError):
+                cls(manager=manager, joints=joints, amplitudes=10)
+        gait.setup()
+        assert gait.table.shape == (100, 2, 3)
+        numpy.testing.assert_allclose(gait.table[50, :, 0], [22.5, 10])
+        ramp = LinearRamp(manager=manager, joints=joints, frequency=50.0,
+                          start=[0, 10], end=[100, 10], duration=2.0)
+        numpy.testing.assert_allclose(ramp.evaluate(0.5), [25, 10])
+        numpy.testing.assert_allclose(ramp.evaluate(3.0), [100, 10])
+        with pytest.raises(ValueError):
+            BezierGait(manager=manager, joints=joints, cycle=1.0,
+                       points=[[0, 1]])
+
+    def test_cpg_oscillator(self, mock_robot):
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        cpg = CPGOscillator(manager=mock_robot.manager, joints=joints,
+                            frequency=50.0, cycle=1.0, amplitudes=10,
+                            weights=5.0, biases=[[0, 0.25], [-0.25, 0]])
+        for step in range(1, 201):
+            cpg.evaluate(step * 0.02)
+        # the oscillators locked on the requested phase difference
+        difference = (cpg.phases[1] - cpg.phases[0]) % (2 * numpy.pi)
+        assert difference == pytest.approx(numpy.pi / 2, abs=0.01)
+
+    def test_cpg_oscillator_anti_phase(self, mock_robot):
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        cpg = CPGOscillator(manager=mock_robot.manager, joints=joints,
+                            frequency=50.0, cycle=1.0, amplitudes=10,
+                            weights=5.0, biases=[[0, 0.5], [-0.5, 0]])
+        # starts on the pattern, not on the unstable in-phase equilibrium
+        cpg.setup()
+        for step in range(1, 201):
+            cpg.evaluate(step * 0.02)
+        difference = (cpg.phases[1] - cpg.phases[0]) % (2 * numpy.pi)
+        assert difference == pytest.approx(numpy.pi, abs=0.01)
+        with pytest.raises(ValueError):
+            CPGOscillator(manager=mock_robot.manager, joints=joints,
+                          frequency=50.0, cycle=1.0, table_rate=50.0)
+
+    def test_array_motion_submits(self, mock_robot):
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        ramp = LinearRamp(name='ramp', manager=mock_robot.manager,
+                          joints=joints, frequency=50.0, start=[0, 0],
+                          end=[40, 60], duration=0.2)
+        ramp.start()
+        time.sleep(0.5)
+        assert joints[0].desired_position == pytest.approx(40, abs=0.5)
+        assert joints[1].desired_position == pytest.approx(60, abs=0.5)
+        ramp.stop()
+
+    def test_recorder(self, tmp_path):
+        robot = BaseRobot.from_yaml('tests/dummy_robot.yml')
+        robot.start()
+        recorder = Recorder(robot=robot, group='joints', capacity=20)
+        assert recorder.sync is robot.syncs['read']
+        assert [joint.name for joint in recorder.joints] == ['pan', 'tilt']
+        recorder.start()
+        time.sleep(0.4)
+        recorder.stop()
+        robot.stop()
+        # 100Hz sync: the ring buffer wrapped around
+        assert len(recorder) == 20
+        times, values = recorder.samples()
+        assert values.shape == (20, 2, 3)
+        assert numpy.all(numpy.diff(times) > 0)
+        definition = recorder.to_script(name='demo', velocities=True)
+        demo = definition['demo']
+        assert demo['joints'] == ['pan', 'tilt']
+        assert len(demo['frames']) == 20
+        assert sum(demo['sequences']['demo']['durations']) == \
+            pytest.approx(times[-1] - times[0], abs=0.02)
+        file_name = str(tmp_path / 'demo.yml')
+        recorder.save(file_name, name='demo', tolerance=1000.0)
+        script = Script.from_yaml(robot=robot, file_name=file_name)
+        assert script.interpolation == 'linear'
+        assert len(script.frames) == 2
+        recorder.save(str(tmp_path / 'demo.npz'), name='demo')
+        loaded = Script.from_compiled(robot, str(tmp_path / 'demo.npz'))
+        assert len(loaded.timeline) == 20
+        recorder.save(str(tmp_path / 'other.npy'), name='other')
+        loaded = Script.from_compiled(robot, str(tmp_path / 'other.npy'))
+        assert loaded.name == 'other'
+        recorder.clear()
+        with pytest.raises(ValueError):
+            recorder.to_script()
+
+    def test_recorder_keyframes(self):
+        times = numpy.arange(0, 1.01, 0.1)
+        positions = numpy.stack([numpy.minimum(times, 0.5) * 100,
+                                 numpy.full(len(times), nan)], axis=1)
+        # a ramp and a hold: the corner is the only keyframe needed
+        assert _keyframes(times, positions, 0.1) == [0, 5, 10]
+        assert _keyframes(times, positions, 100) == [0, 10]
+
+    def test_offloaded_motion(self, mock_robot):
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        motion = OffloadedMotion(name='offload', manager=mock_robot.manager,
+                                 joints=joints, frequency=50.0,
+                                 function=_offloaded_plan, staleness=0.5)
+        motion.start()
+        time.sleep(0.5)
+        assert motion.worker.is_alive()
+        assert joints[0].desired_position == pytest.approx(30, abs=0.5)
+        assert joints[1].desired_position == pytest.approx(40, abs=0.5)
+        worker = motion.worker
+        motion.stop()
+        assert not worker.is_alive()
+        assert motion.worker is None
+        # results computed from old snapshots are not submitted
+        slow = OffloadedMotion(name='slow', manager=mock_robot.manager,
+                               joints=joints, frequency=50.0,
+                               function=_offloaded_slow, staleness=0.05)
+        slow.start()
+        time.sleep(0.5)
+        slow.stop()
+        assert slow.dropped > 0
+        assert joints[0].desired_position == pytest.approx(30, abs=0.5)
+        with pytest.raises(ValueError):
+            OffloadedMotion(name='table', manager=mock_robot.manager,
+                            joints=joints, function=_offloaded_plan,
+                            cycle=1.0, table_rate=10.0)
+
+    def test_offloaded_motion_stale(self, mock_robot):
+        joints = [mock_robot.joints['j01'], mock_robot.joints['j02']]
+        other = BaseThread(name='other')
+        mock_robot.manager.submit(other, {'j01': (0,)})
+        motion = OffloadedMotion(name='stall', manager=mock_robot.manager,
+                                 joints=joints, frequency=50.0,
+                                 function=_offloaded_stall, staleness=0.1)
+        motion.start()
+        time.sleep(0.2)
+        # blended with the other stream
+        assert joints[0].desired_position == pytest.approx(15, abs=0.5)
+        time.sleep(0.3)
+        # the outdated commands are withdrawn
+        assert motion.dropped > 0
+        assert joints[0].desired_position == pytest.approx(0, abs=0.5)
+        motion.stop()
+        mock_robot.manager.stop_submit(other)
+
+    class SlowSteps(StepLoop):
+        """Ten steps of 0.1s; processing step 2 takes 0.25s."""
+        def play(self):
+            for index in range(10):
+                yield index, 0.1
+
+        def atomic(self, data):
+            self.played.append((data, round(self.clock.time(), 6)))
+            self.clock.sleep(0.25 if data == 2 else 0.03)
+
+    @pytest.mark.parametrize('late,played', [
+        ('compress', [(0, 0.0), (1, 0.1), (2, 0.2), (3, 0.45), (4, 0.48),
+                      (5, 0.51), (6, 0.6), (7, 0.7), (8, 0.8), (9, 0.9)]),
+        ('skip', [(0, 0.0), (1, 0.1), (2, 0.2), (4, 0.45), (5, 0.5),
+                  (6, 0.6), (7, 0.7), (8, 0.8), (9, 0.9)])])
+    def test_steploop_absolute_timeline(self, late, played):
+        # threaded
+        loop = self.SlowSteps(late=late)
+        loop.clock = VirtualClock()
+        loop.played = []
+        loop._begin()
+        loop.run()
+        assert loop.played == played
+        assert loop.skipped == 10 - len(played)
+        # cooperative
+        executor = CooperativeExecutor()
+        loop = self.SlowSteps(late=late)
+        loop.played = []
+        executor.attach(loop)
+        loop.start()
+        executor.run()
+        assert loop.played == played
+        with pytest.raises(ValueError):
+            self.SlowSteps(late='drop')
+
+    class SlowEnd(SlowSteps):
+        """Processing step 8 takes 0.35s: step 9 is reached after its
+        interval."""
+        def atomic(self, data):
+            self.played.append((data, round(self.clock.time(), 6)))
+            self.clock.sleep(0.35 if data == 8 else 0.03)
+
+    def test_steploop_skip_last(self):
+        played = [(0, 0.0), (1, 0.1), (2, 0.2), (3, 0.3), (4, 0.4),
+                  (5, 0.5), (6, 0.6), (7, 0.7), (8, 0.8), (9, 1.15)]
+        # threaded
+        loop = self.SlowEnd(late='skip')
+        loop.clock = VirtualClock()
+        loop.played = []
+        loop._begin()
+        loop.run()
+        # the last step is late but it is not skipped
+        assert loop.played == played
+        assert loop.skipped == 0
+        # cooperative
+        executor = CooperativeExecutor()
+        loop = self.SlowEnd(late='skip')
+        loop.played = []
+        executor.attach(loop)
+        loop.start()
+        executor.run()
+        assert loop.played == played
+
+    def test_stream_script(self, mock_robot, tmp_path):
+        csv_file = tmp_path / 'dance.csv'
+        with open(csv_file, 'w') as f:
+            f.write('duration,j01,j02.v,unknown\n')
+            for index in range(2500):
+                velocity = '' if index % 2 else str(index % 100)
+                f.write(f'0.02,{index % 140},{velocity},1\n')
+        script = StreamScript(robot=mock_robot, source=str(csv_file),
+                              chunk_size=1000)
+        assert script.source.columns == ['duration', 'j01', 'j02.v',
+                                         'unknown']
+        steps = [(data.copy(), duration)
+                 for data, duration in script.play()]
+        assert len(steps) == 2500
+        assert steps[1001][1] == 0.02
+        assert steps[1001][0][0, 0] == 1001 % 140
+        assert numpy.isnan(steps[1001][0][1, 1])
+        assert steps[1002][0][1, 1] == 2
+        assert numpy.isnan(steps[1002][0][2]).all()
+        # the same frames from a memory mapped npy file
+        npy_file = str(tmp_path / 'dance.npy')
+        numpy.save(npy_file, numpy.array([[0.05, 10, nan], [0.05, 20, 5]]))
+        script = StreamScript(robot=mock_robot, source=npy_file,
+                              columns=['duration', 'j01.p', 'j02.v'],
+                              chunk_size=1)
+        script.start()
+        while script.running:
+            time.sleep(0.05)
+        assert mock_robot.joints['j01'].desired_position == \
+            pytest.approx(20, abs=0.5)
+        with pytest.raises(ValueError):
+            FrameSource(npy_file, columns=['j01', 'duration'])
+
     def test_move_execute_script(self, mock_robot, caplog):
         script = Script.from_yaml(robot=mock_robot, file_name='tests/moves/script_1.yml')
         script.start()
@@ -1196,15 +1860,473 @@ class TestMove:
         mock_robot.stop()
         assert True     
 
-    def test_lock_joint_manager(self, mock_robot, caplog):
-        script1 = Script.from_yaml(robot=mock_robot, file_name='tests/moves/script_1.yml')
-        script1.start()
+    def test_lockfree_joint_manager(self, mock_robot):
         manager = mock_robot.manager
-        caplog.clear()
-        lock = manager._JointManager__lock
-        lock.acquire()
-        time.sleep(0.5)
-        lock.release()        
-        assert len(caplog.records) >= 1
-        assert 'failed to acquire manager for stream' in caplog.text
-        assert 'failed to acquire lock for atomic processing' in caplog.text
+        results = []
+
+        def producer(index):
+            stream = BaseThread(name=f'producer{index}')
+            for step in range(200):
+                results.append(manager.submit(stream, {'j01': (step,)}))
+            results.append(manager.stop_submit(stream))
+
+        threads = [threading.Thread(target=producer, args=(index,))
+                   for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # producers never fail and leave no stale mailboxes
+        assert len(results) == 804 and all(results)
+        manager.atomic()
+        assert manager._JointManager__mailboxes == {}
+
+    def test_mailbox(self):
+        mailbox = Mailbox(BaseThread(name='stream'), {'j01': 0, 'j02': 1})
+        out = numpy.zeros((2, 3))
+        assert mailbox.read(out) == 0
+        assert numpy.isnan(out).all()
+        mailbox.write({'j01': PVL(10, 20), 'j02': 30, 'other': (1,)})
+        mailbox.write({'j02': (40, None, 5)})
+        assert mailbox.read(out) == 2
+        assert numpy.isnan(out[0]).all()
+        assert out[1, 0] == 40 and out[1, 2] == 5
+
+    def test_manager_deadband(self):
+        init = yaml.load(open('tests/move_robot.yml'), Loader=yaml.FullLoader)
+        init['dummy']['joints']['j01']['deadband'] = 2.0
+        robot = BaseRobot(**init['dummy'])
+        assert robot.joints['j01'].deadband == (2.0, 0.0, 0.0)
+        register = robot.joints['j01'].position_write_register
+        manager = robot.manager
+        stream = BaseThread(name='stream')
+        manager.submit(stream, {'j01': (40,)})
+        manager.atomic()
+        assert register.dirty
+        register.dirty = False
+        # change inside the deadband is not passed to the joint
+        manager.submit(stream, {'j01': (41,)})
+        manager.atomic()
+        assert not register.dirty
+        manager.submit(stream, {'j01': (42.5,)})
+        manager.atomic()
+        assert register.dirty
+        assert robot.joints['j01'].desired_position == \
+            pytest.approx(42.5, abs=0.5)
+
+    def test_joint_group(self):
+        robot1 = BaseRobot.from_yaml('tests/move_robot.yml')
+        robot2 = BaseRobot.from_yaml('tests/move_robot.yml')
+        group = robot1.joint_group('joints')
+        assert robot1.joint_group('joints') is group
+        assert group.names == ['j01', 'j02', 'j03']
+        group.positions = [10, -20, nan]
+        group.velocities = [5, -10, 15]
+        group.loads = 30
+        # same result as setting the joints one by one
+        for name, pvl in [('j01', PVL(10)), ('j02', PVL(-20, -10)),
+                          ('j03', PVL(nan, 15, 30))]:
+            robot2.joints[name].value = pvl
+        for joint1, joint2 in zip(group.joints,
+                                  robot2.joint_group('joints').joints):
+            assert joint1.desired == joint2.desired
+        desired = group.desired_positions
+        assert desired[0] == pytest.approx(10, abs=0.5)
+        assert numpy.isnan(group.desired_velocities[0])
+        assert numpy.isnan(group.loads[:2]).all()
+        with pytest.raises(ValueError):
+            group.positions = [1, 2]
+        with pytest.raises(KeyError):
+            robot1.joint_group('unknown')
+
+    def test_kinematic_chain(self):
+        with open('tests/move_robot.yml', 'r') as f:
+            components = yaml.load(f, Loader=yaml.FullLoader)['dummy']
+        # planar arm with a gripper that slides along the last link
+        components['chains'] = {'arm': {'links': [
+            {'name': 'shoulder', 'joint': 'j01'},
+            {'name': 'elbow', 'joint': 'j02', 'origin': [1, 0, 0]},
+            {'name': 'wrist', 'origin': [1, 0, 0]},
+            {'name': 'gripper', 'joint': 'j03', 'type': 'prismatic',
+             'axis': [1, 0, 0]},
+            {'name': 'camera', 'parent': 'base', 'origin': [0, 0, 1],
+             'rpy': [0, 0, 90]}]}}
+        robot = BaseRobot(name='dummy', **components)
+        chain = robot.chains['arm']
+        assert isinstance(chain, KinematicChain)
+        assert [joint.name for joint in chain.joints] == ['j01', 'j02', 'j03']
+        points = chain.points([90, 0, 0])
+        numpy.testing.assert_allclose(points[2], [0, 2, 0], atol=1e-9)
+        numpy.testing.assert_allclose(points[4], [0, 0, 1], atol=1e-9)
+        # batch of snapshots
+        batch = chain.points([[0, 90, 0], [0, 0, 0.5], [90, -90, 1]])
+        assert batch.shape == (3, 5, 3)
+        numpy.testing.assert_allclose(batch[:, 3],
+                                      [[1, 1, 0], [2.5, 0, 0], [2, 1, 0]],
+                                      atol=1e-9)
+        poses = chain.forward([0, 90, 0])
+        assert poses.shape == (5, 4, 4)
+        numpy.testing.assert_allclose(poses[4, :3, 0], [0, 1, 0], atol=1e-9)
+        # by default the snapshot is read from the registers
+        positions = [joint.position for joint in chain.joints]
+        numpy.testing.assert_allclose(chain.forward(),
+                                      chain.forward(positions))
+        with pytest.raises(ValueError):
+            chain.forward([0, 0])
+        components['chains'] = {'bad': {'links': [{'name': 'l1',
+                                                   'joint': 'j99'}]}}
+        with pytest.raises(KeyError):
+            BaseRobot(name='dummy', **components)
+
+    def test_joint_estimate(self):
+        bus = BaseBus(robot='robot', port='dev')
+        device = BaseDevice(name='device', bus=bus, dev_id=42, model='DUMMY',
+                            robot='robot')
+        # sync register so that reading it does not access the bus
+        device.pos = BaseRegister(name='pos', device=device, address=40,
+                                  size=2, sync=True, access='RW')
+        joint = Joint(name='est', device=device, pos_read='pos',
+                      pos_write='pos', estimate=True)
+        clock = VirtualClock(start=1.0)
+        joint.clock = clock
+        register = joint.position_read_register
+        # no time-stamped samples yet
+        assert joint.estimated_position == joint.position
+        assert numpy.isnan(joint.estimated_velocity)
+        register.int_value = 10
+        register.timestamp = 1.0
+        assert joint.estimated_position == 10
+        register.int_value = 20
+        register.timestamp = 1.1
+        clock.sleep(0.15)
+        assert joint.estimated_velocity == pytest.approx(100)
+        assert joint.estimated_position == pytest.approx(25)
+        # the extrapolation is limited if the samples stop
+        clock.sleep(10)
+        assert joint.estimated_position == pytest.approx(40)
+        # a value updated after its timestamp is not paired with it
+        assert register.stamp == (1.1, register.version)
+        register.int_value = 50
+        assert joint.estimated_velocity == pytest.approx(100)
+        register.timestamp = 1.2
+        assert joint.estimated_velocity == pytest.approx(300)
+
+    def test_trajectory(self):
+        linear =Trajectory([0, 1, 2], [[0], [10], [30]])
+        assert numpy.isnan(linear.sample(-0.1)).all()
+        assert linear.sample(0.5)[0, 0] == pytest.approx(5)
+        assert linear.sample(1.5)[0, 0] == pytest.approx(20)
+        assert linear.sample(5)[0, 0] == pytest.approx(30)
+        minjerk = Trajectory([0, 1], [[0], [10]], method='minjerk')
+        assert minjerk.sample(0.5)[0, 0] == pytest.approx(5)
+        assert minjerk.sample(0.1)[0, 0] < linear.sample(0.1)[0, 0]
+        cubic = Trajectory([0, 1, 2], [[0], [10], [20]], method='cubic')
+        assert cubic.sample(0.5)[0, 0] == pytest.approx(5)
+        extended = linear.extend(Trajectory([1.5, 3], [[0], [0]]))
+        assert list(extended.times) == [0, 1, 1.5, 3]
+        with pytest.raises(ValueError):
+            Trajectory([0, 0], [[0], [1]])
+        with pytest.raises(ValueError):
+            Trajectory([0, 1], [[0], [1]], method='spline')
+
+    def test_manager_trajectory(self):
+        robot = BaseRobot.from_yaml('tests/move_robot.yml')
+        manager = robot.manager
+        manager.clock = VirtualClock()
+        stream = BaseThread(name='stream')
+        manager.submit_trajectory(stream, [0.0, 1.0, 2.0],
+                                  {'j01': [0, 20, 40], 'j02': [0, 40, 0]})
+        manager.clock.sleep(0.5)
+        manager.atomic()
+        assert robot.joints['j01'].desired_position == \
+            pytest.approx(10, abs=0.5)
+        assert robot.joints['j02'].desired_position == \
+            pytest.approx(20, abs=0.5)
+        # more waypoints queued after the current ones
+        manager.submit_trajectory(stream, [2.0], {'j01': [80]},
+                                  start=1.0, append=True)
+        manager.clock.sleep(2.0)
+        manager.atomic()
+        assert robot.joints['j01'].desired_position == \
+            pytest.approx(60, abs=0.5)
+        # a plain submit replaces the trajectory
+        manager.submit(stream, {'j01': (5,)})
+        manager.clock.sleep(0.5)
+        manager.atomic()
+        assert robot.joints['j01'].desired_position == \
+            pytest.approx(5, abs=0.5)
+
+    def test_manager_limits(self):
+        init = yaml.load(open('tests/move_robot.yml'), Loader=yaml.FullLoader)
+        joints = init['dummy']['joints']
+        joints['j01']['max_velocity'] = 100.0
+        joints['j02']['max_acceleration'] = 5000.0
+        joints['j03']['maxim'] = 30.0
+        robot = BaseRobot(**init['dummy'])
+        manager = robot.manager
+        manager.clock = VirtualClock()
+        stream = BaseThread(name='stream')
+        manager.submit(stream, {'j01': (0,), 'j02': (0,), 'j03': (0,)})
+        manager.atomic()
+        manager.submit(stream, {'j01': (40,), 'j02': (40,), 'j03': (50,)})
+        positions = []
+        for _ in range(2):
+            manager.clock.sleep(manager.period)
+            manager.atomic()
+            positions.append([robot.joints[name].desired_position
+                              for name in ['j01', 'j02', 'j03']])
+        # 100 units/s, 5000 units/s^2, limit 30 and 0.02s period
+        assert positions[0] == pytest.approx([2, 2, 30], abs=0.5)
+        assert positions[1] == pytest.approx([4, 6, 30], abs=0.5)
+        # the joints slow down before the target and do not overshoot
+        start = numpy.array(positions[-1][:2])
+        for target in [20, 40, 0]:
+            manager.submit(stream, {'j01': (target,), 'j02': (target,)})
+            positions = []
+            for _ in range(100):
+                manager.clock.sleep(manager.period)
+                manager.atomic()
+                positions.append([robot.joints[name].desired_position
+                                  for name in ['j01', 'j02']])
+            positions = numpy.array(positions)
+            assert positions[-1] == pytest.approx([target, target], abs=0.5)
+            assert numpy.all(positions <= numpy.maximum(start, target) + 0.5)
+            assert numpy.all(positions >= numpy.minimum(start, target) - 0.5)
+            start = positions[-1]
+
+    def test_command_buffer(self):
+        buffer = CommandBuffer(3, capacity=1)
+        buffer.row('s1')[:] = [[10, nan, nan], [nan, 1, nan], [nan] * 3]
+        buffer.row('s2')[:] = [[20, nan, nan], [nan, 3, nan], [nan] * 3]
+        buffer.row('s3')[0] = [60, nan, nan]
+        assert buffer.streams == ['s1', 's2', 's3']
+        mean = _nan_mean
+        res = buffer.reduce((mean, mean, mean))
+        assert res[0, 0] == pytest.approx(30)
+        assert res[1, 1] == pytest.approx(2)
+        assert numpy.isnan(res[2]).all()
+        # removal keeps the active rows contiguous
+        buffer.remove('s1')
+        assert buffer.streams == ['s3', 's2']
+        maxf = _nan_max
+        assert buffer.reduce((maxf, maxf, maxf))[0, 0] == 60
+        buffer.remove('s3')
+        buffer.remove('s2')
+        assert numpy.isnan(buffer.reduce((mean, mean, mean))).all()
+
+    def test_manager_merge(self, mock_robot):
+        manager = mock_robot.manager
+        assert [joint.name for joint in manager.joints] == \
+            ['j01', 'j02', 'j03']
+        stream1 = BaseThread(name='stream1')
+        stream2 = BaseThread(name='stream2')
+        manager.submit(stream1, {'j01': (40,), 'j02': PVL(50, 10)})
+        # array submissions use the order of manager.joints
+        manager.submit(stream2, numpy.array([[80, nan],
+                                             [nan, 30],
+                                             [nan, nan]]))
+        manager.submit(stream2, {'j01': (10,)}, adjustments=True)
+        manager.atomic()
+        assert mock_robot.joints['j01'].desired_position == \
+            pytest.approx(70, abs=1)
+        desired = mock_robot.joints['j02'].desired
+        assert desired.p == pytest.approx(50, abs=1)
+        assert desired.v == pytest.approx(20, abs=1)
+        manager.stop_submit(stream1)
+        manager.stop_submit(stream2)
+        manager.stop_submit(stream2, adjustments=True)
+
+    def test_manager_blending(self, mock_robot):
+        manager = mock_robot.manager
+        gait = BaseThread(name='gait')
+        pose = BaseThread(name='pose')
+        balance = BaseThread(name='balance')
+        manager.submit(gait, {'j01': (30,), 'j02': (30,)}, weight=3.0)
+        manager.submit(pose, {'j01': (90,), 'j02': (90,)})
+        manager.atomic()
+        assert mock_robot.joints['j01'].desired_position == \
+            pytest.approx(45, abs=1)
+        # balance overrides only the joint it commands
+        manager.submit(balance, {'j02': (-20,)}, priority=1)
+        manager.atomic()
+        assert mock_robot.joints['j01'].desired_position == \
+            pytest.approx(45, abs=1)
+        assert mock_robot.joints['j02'].desired_position == \
+            pytest.approx(-20, abs=1)
+        manager.stop_submit(balance)
+        manager.atomic()
+        assert mock_robot.joints['j02'].desired_position == \
+            pytest.approx(45, abs=1)
+        with pytest.raises(ValueError):
+            manager.submit(gait, {'j01': (30,)}, weight=0)
+        manager.stop_submit(gait)
+        manager.stop_submit(pose)
+
+    def test_command_buffer_blending(self):
+        buffer = CommandBuffer(2, capacity=1)
+        buffer.row('a')[:] = [[10, nan, nan], [10, nan, nan]]
+        buffer.row('b')[:] = [[40, nan, nan], [nan, nan, nan]]
+        buffer.set_blending('a', weight=2.0)
+        buffer.set_blending('b', priority=1)
+        result = buffer.reduce((_nan_mean, _nan_mean, _nan_mean))
+        assert result[:, 0].tolist() == [40, 10]
+        buffer.set_blending('b', weight=1.0, priority=0)
+        result = buffer.reduce((_nan_mean, _nan_mean, _nan_mean))
+        assert result[:, 0].tolist() == [20, 10]
+        buffer.remove('a')
+        result = buffer.reduce((_nan_mean, _nan_mean, _nan_mean))
+        assert result[:, 0].tolist()[0] == 40
+
+
+class TestCooperativeExecutor:
+
+    @pytest.fixture
+    def virtual_robot(self):
+        robot = BaseRobot.from_yaml('tests/move_robot.yml')
+        executor = CooperativeExecutor()
+        executor.attach_robot(robot)
+        robot.start()
+        yield robot, executor
+        robot.stop()
+
+    def test_virtual_clock(self):
+        clock = VirtualClock(start=10)
+        assert clock.time() == 10.0
+        clock.sleep(2.5)
+        clock.sleep(-1)
+        assert clock.time() == 12.5
+        clock.advance_to(12.0)
+        assert clock.time() == 12.5
+        clock.advance_to(20.0)
+        assert clock.time() == 20.0
+
+    def test_executor_loop(self):
+        class Counter(BaseLoop):
+            def atomic(self):
+                self.count += 1
+
+        executor = CooperativeExecutor()
+        loop = Counter(name='counter', frequency=100.0)
+        loop.count = 0
+        executor.attach(loop)
+        loop.start()
+        assert loop.running
+        executor.run(duration=10.0)
+        assert loop.count == 1001
+        loop.pause()
+        executor.run(duration=5.0)
+        assert loop.count == 1001
+        loop.resume()
+        executor.run(duration=1.0)
+        assert loop.count == 1101
+        loop.stop()
+        assert loop.stopped
+        assert executor.tasks == []
+        assert executor.clock.time() == pytest.approx(16.0)
+
+    def test_loop_phase(self):
+        class Stamp(BaseLoop):
+            def atomic(self):
+                self.stamps.append(self.clock.time())
+
+        executor = CooperativeExecutor(clock=VirtualClock(start=0.03))
+        loop = Stamp(name='stamp', frequency=10.0, phase=0.25)
+        loop.stamps = []
+        executor.attach(loop)
+        loop.start()
+        executor.run(duration=0.3)
+        loop.stop()
+        assert loop.stamps == pytest.approx([0.125, 0.225, 0.325])
+        assert loop.offset == pytest.approx(0.025)
+        with pytest.raises(ValueError):
+            Stamp(name='wrong', frequency=10.0, phase=1.5)
+
+    def test_latency_tracer(self, virtual_robot):
+        robot, executor = virtual_robot
+        sync = BaseWriteSync(name='write', frequency=25.0,
+                             group=robot.groups['devices'],
+                             registers=['desired_pos'])
+        executor.attach(sync)
+        tracer = LatencyTracer()
+        tracer.attach_robot(robot)
+        sync.tracer = tracer
+        sync.start()
+        stream = BaseThread(name='stream')
+        executor.run(duration=0.005)
+        robot.manager.submit(stream, {'j01': (30,), 'j02': (40,)})
+        executor.run(duration=0.2)
+        sync.stop()
+        manager = tracer.summary('manager', by='joint')
+        assert list(manager) == ['j01', 'j02']
+        # one sample per joint; unchanged commands are not set again
+        assert manager['j01']['count'] == 1
+        assert manager['j01']['max'] == pytest.approx(0.015)
+        wire = tracer.summary('wire')
+        assert wire['stream']['count'] == 2
+        assert manager['j01']['max'] <= wire['stream']['p50'] <= 0.06
+        assert len(tracer.latencies('wire', joint='j03')) == 0
+        tracer.detach_robot(robot)
+        assert robot.manager.tracer is None
+        tracer.clear()
+        assert tracer.summary() == {}
+
+    def test_latency_tracer_once(self, virtual_robot):
+        robot, executor = virtual_robot
+        tracer = LatencyTracer()
+        tracer.attach_robot(robot)
+        first = BaseThread(name='first')
+        second = BaseThread(name='second')
+        robot.manager.submit(first, {'j01': (30,)})
+        for step in range(5):
+            robot.manager.submit(second, {'j01': (10 + step,)})
+            executor.run(duration=0.02)
+        # the submission of the first stream is traced only once
+        assert len(tracer.latencies('manager', stream='first')) == 1
+        assert len(tracer.latencies('manager', stream='second')) == 5
+        # only the registers set are tagged
+        j02 = robot.joints['j02']
+        tracer.tag(j02, 'direct', 0.0, (True, False, False))
+        register = j02.velocity_write_register
+        tracer.transmitted(register.clone or register, 1.0)
+        assert len(tracer.latencies('wire', stream='direct')) == 0
+        register = j02.position_write_register
+        tracer.transmitted(register.clone or register, 1.0)
+        assert len(tracer.latencies('wire', stream='direct')) == 1
+
+    def test_robot_stagger(self):
+        new_robot = BaseRobot.from_yaml('tests/dummy_robot.yml')
+        assert all(loop.phase is None for loop in new_robot.loops)
+        new_robot.stagger_loops()
+        table = new_robot.wakeup_timetable()
+        assert table == [(0.0, 'read'), (0.005, 'dummy-manager'),
+                         (pytest.approx(0.01), 'read')]
+        # no two loops wake up at the same time
+        offsets = [offset for offset, _ in new_robot.wakeup_timetable(1.0)]
+        assert len(offsets) == len(set(round(o, 6) for o in offsets))
+        # the loops are staggered at start only if requested
+        for stagger in (False, True):
+            init = yaml.load(open('tests/move_robot.yml'),
+                             Loader=yaml.FullLoader)
+            robot = BaseRobot(stagger=stagger, **init['dummy'])
+            executor = CooperativeExecutor()
+            executor.attach_robot(robot)
+            robot.start()
+            assert (robot.manager.phase is not None) == stagger
+            robot.stop()
+
+    def test_executor_script(self, virtual_robot):
+        robot, executor = virtual_robot
+        script = Script.from_yaml(robot=robot,
+                                  file_name='tests/moves/script_3.yml')
+        executor.attach(script)
+        script.start()
+        start = time.time()
+        executor.run(duration=61.0, until=lambda: script.stopped)
+        # 60s of choreography validated much faster than real time
+        assert time.time() - start < 30.0
+        assert script.stopped
+        assert executor.clock.time() == pytest.approx(60.0)
+        # manager submitted the last frame (start) to the joints
+        executor.run(duration=0.1)
+        assert robot.joints['j01'].desired_position == pytest.approx(0.0, abs=1)
+        assert script not in executor.tasks